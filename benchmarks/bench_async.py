@@ -0,0 +1,64 @@
+"""
+Benchmark for AsyncApiClient.
+
+Fetches the rate tables of many base currencies from the local stub server,
+which delays every answer by --latency seconds, once one after another with the
+synchronous ApiClient and once concurrently with AsyncApiClient.  The async wall
+time should stay close to a single request's latency instead of growing with the
+number of bases.
+
+Usage:
+    python benchmarks/bench_async.py [--bases 32] [--latency 0.1] [--concurrency 16]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from api_client import ApiClient  # noqa: E402
+from async_api_client import AsyncApiClient  # noqa: E402
+from stub_server import StubServer, load_recorded_response  # noqa: E402
+
+
+def report(label, server, before, elapsed, bases, latency):
+    calls = server.request_count - before
+    print(f"{label:<20} bases={bases:>4}  http_calls={calls:>4}  wall={elapsed:7.3f}s  "
+          f"sum_of_latencies={calls * latency:7.3f}s")
+
+
+async def fetch_async(base_url, bases, concurrency):
+    async with AsyncApiClient("BENCH", base_url=base_url, max_concurrency=concurrency) as client:
+        return await client.get_many_rates(bases)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sequential against concurrent multi-base fetches")
+    parser.add_argument("--bases", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    bases = ["KES", "USD", "EUR", "UGX"]
+    bases += [code for code in load_recorded_response()["conversion_rates"] if code not in bases]
+    bases = bases[:args.bases]
+
+    with StubServer(latency=args.latency) as server:
+        client = ApiClient("BENCH", base_url=server.base_url)
+        before = server.request_count
+        start = time.perf_counter()
+        for base in bases:
+            client.get_latest_rates(base)
+        report("ApiClient (serial)", server, before, time.perf_counter() - start, len(bases), args.latency)
+
+        before = server.request_count
+        start = time.perf_counter()
+        asyncio.run(fetch_async(server.base_url, bases, args.concurrency))
+        report("AsyncApiClient", server, before, time.perf_counter() - start, len(bases), args.latency)
+
+
+if __name__ == "__main__":
+    main()
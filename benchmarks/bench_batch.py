@@ -0,0 +1,62 @@
+"""
+Benchmark for ApiClient.convert_batch.
+
+Runs batches of random conversions against the local stub server and reports
+how many HTTP requests each batch made and how many rows per second were
+converted.  The per-row baseline reproduces the old behaviour of fetching the
+rate table for every row, so it is only run on a small sample.
+
+Usage:
+    python benchmarks/bench_batch.py [--rows 10000] [--baseline-rows 200]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from api_client import ApiClient  # noqa: E402
+from stub_server import StubServer  # noqa: E402
+
+
+def make_rows(count, codes, seed=0):
+    rng = random.Random(seed)
+    return [(round(rng.uniform(1, 10000), 2), rng.choice(codes), rng.choice(codes)) for _ in range(count)]
+
+
+def measure(label, server, func, rows):
+    before = server.request_count
+    start = time.perf_counter()
+    results = func(rows)
+    elapsed = time.perf_counter() - start
+    calls = server.request_count - before
+    print(f"{label:<28} rows={len(rows):>8}  http_calls={calls:>6}  "
+          f"elapsed={elapsed:8.3f}s  rows/s={len(rows) / elapsed:12.0f}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ApiClient.convert_batch")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--baseline-rows", type=int, default=200)
+    args = parser.parse_args()
+
+    with StubServer() as server:
+        codes = ["KES", "USD", "EUR", "UGX", "TZS", "GBP", "JPY", "ZAR"]
+        rows = make_rows(args.rows, codes)
+
+        # The old code refetched the table for every row; a cache that never holds reproduces that.
+        uncached = ApiClient("BENCH", base_url=server.base_url, ttl=0, max_stale=0)
+        measure("per-row fetch (old)", server,
+                lambda batch: [uncached.convert_currency(a, f, t) for a, f, t in batch],
+                rows[:args.baseline_rows])
+        measure("convert_batch", server, ApiClient("BENCH", base_url=server.base_url).convert_batch, rows)
+        measure("convert_batch per_base", server,
+                lambda batch: ApiClient("BENCH", base_url=server.base_url).convert_batch(batch, per_base=True), rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark for the exact minor-unit conversion mode.
+
+Converts the same random ledger rows against the recorded rate table with the
+float path and with exact mode (ExactRates, banker's rounding and half-up), both
+through utils.batch_convert and through the batch_stream pipeline, and reports
+rows per second for each so the cost of exact mode is visible.
+
+Usage:
+    python benchmarks/bench_exact.py [--rows 100000]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import batch_stream  # noqa: E402
+import utils  # noqa: E402
+from money import ExactRates  # noqa: E402
+from rate_table import RateTable  # noqa: E402
+from stub_server import load_recorded_response  # noqa: E402
+
+
+def make_rows(count, codes, seed=0):
+    rng = random.Random(seed)
+    return [(round(rng.uniform(1, 10000), 2), rng.choice(codes), rng.choice(codes)) for _ in range(count)]
+
+
+def stream_convert(rows, rates):
+    # Amounts arrive as text, as they do from a CSV file; exact mode converts the text itself.
+    records = ((None, repr(amount), from_currency, to_currency, None) for amount, from_currency, to_currency in rows)
+    for _ in batch_stream.convert(batch_stream.validate(records, isinstance(rates, ExactRates)), rates):
+        pass
+
+
+def measure(label, func, rows):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} rows={rows:>8}  elapsed={elapsed:8.3f}s  rows/s={rows / elapsed:12.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark exact mode against the float path")
+    parser.add_argument("--rows", type=int, default=10 ** 5)
+    args = parser.parse_args()
+
+    rates = load_recorded_response()["conversion_rates"]
+    rows = make_rows(args.rows, sorted(rates))
+
+    measure("batch_convert float", lambda: utils.batch_convert(rows, rates), args.rows)
+    measure("batch_convert exact", lambda: utils.batch_convert(rows, rates, exact=True), args.rows)
+    measure("batch_convert exact half-up",
+            lambda: utils.batch_convert(rows, rates, exact=True, rounding="half-up"), args.rows)
+    measure("batch_stream float", lambda: stream_convert(rows, RateTable.from_rates(rates)), args.rows)
+    measure("batch_stream exact", lambda: stream_convert(rows, ExactRates(rates)), args.rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark for the rate history store.
+
+Appends --days daily snapshots of the recorded rate table (with jittered rates)
+to a temporary RateHistory, then times as-of lookups at random instants and a
+back-dated batch whose rows carry random timestamps across the whole history.
+
+Usage:
+    python benchmarks/bench_history.py [--days 3650] [--lookups 1000] [--rows 100000]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from rate_history import RateHistory  # noqa: E402
+from stub_server import load_recorded_response  # noqa: E402
+
+DAY = 86400
+
+
+def measure(label, func, count):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<18} count={count:>8}  elapsed={elapsed:8.3f}s  per second={count / elapsed:12.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the rate history store")
+    parser.add_argument("--days", type=int, default=3650)
+    parser.add_argument("--lookups", type=int, default=1000)
+    parser.add_argument("--rows", type=int, default=10 ** 5)
+    args = parser.parse_args()
+
+    recorded = load_recorded_response()
+    rates = recorded["conversion_rates"]
+    codes = sorted(rates)
+    start_time = recorded["time_last_update_unix"] - args.days * DAY
+    rng = random.Random(0)
+    directory = tempfile.mkdtemp()
+    try:
+        history = RateHistory(directory)
+
+        def fill():
+            for day in range(args.days):
+                history.append(dict(recorded, time_last_update_unix=start_time + day * DAY,
+                                    conversion_rates={code: rate * rng.uniform(0.95, 1.05)
+                                                      for code, rate in rates.items()}))
+
+        measure("append", fill, args.days)
+        instants = [start_time + rng.uniform(0, args.days * DAY) for _ in range(args.lookups)]
+        measure("as_of", lambda: [history.as_of("USD", instant) for instant in instants], args.lookups)
+        rows = [(start_time + rng.uniform(0, args.days * DAY), 100.0, rng.choice(codes), rng.choice(codes))
+                for _ in range(args.rows)]
+        measure("convert_batch", lambda: history.convert_batch(rows), args.rows)
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
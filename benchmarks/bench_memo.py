@@ -0,0 +1,86 @@
+"""
+Benchmark for the conversion memo under a skewed request distribution.
+
+Draws requests from a few hundred point-of-sale price points (amounts in KES,
+UGX and USD into USD, EUR, UGX and KES) with Zipf-distributed popularity, and
+converts them through ApiClient.convert_currency with the memo and with it
+disabled (memo_size=0), on one thread and on several.  The rate table comes
+from the recorded response through the client's rate cache, so no HTTP is
+involved.  Reports conversions per second and the memo's hit ratio; a smaller
+--memo-size than --price-points shows the effect of evictions.
+
+Usage:
+    python benchmarks/bench_memo.py [--requests 200000] [--price-points 300] [--skew 1.1]
+                                    [--memo-size 4096] [--threads 1,8]
+"""
+
+import argparse
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from api_client import ApiClient  # noqa: E402
+from rate_cache import RateCache  # noqa: E402
+from stub_server import load_recorded_response  # noqa: E402
+
+AMOUNTS = (1, 5, 10, 20, 50, 100, 150, 200, 250, 500, 750, 1000, 1500, 2000, 2500, 5000, 10000, 20000, 50000)
+SOURCES = ("KES", "UGX", "USD")
+TARGETS = ("USD", "EUR", "UGX", "KES")
+
+
+def make_requests(count, price_points, skew, seed=0):
+    points = [(amount, from_currency, to_currency)
+              for amount, from_currency, to_currency in itertools.product(AMOUNTS, SOURCES, TARGETS)
+              if from_currency != to_currency][:price_points]
+    rng = random.Random(seed)
+    rng.shuffle(points)
+    weights = [1 / (rank + 1) ** skew for rank in range(len(points))]
+    return rng.choices(points, weights, k=count)
+
+
+def run(client, requests, threads):
+    chunks = [requests[i::threads] for i in range(threads)]
+
+    def work(chunk):
+        convert = client.convert_currency
+        for amount, from_currency, to_currency in chunk:
+            convert(amount, from_currency, to_currency)
+
+    workers = [threading.Thread(target=work, args=(chunk,)) for chunk in chunks]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark memoized conversions on a skewed workload")
+    parser.add_argument("--requests", type=int, default=200000)
+    parser.add_argument("--price-points", type=int, default=300, help="Distinct (amount, from, to) requests")
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent of request popularity")
+    parser.add_argument("--memo-size", type=int, default=4096)
+    parser.add_argument("--threads", default="1,8", help="Comma-separated thread counts")
+    args = parser.parse_args()
+
+    payload = load_recorded_response()
+    requests = make_requests(args.requests, args.price_points, args.skew)
+    print(f"{len(requests)} requests over {len(set(requests))} distinct price points (skew {args.skew})")
+    for threads in (int(count) for count in args.threads.split(",")):
+        for memo_size in (0, args.memo_size):
+            client = ApiClient("TEST", cache=RateCache(lambda base: payload), memo_size=memo_size)
+            client.convert_currency(1, "USD", "KES")  # Load the table.
+            elapsed = run(client, requests, threads)
+            label = f"memo_size={memo_size}" if memo_size else "no memo"
+            hit_ratio = f"  hit_ratio={client.memo.stats()['hit_ratio']:.3f}" if client.memo else ""
+            print(f"threads={threads:<3} {label:<16} conversions/s={len(requests) / elapsed:10.0f}{hit_ratio}")
+
+
+if __name__ == "__main__":
+    main()
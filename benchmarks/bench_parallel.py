@@ -0,0 +1,76 @@
+"""
+Scaling benchmark for parallel batch conversion.
+
+Writes a CSV ledger of --rows random conversions (kept between runs in
+--file), then converts it with batch_stream.run_batch in one process and with
+parallel_batch.run_parallel on 1 to --max-workers processes, reporting rows per
+second and the speedup over the single-process pipeline.
+
+Usage:
+    python benchmarks/bench_parallel.py [--rows 2000000] [--max-workers 8] [--file FILE]
+"""
+
+import argparse
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import batch_stream  # noqa: E402
+from parallel_batch import run_parallel  # noqa: E402
+from rate_table import RateTable  # noqa: E402
+from stub_server import load_recorded_response  # noqa: E402
+
+
+def write_ledger(path, count, codes, seed=0):
+    rng = random.Random(seed)
+    with open(path, "w") as f:
+        f.write("amount,from,to\n")
+        for _ in range(count // 10000 + 1):
+            rows = min(10000, count)
+            count -= rows
+            f.write("".join(f"{rng.uniform(1, 10000):.2f},{rng.choice(codes)},{rng.choice(codes)}\n"
+                            for _ in range(rows)))
+
+
+def measure(label, func, baseline=None):
+    progress = batch_stream.Progress(io.StringIO())
+    start = time.perf_counter()
+    counts = func(progress)
+    elapsed = time.perf_counter() - start
+    speedup = f"  speedup={baseline / elapsed:5.2f}x" if baseline else ""
+    print(f"{label:<20} rows={counts['rows']:>10}  elapsed={elapsed:8.3f}s  "
+          f"rows/s={counts['rows'] / elapsed:12.0f}{speedup}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parallel batch conversion on 1 to N cores")
+    parser.add_argument("--rows", type=int, default=2000000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--file", help="Where to keep the generated ledger (default: bench_ledger_<rows>.csv in the temp dir)")
+    args = parser.parse_args()
+    args.file = args.file or os.path.join(tempfile.gettempdir(), f"bench_ledger_{args.rows}.csv")
+
+    payload = load_recorded_response()
+    table = RateTable.from_payload(payload)
+    if not os.path.exists(args.file):
+        write_ledger(args.file, args.rows, list(payload["conversion_rates"]))
+    output = args.file + ".out"
+
+    baseline = measure("run_batch", lambda progress: batch_stream.run_batch(args.file, table, output,
+                                                                            progress=progress))
+    counts = sorted({1, args.max_workers} | {2 ** i for i in range(args.max_workers.bit_length()) if 2 ** i <= args.max_workers})
+    for workers in counts:
+        measure(f"run_parallel x{workers}",
+                lambda progress: run_parallel(args.file, table, output, progress=progress, workers=workers),
+                baseline)
+    os.unlink(output)
+
+
+if __name__ == "__main__":
+    main()
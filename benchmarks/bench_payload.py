@@ -0,0 +1,61 @@
+"""
+Benchmark for decoding and validating a latest-rates response.
+
+Times, per payload, the recorded exchangerate-api.com body decoded with the
+standard library, with orjson (if installed) and through requests'
+response.json(), which the transport used before, and then
+rate_payload.validate on the decoded table.
+
+Usage:
+    python benchmarks/bench_payload.py [--number 2000] [--repeat 5]
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import requests  # noqa: E402
+
+from rate_payload import validate  # noqa: E402
+from stub_server import DATA_FILE  # noqa: E402
+
+
+def measure(label, func, number, repeat):
+    best = min(timeit.repeat(func, number=number, repeat=repeat)) / number
+    print(f"{label:<34} {best * 1e6:9.1f}us per payload")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark response decoding and validation")
+    parser.add_argument("--number", type=int, default=2000, help="Payloads per sample")
+    parser.add_argument("--repeat", type=int, default=5, help="Samples; the fastest is reported")
+    args = parser.parse_args()
+
+    with open(DATA_FILE, "rb") as f:
+        body = f.read()
+    print(f"payload: {len(body)} bytes, {len(json.loads(body)['conversion_rates'])} rates")
+
+    def response_json():
+        response = requests.Response()
+        response._content = body  # No declared charset, as with the real API, so requests guesses one.
+        return response.json()
+
+    measure("json.loads", lambda: json.loads(body), args.number, args.repeat)
+    try:
+        import orjson
+    except ImportError:
+        print("orjson.loads                       not installed (pip install orjson)")
+    else:
+        measure("orjson.loads", lambda: orjson.loads(body), args.number, args.repeat)
+    measure("requests Response.json()", response_json, args.number, args.repeat)
+    payload = json.loads(body)
+    measure("rate_payload.validate", lambda: validate(payload), args.number, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark for hedged fetches across rate providers with a slow tail.
+
+Serves the recorded response from two local stub servers: a v6 primary that
+delays --slow-rate of its requests by --slow-latency seconds, and a v4
+secondary that is always fast.  Fetches --requests tables through a
+ProviderChain with plain fallback and with hedging after --hedge-after seconds,
+and reports the p50, p99 and maximum fetch latency and how many requests were
+hedged, i.e. also sent to the secondary.
+
+Usage:
+    python benchmarks/bench_providers.py [--requests 200] [--slow-rate 0.05] [--slow-latency 0.5]
+                                         [--hedge-after 0.05]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from providers import ProviderChain, V4Provider, V6Provider  # noqa: E402
+from stub_server import StubServer  # noqa: E402
+from transport import Transport  # noqa: E402
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run(chain, requests):
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        chain.fetch("USD")
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hedged fetches against a slow primary provider")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--slow-rate", type=float, default=0.05, help="Fraction of slow primary requests")
+    parser.add_argument("--slow-latency", type=float, default=0.5, help="Seconds a slow request takes")
+    parser.add_argument("--hedge-after", type=float, default=0.05, help="Seconds before a request is hedged")
+    args = parser.parse_args()
+
+    for hedge_after in (None, args.hedge_after):
+        with StubServer(slow_rate=args.slow_rate, slow_latency=args.slow_latency) as primary, \
+                StubServer(schema="v4") as secondary:
+            transport = Transport(max_retries=0)
+            chain = ProviderChain([V6Provider("KEY", primary.base_url, transport),
+                                   V4Provider(secondary.base_url, transport)], hedge_after=hedge_after)
+            chain.fetch("USD")  # Warm up: imports and connection pool.
+            before = secondary.request_count
+            latencies = run(chain, args.requests)
+            chain.close()
+            transport.close()
+            label = "fallback only" if hedge_after is None else f"hedge_after={hedge_after}"
+            print(f"{label:<18} p50={statistics.median(latencies) * 1e3:8.2f}ms  "
+                  f"p99={percentile(latencies, 0.99) * 1e3:8.2f}ms  max={max(latencies) * 1e3:8.2f}ms  "
+                  f"hedged={secondary.request_count - before}/{args.requests}")
+
+
+if __name__ == "__main__":
+    main()
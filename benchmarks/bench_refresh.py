@@ -0,0 +1,111 @@
+"""
+Benchmark for delta-aware rate refreshes against full rebuilds.
+
+Takes the recorded response and a refreshed copy of it in which --changed
+currencies (by default none, 1, 10 and all of them) have new rates, and times
+how the structures derived from a table are brought up to date:
+
+  table     RateTable.from_rates (full) against RateTable.updated (incremental)
+  memo      re-answering --price-points conversions after the refresh, from an
+            emptied memo (full) against one carried over (incremental)
+
+The incremental column includes the rate_delta.diff that decides what to update.
+
+Usage:
+    python benchmarks/bench_refresh.py [--changed 0,1,10,all] [--price-points 300] [--repeat 200]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from conversion_memo import ConversionMemo  # noqa: E402
+from rate_delta import diff  # noqa: E402
+from rate_table import RateTable  # noqa: E402
+from stub_server import load_recorded_response  # noqa: E402
+
+
+def movable(rates):
+    return sorted(code for code in rates if rates[code] != 1.0)  # The base (and any peg at 1) stays.
+
+
+def refreshed(rates, count, seed=0):
+    rng = random.Random(seed)
+    moved = rng.sample(movable(rates), count)
+    return dict(rates, **{code: rates[code] * rng.uniform(0.99, 1.01) for code in moved})
+
+
+def best(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def time_table(old, new, repeat):
+    table = RateTable.from_rates(old, "USD")
+    return (best(lambda: RateTable.from_rates(new, "USD"), repeat),
+            best(lambda: table.updated(new, diff(old, new)), repeat))
+
+
+def time_memo(old, new, points, repeat):
+    delta = diff(old, new)
+    affected = delta.affected
+
+    def answer(memo, rates):
+        for amount, from_currency, to_currency in points:
+            memo.lookup(rates, (amount, from_currency, to_currency),
+                        lambda: amount * (rates[to_currency] / rates[from_currency]))
+
+    def refresh(incremental):
+        memo = ConversionMemo()
+        answer(memo, old)
+        start = time.perf_counter()
+        if incremental:
+            memo.carry_over(old, new if not delta.unchanged else old,
+                            lambda key: key[1] not in affected and key[2] not in affected)
+            answer(memo, new if not delta.unchanged else old)
+        else:
+            memo.invalidate()
+            answer(memo, new)
+        return time.perf_counter() - start
+
+    return (min(refresh(False) for _ in range(repeat // 10 or 1)),
+            min(refresh(True) for _ in range(repeat // 10 or 1)))
+
+
+def format_seconds(seconds):
+    return f"{seconds * 1e6:9.1f}us"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark incremental against full rate refreshes")
+    parser.add_argument("--changed", default="0,1,10,all", help="Comma-separated counts of changed rates")
+    parser.add_argument("--price-points", type=int, default=300, help="Distinct conversions in the memo")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    rates = load_recorded_response()["conversion_rates"]
+    codes = sorted(rates)
+    rng = random.Random(1)
+    points = [(rng.choice((10, 100, 1000)), rng.choice(codes), rng.choice(codes)) for _ in range(args.price_points)]
+    print(f"{len(rates)} currencies, {len(points)} memoized conversions")
+    print(f"{'changed':>8} {'structure':<10} {'full':>11} {'incremental':>11} {'speed-up':>9}")
+    for changed in args.changed.split(","):
+        count = len(movable(rates)) if changed.strip() == "all" else int(changed)
+        new = refreshed(rates, count)
+        for name, (full, incremental) in (
+                ("table", time_table(rates, new, args.repeat)),
+                ("memo", time_memo(rates, new, points, args.repeat))):
+            print(f"{count:>8} {name:<10} {format_seconds(full)} {format_seconds(incremental)} "
+                  f"{full / max(incremental, 1e-9):8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
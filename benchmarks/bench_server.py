@@ -0,0 +1,115 @@
+"""
+Load test for the conversion service (src/server.py).
+
+Starts the stub upstream, runs the server in a separate process against it, and
+drives GET /convert (or POST /batch with --batch-size) from 1, 10 and 100
+concurrent clients, each on its own keep-alive connection.  Reports requests
+per second and latency percentiles for every concurrency level.
+
+Usage:
+    python benchmarks/bench_server.py [--concurrency 1 10 100] [--requests 2000] [--batch-size 0]
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC)
+
+from stub_server import StubServer, load_recorded_response  # noqa: E402
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for(port, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("GET", "/health")
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError("The server did not start.")
+
+
+def client(port, requests, codes, batch_size, latencies, seed):
+    rng = random.Random(seed)
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    for _ in range(requests):
+        if batch_size:
+            rows = [[round(rng.uniform(1, 10000), 2), rng.choice(codes), rng.choice(codes)]
+                    for _ in range(batch_size)]
+            body = json.dumps({"conversions": rows})
+            start = time.perf_counter()
+            connection.request("POST", "/batch", body, {"Content-Type": "application/json"})
+        else:
+            path = f"/convert?amount={rng.uniform(1, 10000):.2f}&from={rng.choice(codes)}&to={rng.choice(codes)}"
+            start = time.perf_counter()
+            connection.request("GET", path)
+        response = connection.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - start)
+        if response.status != 200:
+            raise RuntimeError(f"HTTP {response.status}")
+    connection.close()
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def run(port, concurrency, requests, codes, batch_size):
+    latencies = []
+    per_client = max(1, requests // concurrency)
+    threads = [threading.Thread(target=client, args=(port, per_client, codes, batch_size, latencies, i))
+               for i in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    print(f"clients={concurrency:>4}  requests={len(latencies):>6}  rps={len(latencies) / elapsed:9.0f}  "
+          f"p50={percentile(latencies, 0.50) * 1000:7.2f}ms  p90={percentile(latencies, 0.90) * 1000:7.2f}ms  "
+          f"p99={percentile(latencies, 0.99) * 1000:7.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the conversion service")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per concurrency level")
+    parser.add_argument("--batch-size", type=int, default=0, help="Rows per POST /batch; 0 uses GET /convert")
+    args = parser.parse_args()
+
+    codes = sorted(load_recorded_response()["conversion_rates"])
+    with StubServer() as stub:
+        port = free_port()
+        server = subprocess.Popen([sys.executable, os.path.join(SRC, "server.py"), "--port", str(port),
+                                   "--base-url", stub.base_url, "--api-key", "BENCH"])
+        try:
+            wait_for(port)
+            for concurrency in args.concurrency:
+                run(port, concurrency, args.requests, codes, args.batch_size)
+        finally:
+            server.terminate()
+            server.wait()
+        print(f"upstream requests: {stub.request_count}")
+
+
+if __name__ == "__main__":
+    main()
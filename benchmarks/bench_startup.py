@@ -0,0 +1,105 @@
+"""
+Start-up benchmark for the CLI entry points.
+
+Stores the recorded rate table as a fresh snapshot in a temporary cache
+directory, so a conversion is answered without the network, and then for each
+entry point:
+
+  * runs it once under `python -X importtime` and prints the slowest imports,
+    failing (exit status 1) if a module that only a network fetch or --exact
+    needs was imported anyway;
+  * times --runs executions after --warmup untimed ones, hyperfine style, and
+    prints mean, standard deviation, min and max wall time next to a bare
+    `python -c pass` baseline.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 20] [--warmup 3] [--top 10] [--src DIR]
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC)
+
+from snapshot_store import SnapshotStore  # noqa: E402
+from stub_server import load_recorded_response  # noqa: E402
+
+ENTRY_POINTS = ("cli.py", "converter.py")
+CONVERSION = ("100", "USD", "KES")
+# Modules a conversion from a stored snapshot must not import.
+FORBIDDEN = ("requests", "urllib3", "numpy", "money", "transport")
+
+
+def import_times(command, env):
+    """Returns [(cumulative microseconds, indented module name)] for every import of a command."""
+    process = subprocess.run([sys.executable, "-X", "importtime", *command], env=env,
+                             capture_output=True, text=True, check=True)
+    times = []
+    for line in process.stderr.splitlines():
+        # "import time: <self us> | <cumulative us> | <two spaces per nesting level><module>"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times.append((int(cumulative), name[1:].rstrip()))
+    return times
+
+
+def repeat(command, env, runs, warmup):
+    for _ in range(warmup):
+        subprocess.run(command, env=env, stdout=subprocess.DEVNULL, check=True)
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, env=env, stdout=subprocess.DEVNULL, check=True)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def report(label, samples):
+    print(f"{label:<22} mean={statistics.mean(samples) * 1000:7.1f}ms  "
+          f"stdev={statistics.stdev(samples) * 1000 if len(samples) > 1 else 0:5.1f}ms  "
+          f"min={min(samples) * 1000:7.1f}ms  max={max(samples) * 1000:7.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CLI start-up on a cached conversion")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10, help="How many of the slowest imports to list")
+    parser.add_argument("--src", default=SRC, help="Directory holding the entry points")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    try:
+        payload = dict(load_recorded_response(), time_next_update_unix=int(time.time()) + 86400)
+        SnapshotStore(directory).write(payload)
+        env = dict(os.environ, CURRENCY_CONVERTER_CACHE_DIR=directory, PYTHONPATH=args.src)
+
+        report("python -c pass", repeat([sys.executable, "-c", "pass"], env, args.runs, args.warmup))
+        regressions = []
+        for entry_point in ENTRY_POINTS:
+            command = [os.path.join(args.src, entry_point), *CONVERSION]
+            times = import_times(command, env)
+            names = {name.strip() for _, name in times}
+            regressions += [f"{entry_point} imported {module}" for module in FORBIDDEN if module in names]
+            report(entry_point, repeat([sys.executable, *command], env, args.runs, args.warmup))
+            top_level = sorted((t for t in times if not t[1].startswith("  ")), reverse=True)
+            for cumulative, name in top_level[:args.top]:
+                print(f"    {cumulative / 1000:7.2f}ms  {name}")
+    finally:
+        shutil.rmtree(directory)
+
+    for regression in regressions:
+        print(f"REGRESSION: {regression}", file=sys.stderr)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark for the pooled transport.
+
+Fetches the rate table repeatedly from the local stub server, which injects
+latency and transient 503 errors, once with bare `requests.get` (a new
+connection per request, no retries) and once through transport.Transport.
+Reports p50/p99 latency and how many fetches ultimately failed.
+
+Usage:
+    python benchmarks/bench_transport.py [--requests 300] [--latency 0.005] [--error-rate 0.05]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import requests  # noqa: E402
+
+from stub_server import StubServer  # noqa: E402
+from transport import Transport  # noqa: E402
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run(label, get, url, count):
+    latencies = []
+    failures = 0
+    for _ in range(count):
+        start = time.perf_counter()
+        try:
+            response = get(url)
+            response.raise_for_status()
+            response.json()
+        except requests.exceptions.RequestException:
+            failures += 1
+        latencies.append(time.perf_counter() - start)
+    print(f"{label:<22} p50={percentile(latencies, 0.50) * 1000:8.2f}ms  "
+          f"p99={percentile(latencies, 0.99) * 1000:8.2f}ms  mean={statistics.mean(latencies) * 1000:8.2f}ms  "
+          f"failed={failures}/{count}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bare requests.get against the pooled transport")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.005)
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    args = parser.parse_args()
+
+    with StubServer(latency=args.latency, error_rate=args.error_rate) as server:
+        url = f"{server.base_url}BENCH/latest/USD"
+        run("bare requests.get", requests.get, url, args.requests)
+        transport = Transport(backoff_base=0.01)
+        run("pooled Transport", transport.get, url, args.requests)
+        transport.close()
+
+
+if __name__ == "__main__":
+    main()
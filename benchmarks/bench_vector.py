@@ -0,0 +1,97 @@
+"""
+Benchmark for utils.batch_convert and the columnar conversion engine.
+
+Converts random ledger rows against the recorded rate table and reports rows
+per second for:
+
+  row loop          the per-row loop utils.batch_convert used before the engine
+  batch_convert     the public tuple API, which switches to the engine at
+                    utils.VECTOR_MIN_ROWS rows (tuples in, tuples out)
+  engine (tuples)   the same rows forced through batch_engine.convert_rows, to
+                    show where the threshold belongs
+  engine (columns)  convert_arrays on prebuilt NumPy columns, for callers that
+                    already hold their data as columns
+
+Small sizes are repeated until at least --min-time seconds have passed.  The
+tuple benchmarks are skipped above --tuple-max rows.
+
+Usage:
+    python benchmarks/bench_vector.py [--sizes 10 1000 100000 1000000] [--tuple-max 1000000]
+                                      [--min-time 0.2]
+"""
+
+import argparse
+import contextlib
+import os
+import sys
+import time
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import numpy as np  # noqa: E402
+
+import utils  # noqa: E402
+from batch_engine import convert_arrays  # noqa: E402
+from stub_server import load_recorded_response  # noqa: E402
+
+
+def make_columns(count, codes, seed=0):
+    rng = np.random.default_rng(seed)
+    amounts = np.round(rng.uniform(1, 10000, count), 2)
+    return amounts, codes[rng.integers(0, len(codes), count)], codes[rng.integers(0, len(codes), count)]
+
+
+def loop_convert(rows, rates):
+    # The per-row loop of utils.batch_convert before the columnar engine.
+    results = []
+    for amount, from_currency, to_currency in rows:
+        converted_amount = utils._convert(amount, from_currency, to_currency, rates)
+        if converted_amount is not None:
+            results.append((amount, from_currency, to_currency, converted_amount))
+    return results
+
+
+def engine_convert(rows, rates):
+    with mock.patch.object(utils, "VECTOR_MIN_ROWS", 0):
+        return utils.batch_convert(rows, rates)
+
+
+def measure(label, func, rows, min_time):
+    calls, start = 0, time.perf_counter()
+    while True:
+        func()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+    per_call = elapsed / calls
+    print(f"{label:<18} rows={rows:>10}  per call={per_call * 1e3:10.3f}ms  rows/s={rows / per_call:14.0f}",
+          flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batch_convert against the row loop and the engine")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 10 ** 3, 10 ** 5, 10 ** 6])
+    parser.add_argument("--tuple-max", type=int, default=10 ** 6)
+    parser.add_argument("--min-time", type=float, default=0.2)
+    args = parser.parse_args()
+
+    rates = load_recorded_response()["conversion_rates"]
+    codes = np.array(sorted(rates))
+    print(f"utils.VECTOR_MIN_ROWS = {utils.VECTOR_MIN_ROWS}")
+    with contextlib.redirect_stderr(open(os.devnull, "w")):  # No metrics export noise.
+        for size in args.sizes:
+            amounts, from_currencies, to_currencies = make_columns(size, codes)
+            if size <= args.tuple_max:
+                rows = list(zip(amounts.tolist(), from_currencies.tolist(), to_currencies.tolist()))
+                measure("row loop", lambda: loop_convert(rows, rates), size, args.min_time)
+                measure("batch_convert", lambda: utils.batch_convert(rows, rates), size, args.min_time)
+                measure("engine (tuples)", lambda: engine_convert(rows, rates), size, args.min_time)
+                del rows
+            measure("engine (columns)", lambda: convert_arrays(amounts, from_currencies, to_currencies, rates),
+                    size, args.min_time)
+
+
+if __name__ == "__main__":
+    main()
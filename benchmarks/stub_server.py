@@ -0,0 +1,151 @@
+"""
+A local stand-in for the exchangerate-api.com v6 endpoint used by the benchmarks.
+
+The server answers `.../latest/<BASE>` with the recorded response in
+`benchmarks/data/latest_USD.json`, rebased to the requested currency, and counts
+every request it serves so benchmarks can report how many HTTP round trips a
+code path really makes.  It can also inject latency (fixed, or on a random
+fraction of requests to mimic a slow tail) and transient errors, and serve the
+older v4 schema ({"base", "rates", "time_last_updated"}) instead of v6.
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+
+DATA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "latest_USD.json")
+
+
+def load_recorded_response(path: str = DATA_FILE) -> Dict:
+    """Loads the recorded exchangerate-api.com response."""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def rebase_payload(payload: Dict, base_currency: str) -> Dict:
+    """Returns a copy of a v6 payload quoted against another base currency."""
+    rates = payload["conversion_rates"]
+    pivot = rates[base_currency]
+    rebased = dict(payload)
+    rebased["base_code"] = base_currency
+    rebased["conversion_rates"] = {code: rate / pivot for code, rate in rates.items()}
+    return rebased
+
+
+class _Server(ThreadingHTTPServer):
+    # The default backlog of 5 drops connections when many clients connect at once.
+    request_queue_size = 128
+
+
+class StubServer:
+    """
+    A threaded HTTP server serving recorded exchange rates on localhost.
+
+    Use it as a context manager; `base_url` is ready to be passed to ApiClient.
+
+    Args:
+        payload: The v6 response to serve.  Defaults to the recorded one.
+        latency: Seconds to wait before answering each request.
+        error_rate: Fraction of requests answered with `error_status` instead of rates.
+        error_status: The HTTP status used for injected errors.
+        retry_after: Value of the Retry-After header sent with injected errors, if any.
+        seed: Seed for the error injection, so runs are repeatable.
+        slow_rate: Fraction of requests delayed by `slow_latency` instead of `latency`.
+        slow_latency: Seconds to wait before answering a slow request.
+        schema: "v6", or "v4" to serve the keyless v4 endpoint's shape at `base_url`.
+    """
+
+    def __init__(self, payload: Dict = None, latency: float = 0.0, error_rate: float = 0.0,
+                 error_status: int = 503, retry_after: str = None, seed: int = 0,
+                 slow_rate: float = 0.0, slow_latency: float = 0.0, schema: str = "v6"):
+        self.payload = payload or load_recorded_response()
+        self.latency = latency
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.schema = schema
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self._random = random.Random(seed)
+        self.request_count = 0
+        self.error_count = 0
+        self._lock = threading.Lock()
+        self._bodies = {}
+        self._httpd = _Server(("127.0.0.1", 0), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v4/latest/" if self.schema == "v4" else f"http://{host}:{port}/v6/"
+
+    def body_for(self, base_currency: str) -> bytes:
+        """Returns the encoded response body for a base currency, or None if it is unknown."""
+        if base_currency not in self._bodies:
+            if base_currency not in self.payload["conversion_rates"]:
+                return None
+            payload = rebase_payload(self.payload, base_currency)
+            if self.schema == "v4":
+                payload = {"provider": "stub", "base": base_currency, "time_last_updated":
+                           payload.get("time_last_update_unix"), "rates": payload["conversion_rates"]}
+            self._bodies[base_currency] = json.dumps(payload).encode("utf-8")
+        return self._bodies[base_currency]
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                with server._lock:
+                    server.request_count += 1
+                    failing = server._random.random() < server.error_rate
+                    if failing:
+                        server.error_count += 1
+                    slow = server.slow_rate and server._random.random() < server.slow_rate
+                delay = server.slow_latency if slow else server.latency
+                if delay:
+                    time.sleep(delay)
+                if failing:
+                    self.send_response(server.error_status)
+                    if server.retry_after is not None:
+                        self.send_header("Retry-After", server.retry_after)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                base_currency = self.path.rstrip("/").rsplit("/", 1)[-1].split("?", 1)[0]
+                body = server.body_for(base_currency)
+                if body is None:
+                    body = json.dumps({"result": "error", "error-type": "unsupported-code"}).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
@@ -0,0 +1,239 @@
+"""
+Benchmark suite for the conversion and fetch paths, with JSON baselines.
+
+Every benchmark runs in-process against the recorded exchangerate-api.com
+response, served over HTTP by the local stub server where a fetch is involved:
+
+  utils.convert_currency              one float conversion against a rates dict
+  utils.batch_convert[N]              a batch of N random rows
+  api_client.convert_batch[N]         a fresh ApiClient per call: fetch, JSON decode and N rows
+  cli.main[cached] / [refresh]        `cli.py 100 USD KES`, answered from a fresh
+                                      snapshot, or with --refresh over HTTP
+  converter.main[cached] / [refresh]  the same for converter.py
+
+Each benchmark is calibrated so one sample takes at least --min-time seconds and
+then sampled --repeat times; the median time per call is what is compared.
+
+    python benchmarks/suite.py --save baseline.json
+    python benchmarks/suite.py --compare baseline.json [--threshold 0.25]
+
+With --compare, a benchmark whose median is more than --threshold (a fraction)
+slower than in the baseline is reported as a regression and the exit status is 1.
+Baselines are only comparable on the machine and interpreter that recorded them,
+so record one before a change and compare after it.
+
+Usage:
+    python benchmarks/suite.py [--sizes 100,10000] [--repeat 5] [--min-time 0.2] [--filter TEXT]
+                               [--save FILE] [--compare FILE] [--threshold 0.25]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from snapshot_store import CACHE_DIR_ENV, SnapshotStore  # noqa: E402
+from stub_server import StubServer, load_recorded_response  # noqa: E402
+
+DEFAULT_SIZES = (100, 10000)
+CONVERSION = ("100", "USD", "KES")
+
+
+def make_rows(count, codes, seed=0):
+    rng = random.Random(seed)
+    return [(round(rng.uniform(1, 10000), 2), rng.choice(codes), rng.choice(codes)) for _ in range(count)]
+
+
+def sample(func, repeat, min_time):
+    """Returns (seconds per call for each of `repeat` samples, calls per sample, total calls made)."""
+    number, total = 1, 0
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        total += number
+        if elapsed >= min_time:
+            break
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9) * 1.1))
+    samples = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return samples, number, total + number * (repeat - 1)
+
+
+def benchmarks(server, sizes):
+    """Yields (name, rows per call or None, callable) for every benchmark in the suite."""
+    import api_client
+    import cli
+    import converter
+    import utils
+
+    rates = load_recorded_response()["conversion_rates"]
+    codes = sorted(rates)
+    yield "utils.convert_currency", None, lambda: utils.convert_currency(100.0, "USD", "KES", rates)
+    for size in sizes:
+        rows = make_rows(size, codes)
+        yield f"utils.batch_convert[{size}]", size, lambda rows=rows: utils.batch_convert(rows, rates)
+    for size in sizes:
+        rows = make_rows(size, codes)
+        yield (f"api_client.convert_batch[{size}]", size,
+               lambda rows=rows: api_client.ApiClient("KEY", server.base_url).convert_batch(rows))
+
+    cli.BASE_URL, cli.API_KEY = server.base_url, "KEY"
+    converter.BASE_URL = f"{server.base_url}KEY"
+    for module in (cli, converter):
+        name = module.__name__
+        yield f"{name}.main[cached]", None, lambda module=module: run_main(module, [])
+        yield f"{name}.main[refresh]", None, lambda module=module: run_main(module, ["--refresh"])
+
+
+def run_main(module, options):
+    module.rate_cache.invalidate()  # So --refresh goes over HTTP every time, as it does in a new process.
+    argv = sys.argv
+    sys.argv = [f"{module.__name__}.py", *options, *CONVERSION]
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            module.main()
+    finally:
+        sys.argv = argv
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def run_suite(sizes, repeat, min_time, name_filter=None):
+    """Runs the suite and returns {"environment": ..., "benchmarks": {name: result}}."""
+    directory = tempfile.mkdtemp()
+    previous = os.environ.get(CACHE_DIR_ENV)
+    os.environ[CACHE_DIR_ENV] = directory
+    results = {}
+    try:
+        with StubServer() as server:
+            # A snapshot that stays fresh for a day answers the [cached] runs without the network.
+            payload = dict(server.payload, time_next_update_unix=int(time.time()) + 86400)
+            SnapshotStore(directory).write(payload)
+            for name, rows, func in benchmarks(server, sizes):
+                if name_filter and name_filter not in name:
+                    continue
+                func()  # Warm up: imports, connection pool, caches.
+                before = server.request_count
+                samples, number, calls = sample(func, repeat, min_time)
+                median = statistics.median(samples)
+                results[name] = {
+                    "median": median,
+                    "min": min(samples),
+                    "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+                    "calls_per_sample": number,
+                    "http_calls_per_call": (server.request_count - before) / calls,
+                }
+                if rows:
+                    results[name]["rows_per_second"] = rows / median
+                print(format_result(name, results[name]), flush=True)
+    finally:
+        if previous is None:
+            os.environ.pop(CACHE_DIR_ENV, None)
+        else:
+            os.environ[CACHE_DIR_ENV] = previous
+        shutil.rmtree(directory, ignore_errors=True)
+    return {"environment": environment(), "benchmarks": results}
+
+
+def format_seconds(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3f}{unit}"
+    return f"{seconds / 1e-9:.1f}ns"
+
+
+def format_result(name, result):
+    line = (f"{name:<34} median={format_seconds(result['median']):>10}  min={format_seconds(result['min']):>10}  "
+            f"stdev={format_seconds(result['stdev']):>10}  http/call={result['http_calls_per_call']:.2f}")
+    if "rows_per_second" in result:
+        line += f"  rows/s={result['rows_per_second']:12.0f}"
+    return line
+
+
+def compare(baseline, current, threshold):
+    """
+    Prints a table of median times against the baseline.
+
+    Returns:
+        The names of the benchmarks that got slower by more than `threshold`.
+    """
+    if baseline.get("environment") != current["environment"]:
+        print(f"Warning: the baseline was recorded on {baseline.get('environment')}; "
+              f"timings may not be comparable.", file=sys.stderr)
+    old, new = baseline["benchmarks"], current["benchmarks"]
+    regressions = []
+    print(f"\n{'benchmark':<34} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name in sorted(set(old) | set(new)):
+        if name not in new:
+            print(f"{name:<34} {format_seconds(old[name]['median']):>10} {'-':>10} {'':>8}  not run")
+            continue
+        if name not in old:
+            print(f"{name:<34} {'-':>10} {format_seconds(new[name]['median']):>10} {'':>8}  new")
+            continue
+        change = new[name]["median"] / old[name]["median"] - 1
+        status = ""
+        if change > threshold:
+            status = "  REGRESSION"
+            regressions.append(name)
+        elif change < -threshold:
+            status = "  faster"
+        print(f"{name:<34} {format_seconds(old[name]['median']):>10} "
+              f"{format_seconds(new[name]['median']):>10} {change:+8.1%}{status}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the conversion and fetch paths")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="Comma-separated batch sizes")
+    parser.add_argument("--repeat", type=int, default=5, help="Samples per benchmark")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Minimum seconds per sample")
+    parser.add_argument("--filter", help="Only run benchmarks whose name contains this text")
+    parser.add_argument("--save", metavar="FILE", help="Write the results to a JSON baseline")
+    parser.add_argument("--compare", metavar="FILE", help="Compare against a JSON baseline")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Slowdown (a fraction of the baseline median) reported as a regression")
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    current = run_suite(sizes, args.repeat, args.min_time, args.filter)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2, sort_keys=True)
+            f.write("\n")
+    if baseline is not None:
+        regressions = compare(baseline, current, args.threshold)
+        for name in regressions:
+            print(f"REGRESSION: {name} is more than {args.threshold:.0%} slower than the baseline", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,91 @@
-```python
 # src/api_client.py
 
 import requests
 import json
-from typing import Dict, List, Tuple
+import sys
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import metrics
+from conversion_memo import DEFAULT_MAXSIZE, ConversionMemo
+from rate_cache import DEFAULT_MAX_STALE, RateCache
+from money import ExactRates, MoneyError
+from providers import Provider, ProviderError
+from rate_delta import RateDelta, diff
+from rate_payload import PayloadError, freeze, validate
+from rate_table import RateTable, RateTableCache
+from transport import Transport, decode_json, default_transport
+
+DEFAULT_BASE_URL = "https://v6.exchangerate-api.com/v6/"
+
+
+class ConversionResult(NamedTuple):
+    """
+    The outcome of one row of a batch conversion.
+
+    `converted_amount` is None and `error` holds the reason when the row could not be converted.
+    """
+    amount: float
+    from_currency: str
+    to_currency: str
+    converted_amount: Optional[float]
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
 
 class ApiClient:
     """
     A client for fetching real-time exchange rates from a public API.  Currently uses exchangerate-api.com.  
     Remember to replace 'YOUR_API_KEY' with your actual API key.
+
+    Thread safety: one client can be shared by every thread of a process (e.g. all the threads
+    of a WSGI worker), which then share one connection pool, one rate cache and one memo.
+    Fetched tables are published as read-only snapshots (see rate_payload.freeze) by swapping
+    a single reference in the rate cache, so a reader always sees one complete table.  Readers
+    only wait for the first fetch of a base currency: once a table has expired it is still
+    served while one background thread fetches the next (see rate_cache.py).  Construct the
+    client once and do not reassign its attributes while other threads use it.
     """
 
-    def __init__(self, api_key: str = "YOUR_API_KEY"):  # Replace with your API key
-        self.base_url = "https://v6.exchangerate-api.com/v6/"
+    def __init__(self, api_key: str = "YOUR_API_KEY", base_url: str = DEFAULT_BASE_URL,
+                 cache: Optional[RateCache] = None, transport: Optional[Transport] = None,
+                 history=None, memo_size: int = DEFAULT_MAXSIZE,
+                 provider: Optional[Provider] = None, ttl: Optional[float] = None,
+                 max_stale: float = DEFAULT_MAX_STALE):  # Replace with your API key
+        self.base_url = base_url
         self.api_key = api_key
         self.headers = {"apikey": self.api_key}
+        # Pooled keep-alive connections with timeouts and retries (see transport.py).
+        self.transport = transport or default_transport()
+        # Rate tables are reused until the API publishes its next update, or for `ttl` seconds if
+        # given, and served up to `max_stale` seconds past expiry while they refresh (see rate_cache.py).
+        self.cache = cache or RateCache(self._fetch_latest, ttl=ttl, max_stale=max_stale)
+        # Tables come from this provider (e.g. a providers.ProviderChain with fallbacks) instead of
+        # the v6 API at base_url, if one is given.
+        self.provider = provider
+        # Every fetched table is also appended to this rate_history.RateHistory, if one is given.
+        self.history = history
+        self._history_lock = threading.Lock()  # RateHistory allows only one writer at a time.
+        # convert_currency results against fetched rates, per snapshot (see conversion_memo.py); 0 disables it.
+        self.memo = ConversionMemo(memo_size) if memo_size else None
+        # The cross-rate matrix of each cached snapshot, for convert_batch (see rate_table.py).
+        self.tables = RateTableCache()
+        # The last table fetched per base currency and how it differed from the one before.
+        self._published: Dict[str, Dict] = {}
+        self._deltas: Dict[str, RateDelta] = {}
+        self._publish_lock = threading.Lock()
 
     def _make_request(self, endpoint: str, params: Dict = None) -> Dict:
         """Makes a request to the exchangerate-api.com API."""
         url = f"{self.base_url}{endpoint}"
         try:
-            response = requests.get(url, headers=self.headers, params=params)
+            response = self.transport.get(url, headers=self.headers, params=params)
             response.raise_for_status()  # Raise HTTPError for bad responses (4xx or 5xx)
-            return response.json()
+            return decode_json(response)
         except requests.exceptions.RequestException as e:
             raise ApiClientError(f"API request failed: {e}") from e
         except json.JSONDecodeError as e:
@@ -33,72 +96,195 @@ class ApiClient:
         """
         Fetches the latest exchange rates for all currencies relative to a base currency.
 
+        Tables are served from the client's rate cache and only refetched once the API has
+        published its next update.
+
         Args:
             base_currency: The base currency (e.g., "USD", "EUR", "KES"). Defaults to "USD".
 
         Returns:
-            A dictionary containing exchange rates.  Keys are currency codes, values are exchange rates.
-            Returns an empty dictionary if an error occurs.
+            A read-only mapping of currency codes to exchange rates, shared with other callers;
+            copy it with dict() to modify it.  Returns an empty dictionary if an error occurs.
 
         Raises:
             ApiClientError: If there's an issue with the API request or response.
         """
         try:
-            data = self._make_request(f"latest/{base_currency}")
-            if data['result'] == 'success':
-                return data['conversion_rates']
-            else:
-                raise ApiClientError(f"API request failed: {data['message']}")
-
+            return self.cache.get(base_currency)['conversion_rates']
         except ApiClientError as e:
             print(f"Error fetching exchange rates: {e}")
             return {}
 
 
-    def convert_currency(self, amount: float, from_currency: str, to_currency: str) -> float:
-        """Converts an amount from one currency to another."""
-        rates = self.get_latest_rates()
+    def _fetch_latest(self, base_currency: str) -> Dict:
+        """Fetches the full latest-rates payload for a base currency, bypassing the cache."""
+        if self.provider is not None:
+            try:
+                data = self.provider.fetch(base_currency)
+            # ValueError covers a body that is not JSON (JSONDecodeError) and a malformed table (PayloadError).
+            except (ProviderError, ValueError, requests.exceptions.RequestException) as e:
+                raise ApiClientError(f"API request failed: {e}") from e
+        else:
+            data = self._make_request(f"latest/{base_currency}")
+            if not isinstance(data, dict):
+                raise ApiClientError("Invalid API response: Expected a JSON object.")
+            if data.get("result") != "success":
+                # v6 errors carry "error-type"; older responses used "message".
+                error = data.get("error-type") or data.get("message") or "Unknown error"
+                raise ApiClientError(f"API request failed: {error}")
+        try:
+            data = validate(data)
+        except PayloadError as e:
+            raise ApiClientError(f"Invalid API response: {e}") from e
+        data, delta = self._publish(data)
+        if self.history is not None and not (delta is not None and delta.unchanged):
+            try:
+                with self._history_lock:
+                    self.history.append(data)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Warning: could not record rate history: {e}", file=sys.stderr)
+        return data
+
+
+    def _publish(self, data: Dict) -> Tuple[Dict, Optional[RateDelta]]:
+        """
+        Freezes a fetched table for sharing, diffing its rates against the last one of its base.
+
+        Unchanged rates keep the previous rates object, so the memo and anything else keyed on
+        it stays valid.  When only some rates moved, the memo is told to keep the results that
+        do not involve them.  Returns the frozen payload and the delta (None for the first table).
+        """
+        base_currency = data["base_code"]
+        with self._publish_lock:
+            previous = self._published.get(base_currency)
+            delta = None
+            if previous is not None:
+                delta = diff(previous["conversion_rates"], data["conversion_rates"])
+                if delta.unchanged:
+                    data = dict(data, conversion_rates=previous["conversion_rates"])
+            data = freeze(data)  # Shared by every thread that reads the cache.
+            self._published[base_currency] = data
+            if delta is not None:
+                self._deltas[base_currency] = delta
+        if delta is not None:
+            metrics.record_rate_delta(delta)
+            if self.memo is not None and not delta.unchanged:
+                affected = delta.affected
+                self.memo.carry_over(previous["conversion_rates"], data["conversion_rates"],
+                                     lambda key: key[1] not in affected and key[2] not in affected)
+        return data, delta
+
+
+    def last_delta(self, base_currency: str = "USD") -> Optional[RateDelta]:
+        """
+        Returns how the last fetched table for a base currency differed from the one before it.
+
+        None until a base currency has been fetched twice.  See rate_delta.RateDelta.
+        """
+        return self._deltas.get(base_currency)
+
+
+    def convert_currency(self, amount: float, from_currency: str, to_currency: str, rates: Optional[Dict] = None) -> float:
+        """
+        Converts an amount from one currency to another.
+
+        Args:
+            amount: The amount to convert.
+            from_currency: The currency to convert from.
+            to_currency: The currency to convert to.
+            rates: An already fetched rate dictionary or RateTable to convert against.  When
+                   omitted the latest rates are fetched from the API, and repeated conversions
+                   within one snapshot are answered from the client's memo.
+        """
+        memo = None
+        if rates is None:
+            memo = self.memo
+            # The cached table stays the same object until new rates arrive, so the memo keys on it.
+            # While it is fresh peek() answers (and counts the hit) without get()'s flight bookkeeping.
+            payload = self.cache.peek() if memo is not None else None
+            rates = payload["conversion_rates"] if payload is not None else self.get_latest_rates()
         if not rates:
             return 0  # Handle case where rate fetching failed
 
-        if from_currency not in rates or to_currency not in rates:
-            raise ApiClientError(f"One or both currencies ({from_currency}, {to_currency}) not found.")
-
-        try:
-            return amount * (rates[to_currency] / rates[from_currency])
-        except KeyError as e:
-            raise ApiClientError(f"Error during conversion: {e}") from e
+        metrics.CONVERSIONS.inc()
+        if memo is None:
+            return self._convert_with_rates(amount, from_currency, to_currency, rates)
+        return memo.lookup(rates, (amount, from_currency, to_currency),
+                           lambda: self._convert_with_rates(amount, from_currency, to_currency, rates))
 
 
-    def convert_batch(self, conversions: List[Tuple[float, str, str]]) -> List[Tuple[float, str, str, float]]:
+    def convert_batch(self, conversions: List[Tuple[float, str, str]], base_currency: str = "USD",
+                      per_base: bool = False, exact: bool = False,
+                      rounding: str = "half-even") -> List[ConversionResult]:
         """
-        Performs batch currency conversions.
+        Performs batch currency conversions against a single rate snapshot.
+
+        Rates are fetched once for the whole batch (or once per distinct source currency when
+        `per_base` is set), never once per row.
 
         Args:
             conversions: A list of tuples, each containing (amount, from_currency, to_currency).
+            base_currency: The base currency of the shared snapshot.  Ignored when `per_base` is set.
+            per_base: Fetch one snapshot per distinct source currency and convert each row
+                      against the table quoted in its own source currency.
+            exact: Convert in integer minor units (see money.py); `converted_amount` is then a
+                   Decimal rounded to the target currency's minor unit.
+            rounding: How exact results are rounded: 'half-even' (banker's) or 'half-up'.
 
         Returns:
-            A list of tuples, each containing (amount, from_currency, to_currency, converted_amount).
-            Returns an empty list if an error occurs during rate fetching.
+            A list of ConversionResult tuples in input order.  Rows that could not be converted
+            carry `converted_amount=None` and the reason in `error`.
         """
-        rates = self.get_latest_rates()
-        if not rates:
-            return []
+        started = time.perf_counter()
+        if per_base:
+            bases = {from_curr for _, from_curr, _ in conversions}
+        else:
+            bases = {base_currency} if conversions else set()
+        # Each snapshot's RateTable is kept next to it, so every row is a single cross-rate read.
+        snapshots = {}
+        for base in bases:
+            rates = self.get_latest_rates(base)
+            if rates:
+                rates = ExactRates(rates, rounding) if exact else self.tables.table_for(base, rates)
+            snapshots[base] = rates
 
         results = []
         for amount, from_curr, to_curr in conversions:
+            base = from_curr if per_base else base_currency
+            rates = snapshots[base]
+            if not rates:
+                results.append(ConversionResult(amount, from_curr, to_curr, None,
+                                                f"Exchange rates unavailable for base {base}."))
+                continue
             try:
-                converted_amount = self.convert_currency(amount, from_curr, to_curr)
-                results.append((amount, from_curr, to_curr, converted_amount))
-            except ApiClientError as e:
-                print(f"Error converting {amount} {from_curr} to {to_curr}: {e}")
-                results.append((amount, from_curr, to_curr, 0)) #Append with 0 on error
+                if exact:
+                    converted_amount = rates.convert(amount, from_curr, to_curr)
+                else:
+                    converted_amount = self._convert_with_rates(amount, from_curr, to_curr, rates)
+                results.append(ConversionResult(amount, from_curr, to_curr, converted_amount))
+            except (ApiClientError, MoneyError) as e:
+                results.append(ConversionResult(amount, from_curr, to_curr, None, str(e)))
 
+        metrics.record_batch(len(results), sum(not result.ok for result in results), time.perf_counter() - started)
         return results
 
 
+    @staticmethod
+    def _convert_with_rates(amount: float, from_currency: str, to_currency: str, rates: Dict) -> float:
+        """
+        Converts an amount using an already fetched rate dictionary or RateTable.
+
+        Fetched tables are validated once when they arrive (see rate_payload.validate), so the
+        rates are indexed directly and only a missing currency has to be caught.
+        """
+        try:
+            if isinstance(rates, RateTable):
+                return rates.convert(amount, from_currency, to_currency)
+            return amount * (rates[to_currency] / rates[from_currency])
+        except KeyError as e:
+            raise ApiClientError(f"One or both currencies ({from_currency}, {to_currency}) not found.") from e
+
+
 class ApiClientError(Exception):
     """Custom exception for API client errors."""
     pass
-
-```
\ No newline at end of file
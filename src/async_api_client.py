@@ -0,0 +1,246 @@
+"""
+An asyncio counterpart to ApiClient for fetching many base currencies at once.
+
+AsyncApiClient has the same get_latest_rates, convert_currency and
+convert_batch surface as ApiClient, but its methods are coroutines and it runs
+on a pooled aiohttp session.  At most `max_concurrency` requests are in flight
+at a time, concurrent requests for the same base currency share one fetch, and
+tables are reused until the API publishes its next update.  Transient failures
+are retried with the same backoff policy as transport.Transport.
+
+aiohttp is only needed by this module:
+
+    pip install aiohttp
+"""
+
+import asyncio
+import json
+import random
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import aiohttp
+
+import metrics
+from api_client import DEFAULT_BASE_URL, ApiClient, ApiClientError, ConversionResult
+from rate_cache import DEFAULT_TTL
+from rate_payload import PayloadError, loads, validate
+from rate_table import RateTableCache
+from transport import RETRY_STATUSES, parse_retry_after
+
+
+class AsyncApiClient:
+    """
+    An asyncio client for the exchangerate-api.com v6 API.
+
+    Use it as an async context manager (or call close()) so the connection pool is released.
+
+    Args:
+        api_key: The exchangerate-api.com API key.
+        base_url: The API root.
+        max_concurrency: Maximum number of requests in flight, and of pooled connections.
+        ttl: Seconds a table stays cached when its payload has no time_next_update_unix.
+        connect_timeout: Seconds to wait for a connection to be established.
+        read_timeout: Seconds to wait between bytes of the response.
+        max_retries: How many times a failed request is retried.
+        backoff_base: Upper bound of the first retry delay; it doubles on every retry.
+        backoff_max: Upper bound of any retry delay, including one requested by Retry-After.
+    """
+
+    def __init__(self, api_key: str = "YOUR_API_KEY", base_url: str = DEFAULT_BASE_URL,
+                 max_concurrency: int = 10, ttl: float = DEFAULT_TTL, connect_timeout: float = 3.05,
+                 read_timeout: float = 10.0, max_retries: int = 3, backoff_base: float = 0.5,
+                 backoff_max: float = 30.0):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1.")
+        self.base_url = base_url
+        self.api_key = api_key
+        self.headers = {"apikey": self.api_key}
+        self.max_concurrency = max_concurrency
+        self.ttl = ttl
+        self.timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._entries: Dict[str, Tuple[Dict, float]] = {}
+        self._flights: Dict[str, asyncio.Task] = {}
+        self.tables = RateTableCache()  # The cross-rate matrix of each cached snapshot.
+
+    async def __aenter__(self) -> "AsyncApiClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency)
+            self._session = aiohttp.ClientSession(connector=connector, headers=self.headers, timeout=self.timeout)
+        return self._session
+
+    async def _make_request(self, endpoint: str, params: Dict = None) -> Dict:
+        """Makes a request to the exchangerate-api.com API, retrying transient failures."""
+        url = f"{self.base_url}{endpoint}"
+        session = self._get_session()
+        attempt = 0
+        while True:
+            try:
+                async with self._semaphore:
+                    start = time.perf_counter()
+                    async with session.get(url, params=params) as response:
+                        retry = response.status in RETRY_STATUSES and attempt < self.max_retries
+                        body = b"" if retry else await response.read()
+                        metrics.HTTP_SECONDS.observe(time.perf_counter() - start)
+                        metrics.HTTP_REQUESTS.inc(status=str(response.status))
+                        metrics.HTTP_BYTES.inc(len(body))
+                        if retry:
+                            delay = parse_retry_after(response.headers.get("Retry-After"), self.backoff_max)
+                        else:
+                            response.raise_for_status()
+                            with metrics.JSON_SECONDS.time():
+                                return loads(body)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                metrics.HTTP_REQUESTS.inc(status="error")
+                if attempt >= self.max_retries:
+                    raise ApiClientError(f"API request failed: {e}") from e
+                delay = None
+            except aiohttp.ClientError as e:
+                raise ApiClientError(f"API request failed: {e}") from e
+            except json.JSONDecodeError as e:
+                raise ApiClientError(f"Invalid JSON response: {e}") from e
+            await asyncio.sleep(delay if delay is not None else self._backoff(attempt))
+            attempt += 1
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def _fetch_latest(self, base_currency: str) -> Dict:
+        """Fetches the full latest-rates payload for a base currency, bypassing the cache."""
+        data = await self._make_request(f"latest/{base_currency}")
+        if not isinstance(data, dict):
+            raise ApiClientError("Invalid API response: Expected a JSON object.")
+        if data.get("result") != "success":
+            # v6 errors carry "error-type"; older responses used "message".
+            error = data.get("error-type") or data.get("message") or "Unknown error"
+            raise ApiClientError(f"API request failed: {error}")
+        try:
+            return validate(data)
+        except PayloadError as e:
+            raise ApiClientError(f"Invalid API response: {e}") from e
+
+    async def get_payload(self, base_currency: str = "USD") -> Dict:
+        """
+        Returns the latest-rates payload for a base currency, fetching it only when necessary.
+
+        Concurrent callers asking for the same base currency share one fetch.  The returned
+        dictionary is shared with other callers and must not be modified.
+
+        Raises:
+            ApiClientError: If there's an issue with the API request or response.
+        """
+        entry = self._entries.get(base_currency)
+        if entry is not None and time.time() < entry[1]:
+            metrics.CACHE_LOOKUPS.inc(result="hit")
+            return entry[0]
+        metrics.CACHE_LOOKUPS.inc(result="miss")
+        flight = self._flights.get(base_currency)
+        if flight is None:
+            flight = self._flights[base_currency] = asyncio.ensure_future(self._run_flight(base_currency))
+        # Shielded so that a cancelled caller does not cancel the fetch other callers wait on.
+        return await asyncio.shield(flight)
+
+    async def _run_flight(self, base_currency: str) -> Dict:
+        try:
+            payload = await self._fetch_latest(base_currency)
+            now = time.time()
+            next_update = payload.get("time_next_update_unix")
+            expires_at = next_update if next_update is not None and next_update > now else now + self.ttl
+            self._entries[base_currency] = (payload, expires_at)
+            return payload
+        finally:
+            del self._flights[base_currency]
+
+    async def get_latest_rates(self, base_currency: str = "USD") -> Dict:
+        """
+        Fetches the latest exchange rates for all currencies relative to a base currency.
+
+        Returns:
+            A dictionary of currency code to exchange rate, or an empty dictionary if an error occurs.
+        """
+        try:
+            return (await self.get_payload(base_currency))['conversion_rates']
+        except ApiClientError as e:
+            print(f"Error fetching exchange rates: {e}")
+            return {}
+
+    async def get_many_rates(self, base_currencies: Iterable[str]) -> Dict[str, Dict]:
+        """
+        Fetches the latest rates for several base currencies concurrently.
+
+        Returns:
+            A dictionary of base currency to rate dictionary; a base whose fetch failed maps to
+            an empty dictionary.
+        """
+        bases = list(dict.fromkeys(base_currencies))
+        tables = await asyncio.gather(*(self.get_latest_rates(base) for base in bases))
+        return dict(zip(bases, tables))
+
+    async def convert_currency(self, amount: float, from_currency: str, to_currency: str,
+                               rates: Optional[Dict] = None) -> float:
+        """
+        Converts an amount from one currency to another.
+
+        Args:
+            amount: The amount to convert.
+            from_currency: The currency to convert from.
+            to_currency: The currency to convert to.
+            rates: An already fetched rate dictionary or RateTable to convert against.  When
+                   omitted the latest rates are fetched from the API.
+        """
+        if rates is None:
+            rates = await self.get_latest_rates()
+        if not rates:
+            return 0  # Handle case where rate fetching failed
+
+        return ApiClient._convert_with_rates(amount, from_currency, to_currency, rates)
+
+    async def convert_batch(self, conversions: List[Tuple[float, str, str]], base_currency: str = "USD",
+                            per_base: bool = False) -> List[ConversionResult]:
+        """
+        Performs batch currency conversions, like ApiClient.convert_batch.
+
+        With `per_base` the snapshots for the distinct source currencies are fetched concurrently.
+
+        Returns:
+            A list of ConversionResult tuples in input order.  Rows that could not be converted
+            carry `converted_amount=None` and the reason in `error`.
+        """
+        if per_base:
+            bases = [from_curr for _, from_curr, _ in conversions]
+        else:
+            bases = [base_currency] if conversions else []
+        snapshots = {base: self.tables.table_for(base, rates) if rates else rates
+                     for base, rates in (await self.get_many_rates(bases)).items()}
+
+        results = []
+        for amount, from_curr, to_curr in conversions:
+            base = from_curr if per_base else base_currency
+            rates = snapshots[base]
+            if not rates:
+                results.append(ConversionResult(amount, from_curr, to_curr, None,
+                                                f"Exchange rates unavailable for base {base}."))
+                continue
+            try:
+                converted_amount = ApiClient._convert_with_rates(amount, from_curr, to_curr, rates)
+                results.append(ConversionResult(amount, from_curr, to_curr, converted_amount))
+            except ApiClientError as e:
+                results.append(ConversionResult(amount, from_curr, to_curr, None, str(e)))
+
+        return results
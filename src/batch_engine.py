@@ -0,0 +1,124 @@
+"""
+A columnar conversion engine for large batches.
+
+Instead of walking a list of (amount, from, to) tuples, the engine takes whole
+columns: an array of amounts and two arrays of currency codes.  Each code is
+packed into a 64-bit integer key (three 21-bit code points), the keys are
+interned to small integer indices into the rate table with a binary search over
+the table's ~160 sorted keys, and every row is converted with one
+gather-and-multiply.  Rows that cannot be converted are reported through an
+error mask rather than dropped.
+
+Rows that arrive as (amount, from, to) tuples go through convert_rows instead,
+which interns the codes with a dictionary lookup per row: building NumPy string
+columns from Python tuples costs more than the conversion it enables.
+"""
+
+from operator import itemgetter
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+
+_CODE_LENGTH = 3
+_UNKNOWN_KEY = -1
+
+
+def _code_keys(codes: Sequence[str]) -> np.ndarray:
+    """Packs each currency code into an int64 key; codes longer than three characters get -1."""
+    column = np.asarray(codes, dtype=str).reshape(-1)
+    if column.dtype.itemsize < 4 * _CODE_LENGTH:
+        column = column.astype(f"<U{_CODE_LENGTH}")
+    points = column.view(np.uint32).reshape(len(column), -1)
+    keys = ((points[:, 0].astype(np.int64) << 42) | (points[:, 1].astype(np.int64) << 21)
+            | points[:, 2].astype(np.int64))
+    if points.shape[1] > _CODE_LENGTH:
+        keys[points[:, _CODE_LENGTH:].any(axis=1)] = _UNKNOWN_KEY
+    return keys
+
+
+def rate_vector(rates: Dict[str, float]) -> Tuple[Tuple[str, ...], np.ndarray]:
+    """
+    Turns a rate dictionary into a tuple of currency codes and a float64 vector of their rates.
+
+    Non-numeric entries (such as the 'timestamp' key converter.get_exchange_rates adds) are
+    skipped.  The vector has one extra trailing NaN slot, so that gathering index -1 (an
+    unknown currency) yields NaN.
+    """
+    codes = []
+    values = []
+    for code, rate in rates.items():
+        if isinstance(rate, (int, float)) and not isinstance(rate, bool) and len(code) == _CODE_LENGTH:
+            codes.append(code)
+            values.append(rate)
+    values.append(np.nan)
+    return tuple(codes), np.array(values, dtype=np.float64)
+
+
+def intern_codes(codes: Sequence[str], table_codes: Sequence[str]) -> np.ndarray:
+    """
+    Interns a column of currency codes against the codes of a rate table.
+
+    Returns:
+        An array of indices into `table_codes`, with -1 for codes the table does not contain.
+    """
+    keys = _code_keys(codes)
+    if not table_codes:
+        return np.full(len(keys), -1, dtype=np.intp)
+    table_keys = _code_keys(table_codes)
+    order = np.argsort(table_keys)
+    sorted_keys = table_keys[order]
+    slots = np.minimum(np.searchsorted(sorted_keys, keys), len(sorted_keys) - 1)
+    return np.where(sorted_keys[slots] == keys, order[slots], -1)
+
+
+def convert_arrays(amounts, from_currencies, to_currencies, rates: Dict[str, float]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Converts whole columns of amounts against one rate table.
+
+    Args:
+        amounts: A sequence or array of amounts.
+        from_currencies: A sequence or array of source currency codes, one per amount.
+        to_currencies: A sequence or array of target currency codes, one per amount.
+        rates: A dictionary of exchange rates relative to a common base currency.
+
+    Returns:
+        A tuple (converted, errors).  `converted` is a float64 array of the converted amounts
+        and `errors` a boolean array that is True where a row could not be converted (unknown
+        currency, zero rate or a non-finite amount); those rows hold NaN in `converted`.
+
+    Raises:
+        ValueError: If the three columns do not have the same length.
+    """
+    amounts = np.asarray(amounts, dtype=np.float64).reshape(-1)
+    if not len(amounts) == len(from_currencies) == len(to_currencies):
+        raise ValueError("amounts, from_currencies and to_currencies must have the same length.")
+    if len(amounts) == 0:
+        return np.empty(0, dtype=np.float64), np.empty(0, dtype=bool)
+
+    table_codes, table = rate_vector(rates)
+    from_rates = table[intern_codes(from_currencies, table_codes)]
+    to_rates = table[intern_codes(to_currencies, table_codes)]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        converted = amounts * (to_rates / from_rates)
+    errors = ~np.isfinite(converted)
+    converted[errors] = np.nan
+    return converted, errors
+
+
+def convert_rows(rows: Sequence[Tuple[float, str, str]], rates: Dict[str, float]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Converts a sequence of (amount, from_currency, to_currency) tuples against one rate table.
+
+    Returns the same (converted, errors) pair as convert_arrays, in row order.
+    """
+    count = len(rows)
+    table_codes, table = rate_vector(rates)
+    index = {code: i for i, code in enumerate(table_codes)}.get
+    amounts = np.fromiter(map(itemgetter(0), rows), np.float64, count)
+    from_rates = table[np.fromiter([index(row[1], -1) for row in rows], np.intp, count)]
+    to_rates = table[np.fromiter([index(row[2], -1) for row in rows], np.intp, count)]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        converted = amounts * (to_rates / from_rates)
+    errors = ~np.isfinite(converted)
+    converted[errors] = np.nan
+    return converted, errors
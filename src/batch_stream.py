@@ -0,0 +1,385 @@
+"""
+Streaming batch conversion for the command-line tools.
+
+A batch file is converted by a pipeline of generators, so only one chunk of
+rows is in memory at a time however large the input is:
+
+    read_records -> validate -> convert -> format_chunks -> write_chunks
+
+Input is CSV (amount,from,to, with an optional header row) or NDJSON (one
+{"amount": ..., "from": ..., "to": ...} object per line); `-` reads stdin.
+Output uses the same format unless told otherwise and is written in chunks;
+`-` writes to stdout.  Rows that cannot be converted are kept in the output
+with an error message.  Progress and throughput are reported on stderr.
+"""
+
+import csv
+import io
+import json
+import math
+import sys
+import time
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, TextIO, Tuple
+
+import metrics
+
+
+FORMATS = ("csv", "ndjson")
+CHUNK_SIZE = 8192  # Rows formatted and written at a time.
+PROGRESS_INTERVAL = 1.0  # Seconds between progress updates on an interactive stderr.
+OUTPUT_FIELDS = ("amount", "from", "to", "converted_amount", "error")
+
+_FIELD_ALIASES = {"amount": "amount", "from": "from", "from_currency": "from", "to": "to", "to_currency": "to"}
+
+
+class BatchRow(NamedTuple):
+    """One row of a batch file as it moves through the pipeline."""
+    line: int
+    amount: Optional[float]  # The amount as written (text or int) in exact mode.
+    from_currency: str
+    to_currency: str
+    converted_amount: Optional[float] = None  # A Decimal in exact mode.
+    error: Optional[str] = None
+
+
+def detect_format(path: str, first_line: str) -> str:
+    """Guesses the input format from the file extension, or from the first line for stdin."""
+    lowered = path.lower()
+    if lowered.endswith((".ndjson", ".jsonl", ".json")):
+        return "ndjson"
+    if lowered.endswith((".csv", ".txt")):
+        return "csv"
+    return "ndjson" if first_line.lstrip().startswith("{") else "csv"
+
+
+def header_columns(row: List[str]) -> Optional[Tuple[int, int, int]]:
+    """
+    Returns the (amount, from, to) column positions named by a CSV header row, or None if the
+    row is not a header.
+
+    Raises:
+        ValueError: If the header does not name all three columns.
+    """
+    names = [_FIELD_ALIASES.get(field.strip().lower()) for field in row]
+    if "amount" not in names:
+        return None
+    try:
+        return names.index("amount"), names.index("from"), names.index("to")
+    except ValueError:
+        raise ValueError("The CSV header must name the amount, from and to columns.") from None
+
+
+def read_records(lines: Iterable[str], fmt: str, columns: Optional[Tuple[int, int, int]] = None,
+                 exact: bool = False) -> Iterator[Tuple[int, object, object, object, Optional[str]]]:
+    """
+    Parses input lines into (line, amount, from, to, error) records with the raw field values.
+
+    For CSV, `columns` gives the (amount, from, to) positions of lines that follow an already
+    consumed header; without it the first row is checked for a header.  With `exact`, NDJSON
+    numbers with a fraction or exponent are kept as their text instead of being read as floats.
+    """
+    if fmt == "ndjson":
+        parse_float = str if exact else None
+        for line_no, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line, parse_float=parse_float)
+            except json.JSONDecodeError as e:
+                yield line_no, None, None, None, f"Invalid JSON: {e}"
+                continue
+            if not isinstance(record, dict):
+                yield line_no, None, None, None, "Expected a JSON object."
+                continue
+            fields = {_FIELD_ALIASES[k]: v for k, v in record.items() if k in _FIELD_ALIASES}
+            yield line_no, fields.get("amount"), fields.get("from"), fields.get("to"), None
+    elif fmt == "csv":
+        first = columns is None
+        columns = columns or (0, 1, 2)
+        for line_no, row in enumerate(csv.reader(lines), 1):
+            if not row or not "".join(row).strip():
+                continue
+            if first:
+                first = False
+                header = header_columns(row)
+                if header is not None:
+                    columns = header
+                    continue
+            if len(row) <= max(columns):
+                yield line_no, None, None, None, f"Expected at least {max(columns) + 1} fields, got {len(row)}."
+                continue
+            yield line_no, row[columns[0]], row[columns[1]], row[columns[2]], None
+    else:
+        raise ValueError(f"Unknown format {fmt!r}; expected one of {', '.join(FORMATS)}.")
+
+
+def validate(records: Iterable[Tuple[int, object, object, object, Optional[str]]],
+             exact: bool = False) -> Iterator[BatchRow]:
+    """
+    Checks and normalizes raw records; invalid ones come out with `error` set.
+
+    Amounts become floats, except with `exact`, where the text (or integer) is passed on as
+    written for money.ExactRates to convert without going through a float.
+    """
+    for line_no, amount, from_currency, to_currency, error in records:
+        if error is not None:
+            yield BatchRow(line_no, None, "", "", error=error)
+            continue
+        from_currency = str(from_currency or "").strip().upper()
+        to_currency = str(to_currency or "").strip().upper()
+        if exact:
+            if isinstance(amount, str):
+                amount = amount.strip()
+            elif not isinstance(amount, int) or isinstance(amount, bool):
+                yield BatchRow(line_no, None, from_currency, to_currency, error=f"Invalid amount: {amount!r}")
+                continue
+            error = None if from_currency and to_currency else "Missing currency code."
+            yield BatchRow(line_no, amount, from_currency, to_currency, error=error)
+            continue
+        try:
+            if isinstance(amount, bool):
+                raise ValueError
+            value = float(amount)
+        except (TypeError, ValueError):
+            yield BatchRow(line_no, None, from_currency, to_currency, error=f"Invalid amount: {amount!r}")
+            continue
+        if not math.isfinite(value):
+            yield BatchRow(line_no, value, from_currency, to_currency, error="Amount must be a finite number.")
+        elif not from_currency or not to_currency:
+            yield BatchRow(line_no, value, from_currency, to_currency, error="Missing currency code.")
+        else:
+            yield BatchRow(line_no, value, from_currency, to_currency)
+
+
+def convert(rows: Iterable[BatchRow], rates) -> Iterator[BatchRow]:
+    """
+    Converts valid rows against a RateTable (or any mapping of base-relative rates).
+
+    When `rates` is a money.ExactRates the converted amounts are Decimals rounded to the
+    target currency's minor unit.
+    """
+    money = sys.modules.get("money")  # Imported lazily: an ExactRates cannot exist without it.
+    if money is not None and isinstance(rates, money.ExactRates):
+        yield from _convert_exact(rows, rates)
+        return
+    cross_rate = getattr(rates, "cross_rate", None)
+    for row in rows:
+        line_no, amount, from_currency, to_currency, _, error = row
+        if error is not None:
+            yield row
+            continue
+        try:
+            if cross_rate is not None:
+                rate = cross_rate(from_currency, to_currency)
+            else:
+                rate = rates[to_currency] / rates[from_currency]
+        except KeyError as e:
+            error = f"Unknown currency code: {e.args[0]}"
+        except ZeroDivisionError:
+            error = f"No usable rate for {from_currency}."
+        else:
+            converted_amount = amount * rate
+            if math.isfinite(converted_amount):
+                yield BatchRow(line_no, amount, from_currency, to_currency, converted_amount)
+                continue
+            error = f"No usable rate for {from_currency}."
+        yield BatchRow(line_no, amount, from_currency, to_currency, None, error)
+
+
+def _convert_exact(rows: Iterable[BatchRow], rates) -> Iterator[BatchRow]:
+    from money import MoneyError
+
+    exact = rates.convert
+    for row in rows:
+        if row.error is not None:
+            yield row
+            continue
+        try:
+            yield row._replace(converted_amount=exact(row.amount, row.from_currency, row.to_currency))
+        except MoneyError as e:
+            yield row._replace(error=str(e))
+
+
+def _text(value) -> str:
+    """Formats an amount for CSV: floats round-trip through repr, Decimals keep their minor-unit digits."""
+    if value is None:
+        return ""
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def format_chunks(rows: Iterable[BatchRow], fmt: str, chunk_size: int = CHUNK_SIZE,
+                  header: bool = True) -> Iterator[str]:
+    """
+    Formats converted rows as CSV or NDJSON, yielding `chunk_size` rows of text at a time.
+
+    CSV output starts with a header line unless `header` is False.
+    """
+    if fmt == "ndjson":
+        dumps = json.dumps
+        for chunk in _chunked(rows, chunk_size):
+            # Exact (Decimal) amounts are written as strings so that no float rounding creeps back in.
+            yield "".join([dumps({"amount": row.amount, "from": row.from_currency, "to": row.to_currency,
+                                  "converted_amount": row.converted_amount, "error": row.error}, default=str) + "\n"
+                           for row in chunk])
+    elif fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        if header:
+            writer.writerow(OUTPUT_FIELDS)
+        for chunk in _chunked(rows, chunk_size):
+            writer.writerows([(_text(row.amount), row.from_currency, row.to_currency,
+                               _text(row.converted_amount), row.error or "") for row in chunk])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()  # Only the header: the input had no rows.
+    else:
+        raise ValueError(f"Unknown format {fmt!r}; expected one of {', '.join(FORMATS)}.")
+
+
+def write_chunks(chunks: Iterable[str], out: TextIO) -> None:
+    """Writes formatted chunks to `out` as they are produced."""
+    for chunk in chunks:
+        out.write(chunk)
+    out.flush()
+
+
+def _chunked(rows: Iterable[BatchRow], chunk_size: int) -> Iterator[List[BatchRow]]:
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class Progress:
+    """Counts rows passing through the pipeline and reports throughput on a stream (stderr)."""
+
+    def __init__(self, stream: TextIO = None, interval: float = PROGRESS_INTERVAL, clock=time.perf_counter):
+        self.stream = stream if stream is not None else sys.stderr
+        self.interval = interval
+        self.clock = clock
+        self.rows = 0
+        self.errors = 0
+        self._live = self.stream.isatty()
+        self._started = self._last_report = clock()
+
+    def track(self, rows: Iterable[BatchRow]) -> Iterator[BatchRow]:
+        for row in rows:
+            self.rows += 1
+            if row.error is not None:
+                self.errors += 1
+            if self._live and not self.rows % 4096 and self.clock() - self._last_report >= self.interval:
+                self._last_report = self.clock()
+                self.stream.write("\r" + self.summary())
+                self.stream.flush()
+            yield row
+
+    def add(self, rows: int, errors: int) -> None:
+        """Records rows that were converted elsewhere, such as in a worker process."""
+        self.rows += rows
+        self.errors += errors
+        if self._live:
+            self.stream.write("\r" + self.summary())
+            self.stream.flush()
+
+    def summary(self) -> str:
+        elapsed = max(self.clock() - self._started, 1e-9)
+        return (f"{self.rows:,} rows ({self.errors:,} errors) in {elapsed:.1f}s, "
+                f"{self.rows / elapsed:,.0f} rows/s")
+
+    def finish(self) -> None:
+        self.stream.write(("\r" if self._live else "") + self.summary() + "\n")
+        self.stream.flush()
+        metrics.record_batch(self.rows, self.errors, self.clock() - self._started)
+
+
+def add_arguments(parser) -> None:
+    """Adds the --batch, --output, --input-format and --output-format options to an argparse parser."""
+    parser.add_argument("--batch", metavar="FILE", help="Convert every row of a CSV or NDJSON file ('-' for stdin)")
+    parser.add_argument("--output", metavar="FILE", default="-", help="Where to write batch results (default: stdout)")
+    parser.add_argument("--input-format", choices=FORMATS, help="Batch input format (default: detected)")
+    parser.add_argument("--output-format", choices=FORMATS, help="Batch output format (default: the input format)")
+    parser.add_argument("--exact", action="store_true",
+                        help="Convert exactly in integer minor units (ISO 4217) instead of binary floats")
+    parser.add_argument("--rounding", choices=("half-even", "half-up"), default="half-even",
+                        help="Rounding of exact results to the target minor unit (default: half-even)")
+    parser.add_argument("--workers", type=int, default=1, metavar="N",
+                        help="Convert a batch file in N processes (default: 1; 0 for one per CPU)")
+
+
+def parse_amount(parser, args) -> None:
+    """
+    Reads the `amount` argument, taken as text, as a float unless --exact is given; exact mode
+    converts the text as written, so no digits are lost to a float.
+    """
+    if args.amount is None or args.exact:
+        return
+    try:
+        args.amount = float(args.amount)
+    except ValueError:
+        parser.error(f"argument amount: invalid float value: {args.amount!r}")
+
+
+def _open(path: str, mode: str) -> TextIO:
+    if path == "-":
+        stream = sys.stdin if "r" in mode else sys.stdout
+        return open(stream.fileno(), mode, encoding="utf-8", newline="", closefd=False)
+    return open(path, mode, encoding="utf-8", newline="")
+
+
+def run_batch(input_path: str, rates, output_path: str = "-", input_format: Optional[str] = None,
+              output_format: Optional[str] = None, progress: Optional[Progress] = None,
+              workers: int = 1, rounding: Optional[str] = None) -> Dict[str, int]:
+    """
+    Streams a batch file through the conversion pipeline.
+
+    Args:
+        input_path: The CSV or NDJSON file to read, or "-" for stdin.
+        rates: A RateTable (or a dictionary of base-relative rates) to convert against.
+        output_path: Where to write the results, or "-" for stdout.
+        input_format: "csv" or "ndjson".  Detected from the file name or first line when omitted.
+        output_format: "csv" or "ndjson".  Defaults to the input format.
+        progress: Reports progress and throughput.  Defaults to a Progress on stderr.
+        workers: Number of worker processes.  With more than one (or 0, meaning one per CPU)
+                 a regular input file is split into shards and converted by
+                 parallel_batch.run_parallel; stdin is always converted in this process.
+        rounding: Convert exactly in integer minor units, rounding with this mode ('half-even'
+                  or 'half-up'; see money.ExactRates).  None keeps the float path.  Exact mode
+                  converts amounts as written, without reading them as floats.
+
+    Returns:
+        A dictionary with the number of rows read and the number of rows that failed.
+
+    Raises:
+        ValueError: If a format is unknown or a CSV header lacks a required column.
+        OSError: If a file cannot be opened.
+    """
+    progress = progress or Progress()
+    if workers != 1 and input_path != "-":
+        import parallel_batch  # Only needed, and only worth starting processes for, in parallel mode.
+        return parallel_batch.run_parallel(input_path, rates, output_path, input_format, output_format,
+                                           progress, workers, rounding)
+    if rounding is not None:
+        from money import ExactRates
+
+        rates = ExactRates(rates, rounding)
+    with _open(input_path, "r") as source:
+        first_line = source.readline()
+        fmt = input_format or detect_format(input_path, first_line)
+        lines = _chain_first(first_line, source)
+        exact = rounding is not None
+        rows = progress.track(convert(validate(read_records(lines, fmt, exact=exact), exact), rates))
+        with _open(output_path, "w") as out:
+            write_chunks(format_chunks(rows, output_format or fmt), out)
+    progress.finish()
+    return {"rows": progress.rows, "errors": progress.errors}
+
+
+def _chain_first(first_line: str, rest: Iterable[str]) -> Iterator[str]:
+    if first_line:
+        yield first_line
+    yield from rest
@@ -0,0 +1,112 @@
+# src/cli.py
+import argparse
+import sys
+
+# Only standard-library modules are imported up front: a conversion answered from the stored
+# snapshot never loads requests (or money/decimal unless --exact is given), which is most of
+# the start-up time.  Modules needed for a network fetch are imported where they are used.
+from rate_cache import RateCache
+from rate_fetch import describe_fetch_error, fetch_errors, fetch_latest
+from rate_table import RateTable
+import batch_stream
+import metrics
+from snapshot_store import SnapshotStoreError, load_rates_payload
+
+API_KEY = "YOUR_API_KEY_HERE"  # Replace with your actual API key from exchangerate-api.com
+BASE_URL = "https://v6.exchangerate-api.com/v6/"
+
+def _request_rates(base_currency):
+    """Fetches the full latest-rates payload for a base currency, bypassing the cache."""
+    return fetch_latest(f"{BASE_URL}{API_KEY}/latest/{base_currency}")
+
+
+# Shared by every caller of get_exchange_rates; inspect rate_cache.stats() for the hit ratio.
+rate_cache = RateCache(_request_rates)
+
+
+def _fetch_payload(base_currency):
+    """Returns the latest-rates payload through the cache; a failed request raises ConnectionError."""
+    try:
+        return rate_cache.get(base_currency)
+    except fetch_errors() as e:
+        raise ConnectionError(describe_fetch_error(e)) from e
+
+
+def get_exchange_rates(base_currency="USD"):
+    """Fetches exchange rates from the API, reusing the cached table until the next upstream update."""
+    return _fetch_payload(base_currency)["conversion_rates"]
+
+
+def load_exchange_rates(base_currency="USD", refresh=False, offline=False):
+    """
+    Returns exchange rates from the local snapshot store, going to the API only when the stored
+    table is out of date (or when `refresh` is set).  With `offline` the network is never used.
+    """
+    payload = load_rates_payload(base_currency, _fetch_payload, refresh=refresh, offline=offline)
+    return payload["conversion_rates"]
+
+
+def convert_currency(amount, from_currency, to_currency, rates):
+    """Converts the specified amount from one currency to another.  `rates` may be a dict or a RateTable."""
+    metrics.CONVERSIONS.inc()
+    try:
+        if isinstance(rates, RateTable):
+            return rates.convert(amount, from_currency, to_currency)
+        rate = rates[to_currency] / rates[from_currency]
+        return amount * rate
+    except KeyError as e:
+        raise ValueError(f"Invalid currency code: {e}")
+
+
+def main():
+    """Main function to handle CLI interaction."""
+    parser = argparse.ArgumentParser(description="Currency Converter")
+    parser.add_argument("amount", nargs="?", help="Amount to convert")
+    parser.add_argument("from_currency", nargs="?", help="Source currency (e.g., USD, KSH)")
+    parser.add_argument("to_currency", nargs="?", help="Target currency (e.g., EUR, GBP)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--refresh", action="store_true", help="Fetch fresh rates even if stored ones are current")
+    mode.add_argument("--offline", action="store_true", help="Use stored rates only, never the network")
+    batch_stream.add_arguments(parser)
+    metrics.add_arguments(parser)
+    args = parser.parse_args()
+    batch_stream.parse_amount(parser, args)
+    try:
+        metrics.configure(args.metrics, args.profile)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.batch is not None:
+        run_batch(args)
+        return
+    if args.to_currency is None:
+        parser.error("amount, from_currency and to_currency are required unless --batch is given")
+
+    try:
+        rates = load_exchange_rates(refresh=args.refresh, offline=args.offline)
+        if args.exact:  # MoneyError is a ValueError, so it is reported below.
+            from money import ExactRates
+
+            converted_amount = ExactRates(rates, args.rounding).convert(args.amount, args.from_currency,
+                                                                        args.to_currency)
+            print(f"{args.amount} {args.from_currency} = {converted_amount} {args.to_currency}")
+        else:
+            converted_amount = convert_currency(args.amount, args.from_currency, args.to_currency, rates)
+            print(f"{args.amount} {args.from_currency} = {converted_amount:.2f} {args.to_currency}")
+    except (ConnectionError, ValueError, SnapshotStoreError) as e:
+        print(f"Error: {e}")
+
+
+def run_batch(args):
+    """Converts a batch file; stdout may carry the results, so errors go to stderr."""
+    try:
+        rates = RateTable.from_rates(load_exchange_rates("USD", refresh=args.refresh, offline=args.offline), "USD")
+        batch_stream.run_batch(args.batch, rates, args.output, args.input_format, args.output_format,
+                               workers=args.workers, rounding=args.rounding if args.exact else None)
+    except (ConnectionError, ValueError, KeyError, SnapshotStoreError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+A bounded, thread-safe memo of conversion results for the current rate snapshot.
+
+Callers such as point-of-sale integrations convert the same few hundred
+(amount, from, to) price points over and over.  Within one rate snapshot the
+answer never changes, so ConversionMemo keeps the most recently used results in
+an LRU of at most `maxsize` entries.  The memo belongs to one snapshot at a
+time: a lookup against a different snapshot object (the rate cache hands out a
+new payload only when the API has published new rates) drops every entry first,
+so a result computed from old rates is never returned.  When a refresh moved
+only a few rates, carry_over() names the entries still valid and the move to
+the next snapshot drops only the others.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, TypeVar
+
+DEFAULT_MAXSIZE = 4096
+
+T = TypeVar("T")
+
+
+class ConversionMemo:
+    """
+    An LRU of conversion results, invalidated whenever the rate snapshot changes.
+
+    Args:
+        maxsize: The most results kept; the least recently used one is evicted beyond that.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1.")
+        self.maxsize = maxsize
+        self._results: "OrderedDict[Hashable, object]" = OrderedDict()
+        self._snapshot = None
+        self._carry = None  # (previous snapshot, next snapshot, keep) registered by carry_over().
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0, "carried_over": 0}
+
+    def lookup(self, snapshot: object, key: Hashable, compute: Callable[[], T]) -> T:
+        """
+        Returns the memoized result for `key` in `snapshot`, calling compute() on a miss.
+
+        `snapshot` is compared by identity, so pass the object the rates came from (a cached
+        payload or its conversion_rates), not a copy.  Exceptions from compute() propagate and
+        nothing is stored.  An unhashable key is computed without the memo.
+        """
+        try:
+            with self._lock:
+                if snapshot is not self._snapshot:
+                    self._switch(snapshot)
+                result = self._results.get(key, _MISSING)
+                if result is not _MISSING:
+                    self._results.move_to_end(key)
+                    self._counters["hits"] += 1
+                    return result
+                self._counters["misses"] += 1
+        except TypeError:  # An unhashable key, e.g. a list amount.
+            return compute()
+
+        result = compute()  # Outside the lock; two threads missing on one key both compute it.
+        with self._lock:
+            if snapshot is self._snapshot:
+                self._results[key] = result
+                self._results.move_to_end(key)
+                if len(self._results) > self.maxsize:
+                    self._results.popitem(last=False)
+                    self._counters["evictions"] += 1
+        return result
+
+    def carry_over(self, previous: object, snapshot: object, keep: Callable[[Hashable], bool]) -> None:
+        """
+        Keeps the results for which keep(key) is true when the memo moves from `previous` to `snapshot`.
+
+        Use it when a refresh changed only some rates (see rate_delta.py): the move happens at
+        the first lookup against `snapshot`, so readers still on `previous` until then keep
+        their hits.  Moving between any other pair of snapshots still drops every result.
+        """
+        with self._lock:
+            self._carry = (previous, snapshot, keep)
+
+    def _switch(self, snapshot: object) -> None:
+        carry = self._carry
+        if carry is not None and carry[0] is self._snapshot and carry[1] is snapshot:
+            keep = carry[2]
+            self._carry = None
+            for key in [key for key in self._results if not keep(key)]:
+                del self._results[key]
+            self._counters["carried_over"] += len(self._results)
+        elif self._results:
+            self._counters["invalidations"] += 1
+            self._results.clear()
+        self._snapshot = snapshot
+
+    def invalidate(self) -> None:
+        """Drops every memoized result."""
+        with self._lock:
+            self._results.clear()
+            self._snapshot = None
+            self._carry = None
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def stats(self) -> Dict[str, float]:
+        """Returns the hit, miss, eviction, invalidation and carry-over counters, the size and the hit ratio."""
+        with self._lock:
+            stats = dict(self._counters, size=len(self._results), maxsize=self.maxsize)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+_MISSING = object()
@@ -1,19 +1,36 @@
-```python
 # src/converter.py
 
-import requests
 import argparse
-import json
-from datetime import datetime
+import sys
+
+# requests (and money/decimal for --exact) are imported only where they are needed, so a
+# conversion answered from the stored snapshot starts without them.
+from rate_cache import RateCache
+from rate_fetch import describe_fetch_error, fetch_errors, fetch_latest
+from rate_table import RateTable
+import batch_stream
+import metrics
+from snapshot_store import SnapshotStoreError, load_rates_payload
 
 API_KEY = "YOUR_API_KEY_HERE"  # Replace with your actual API key from exchangerate-api.com
 BASE_URL = "https://v6.exchangerate-api.com/v6/YOUR_API_KEY_HERE/" # Replace with your actual API key
 
 
+def _request_rates(base_currency):
+    """Fetches the full latest-rates payload for a base currency, bypassing the cache."""
+    return fetch_latest(f"{BASE_URL}/latest/{base_currency}")
+
+
+# Shared by every caller of get_exchange_rates; inspect rate_cache.stats() for the hit ratio.
+rate_cache = RateCache(_request_rates)
+
+
 def get_exchange_rates(base_currency="USD"):
     """
     Retrieves exchange rates from the exchangerate-api.com API.
 
+    Tables are cached per base currency until the API publishes its next update.
+
     Args:
         base_currency: The base currency for the exchange rates (default: USD).
 
@@ -22,24 +39,46 @@ def get_exchange_rates(base_currency="USD"):
         Includes a 'timestamp' key with the last updated time.
     """
     try:
-        response = requests.get(f"{BASE_URL}/latest/{base_currency}")
-        response.raise_for_status()  # Raise HTTPError for bad responses (4xx or 5xx)
-        data = response.json()
-        if data["result"] == "success":
-            rates = data["conversion_rates"]
-            rates['timestamp'] = data['time_last_update_utc']
-            return rates
-        else:
-            print(f"API Error: {data.get('error-type', 'Unknown error')}")
-            return None
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching exchange rates: {e}")
+        return _rates_from_payload(rate_cache.get(base_currency))
+    except fetch_errors() as e:
+        print(describe_fetch_error(e))
+        return None
+    except ValueError as e:
+        print(e)
+        return None
+
+
+def load_exchange_rates(base_currency="USD", refresh=False, offline=False, file=None):
+    """
+    Retrieves exchange rates from the local snapshot store, going to the API only when the
+    stored table is out of date (or when `refresh` is set).
+
+    Args:
+        base_currency: The base currency for the exchange rates (default: USD).
+        refresh: Fetch from the API even if the stored rates are current.
+        offline: Never use the network, only the stored rates.
+        file: Where to print errors (default: stdout).
+
+    Returns:
+        A dictionary containing exchange rates (with a 'timestamp' key), or None if an error occurs.
+    """
+    try:
+        payload = load_rates_payload(base_currency, rate_cache.get, refresh=refresh, offline=offline)
+        return _rates_from_payload(payload)
+    except fetch_errors() as e:
+        print(describe_fetch_error(e), file=file)
         return None
-    except json.JSONDecodeError as e:
-        print(f"Error decoding JSON response: {e}")
+    except (ValueError, SnapshotStoreError) as e:
+        print(e, file=file)
         return None
 
 
+def _rates_from_payload(data):
+    rates = dict(data["conversion_rates"])  # The cached table is shared, so copy before adding keys.
+    rates['timestamp'] = data['time_last_update_utc']
+    return rates
+
+
 def convert_currency(amount, from_currency, to_currency, rates):
     """
     Converts an amount from one currency to another.
@@ -48,11 +87,12 @@ def convert_currency(amount, from_currency, to_currency, rates):
         amount: The amount to convert.
         from_currency: The currency to convert from.
         to_currency: The currency to convert to.
-        rates: A dictionary of exchange rates.
+        rates: A dictionary of exchange rates, or a RateTable.
 
     Returns:
         The converted amount, or None if an error occurs.
     """
+    metrics.CONVERSIONS.inc()
     try:
         if from_currency not in rates or to_currency not in rates:
             raise ValueError("Invalid currency code.")
@@ -60,6 +100,8 @@ def convert_currency(amount, from_currency, to_currency, rates):
         if amount <=0:
             raise ValueError("Amount must be positive.")
 
+        if isinstance(rates, RateTable):
+            return rates.convert(amount, from_currency, to_currency)
         return amount * (rates[to_currency] / rates[from_currency])
     except ValueError as e:
         print(f"Conversion error: {e}")
@@ -72,41 +114,54 @@ def convert_currency(amount, from_currency, to_currency, rates):
 def main():
     """Main function to handle command-line arguments and currency conversion."""
     parser = argparse.ArgumentParser(description="Currency Converter")
-    parser.add_argument("amount", type=float, help="Amount to convert")
-    parser.add_argument("from_currency", help="Currency to convert from (e.g., USD)")
-    parser.add_argument("to_currency", help="Currency to convert to (e.g., KSH)")
+    parser.add_argument("amount", nargs="?", help="Amount to convert")
+    parser.add_argument("from_currency", nargs="?", help="Currency to convert from (e.g., USD)")
+    parser.add_argument("to_currency", nargs="?", help="Currency to convert to (e.g., KSH)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--refresh", action="store_true", help="Fetch fresh rates even if stored ones are current")
+    mode.add_argument("--offline", action="store_true", help="Use stored rates only, never the network")
+    batch_stream.add_arguments(parser)
+    metrics.add_arguments(parser)
     args = parser.parse_args()
-
-    rates = get_exchange_rates()
-    if rates:
+    batch_stream.parse_amount(parser, args)
+    try:
+        metrics.configure(args.metrics, args.profile)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.batch is not None:
+        # stdout may carry the results, so errors go to stderr.
+        rates = load_exchange_rates(refresh=args.refresh, offline=args.offline, file=sys.stderr)
+        if not rates:
+            sys.exit(1)
+        try:
+            batch_stream.run_batch(args.batch, RateTable.from_rates(rates, "USD"), args.output,
+                                   args.input_format, args.output_format, workers=args.workers,
+                                   rounding=args.rounding if args.exact else None)
+        except (ValueError, OSError) as e:
+            print(f"Batch conversion error: {e}", file=sys.stderr)
+            sys.exit(1)
+        return
+    if args.to_currency is None:
+        parser.error("amount, from_currency and to_currency are required unless --batch is given")
+
+    rates = load_exchange_rates(refresh=args.refresh, offline=args.offline)
+    if rates and args.exact:
+        from money import ExactRates, MoneyError
+
+        try:
+            converted_amount = ExactRates(rates, args.rounding).convert(args.amount, args.from_currency.upper(),
+                                                                        args.to_currency.upper())
+        except MoneyError as e:
+            print(f"Conversion error: {e}")
+        else:
+            print(f"{args.amount} {args.from_currency.upper()} = {converted_amount} {args.to_currency.upper()}")
+            print(f"Rates last updated: {rates['timestamp']}")
+    elif rates:
         converted_amount = convert_currency(args.amount, args.from_currency.upper(), args.to_currency.upper(), rates)
         if converted_amount is not None:
             print(f"{args.amount} {args.from_currency.upper()} = {converted_amount:.2f} {args.to_currency.upper()}")
-            print(f"Rates last updated: {datetime.utcfromtimestamp(rates['timestamp']).strftime('%Y-%m-%d %H:%M:%S UTC')}")
+            print(f"Rates last updated: {rates['timestamp']}")
 
 if __name__ == "__main__":
     main()
-
-```
-
-**To use this code:**
-
-1.  **Replace `YOUR_API_KEY_HERE`** with your actual API key from exchangerate-api.com.  You'll need to sign up for a free account to get one.
-2.  **Save the code** as `src/converter.py`.
-3.  **Run from your terminal:**  `python src/converter.py 100 USD KSH` (This converts 100 USD to KSH).
-
-
-This improved version includes:
-
-*   **Error Handling:**  Robust error handling for API requests, JSON decoding, and invalid currency codes.
-*   **Clearer Function Separation:**  The code is broken down into well-defined functions for better readability and maintainability.
-*   **Command-Line Interface (CLI):** Uses `argparse` for a user-friendly command-line interface.
-*   **Currency Code Handling:** Accepts currency codes in upper or lower case.
-*   **Timestamp:** Displays the last updated time of the exchange rates.
-*   **Input Validation:** Checks for positive amounts.
-
-
-Remember to install the `requests` library if you haven't already: `pip install requests`
-
-
-This provides a solid foundation for a currency converter.  For a GUI, you could integrate this with a library like Tkinter, PyQt, or a web framework like Flask or Django.  Batch conversion could be added by modifying the `main` function to accept multiple conversions from a file or other input.
@@ -0,0 +1,347 @@
+"""
+Process-wide counters, gauges and histograms for the fetch and convert paths.
+
+The transport, the JSON decoding of API responses, the rate caches and the
+conversion functions record into REGISTRY, so a slow batch job can be broken
+down into HTTP time, bytes received, JSON parse time, cache hits and conversion
+throughput.  Recording is always on and costs a lock and an addition; nothing
+is written anywhere unless an export is requested:
+
+    CURRENCY_CONVERTER_METRICS=metrics.prom   Prometheus text format at exit
+    CURRENCY_CONVERTER_METRICS=metrics.json   JSON at exit
+    CURRENCY_CONVERTER_METRICS=-              Prometheus text on stderr at exit
+    CURRENCY_CONVERTER_PROFILE=cpu            cProfile summary on stderr at exit
+    CURRENCY_CONVERTER_PROFILE=memory         tracemalloc top allocations at exit
+                                              (or "cpu,memory" for both)
+
+The CLIs expose the same switches as --metrics and --profile (see add_arguments).
+Only light standard-library modules are imported up front; cProfile,
+tracemalloc and json are loaded when they are used.
+"""
+
+import atexit
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+METRICS_ENV = "CURRENCY_CONVERTER_METRICS"
+PROFILE_ENV = "CURRENCY_CONVERTER_PROFILE"
+PROFILE_MODES = ("cpu", "memory")
+# Upper bounds in seconds; suited to HTTP round trips, JSON decoding and batch conversions alike.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Counter:
+    """A monotonically increasing value, optionally split by labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(tuple(sorted(labels.items())), 0)
+
+    def samples(self) -> Iterator[Tuple[str, Labels, float]]:
+        with self._lock:
+            values = list(self._values.items()) or [((), 0)]
+        for labels, value in values:
+            yield self.name, labels, value
+
+
+class Gauge(Counter):
+    """A value that is set rather than accumulated, such as the throughput of the last batch."""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram:
+    """
+    Counts observations into cumulative buckets and keeps their sum, like a Prometheus histogram.
+
+    Use observe(seconds) directly or `with histogram.time():` around the timed code.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)  # The first bucket whose upper bound is >= value.
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def time(self) -> "_Timer":
+        return _Timer(self)
+
+    @property
+    def count(self) -> int:
+        return sum(self._counts)
+
+    @property
+    def sum(self) -> float:
+        return self._sum
+
+    def samples(self) -> Iterator[Tuple[str, Labels, float]]:
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            yield f"{self.name}_bucket", (("le", _format_bound(bound)),), cumulative
+        yield f"{self.name}_sum", (), total
+        yield f"{self.name}_count", (), cumulative
+
+
+class _Timer:
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+
+    def __enter__(self) -> "_Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.histogram.observe(time.perf_counter() - self.start)
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else repr(bound)
+
+
+class Registry:
+    """A named collection of metrics.  Registering a name twice returns the existing metric."""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name: str, help: str, *args):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, *args)
+            elif type(metric) is not cls:
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}.")
+            return metric
+
+    def counter(self, name: str, help: str) -> Counter:
+        return self._register(Counter, name, help)
+
+    def gauge(self, name: str, help: str) -> Gauge:
+        return self._register(Gauge, name, help)
+
+    def histogram(self, name: str, help: str, buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, help, buckets)
+
+    def metrics(self) -> List:
+        with self._lock:
+            return sorted(self._metrics.values(), key=lambda metric: metric.name)
+
+    def to_prometheus(self) -> str:
+        """Returns every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self.metrics():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                label_text = ",".join(f'{key}="{_escape(label)}"' for key, label in labels)
+                lines.append(f"{name}{{{label_text}}} {_format_value(value)}" if labels
+                             else f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def to_dict(self) -> Dict:
+        """Returns every metric as plain data: counters and gauges as values, histograms as summaries."""
+        data = {}
+        for metric in self.metrics():
+            if isinstance(metric, Histogram):
+                buckets = {labels[0][1]: count for _, labels, count in metric.samples() if labels}
+                data[metric.name] = {"count": metric.count, "sum": metric.sum, "buckets": buckets}
+            else:
+                values = {",".join(f"{key}={label}" for key, label in labels): value
+                          for _, labels, value in metric.samples()}
+                data[metric.name] = values.get("", 0) if set(values) <= {""} else values
+        return data
+
+    def to_json(self) -> str:
+        import json
+
+        return json.dumps(self.to_dict(), indent=2, sort_keys=True)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+REGISTRY = Registry()
+
+# The metrics the library records.  Rates are derived from the counters by the scraper; the
+# *_rows_per_second gauge holds the throughput of the most recent batch for one-shot runs.
+HTTP_REQUESTS = REGISTRY.counter("currency_http_requests_total", "HTTP requests to the rates API by status.")
+HTTP_SECONDS = REGISTRY.histogram("currency_http_request_seconds", "Latency of HTTP requests to the rates API.")
+HTTP_BYTES = REGISTRY.counter("currency_http_response_bytes_total", "Bytes of response bodies received.")
+JSON_SECONDS = REGISTRY.histogram("currency_json_decode_seconds", "Time spent decoding API responses.")
+CACHE_LOOKUPS = REGISTRY.counter("currency_rate_cache_lookups_total", "Rate cache lookups by result.")
+CACHE_REFRESHES = REGISTRY.counter("currency_rate_cache_refreshes_total", "Rate table fetches by outcome.")
+PROVIDER_FETCHES = REGISTRY.counter("currency_provider_fetches_total",
+                                    "Rate table fetches from each provider of a ProviderChain, by outcome.")
+HEDGED_REQUESTS = REGISTRY.counter("currency_hedged_requests_total",
+                                   "Requests sent to another provider because the first was slow.")
+RATE_REFRESH_DELTAS = REGISTRY.counter("currency_rate_refresh_deltas_total",
+                                       "Refreshed rate tables by how they differed from the previous one "
+                                       "(unchanged, partial or full).")
+RATES_CHANGED = REGISTRY.counter("currency_rates_changed_total",
+                                 "Currencies changed, added or removed by rate table refreshes.")
+CONVERSIONS = REGISTRY.counter("currency_conversions_total", "Single conversions performed.")
+ROWS_CONVERTED = REGISTRY.counter("currency_rows_converted_total", "Batch rows converted, by outcome.")
+BATCH_SECONDS = REGISTRY.histogram("currency_batch_seconds", "Wall time of batch conversions.")
+ROWS_PER_SECOND = REGISTRY.gauge("currency_rows_per_second", "Throughput of the most recent batch conversion.")
+
+
+def record_batch(rows: int, errors: int, seconds: float) -> None:
+    """Records one finished batch conversion."""
+    ROWS_CONVERTED.inc(rows - errors, outcome="ok")
+    if errors:
+        ROWS_CONVERTED.inc(errors, outcome="error")
+    BATCH_SECONDS.observe(seconds)
+    if seconds > 0:
+        ROWS_PER_SECOND.set(rows / seconds)
+
+
+def record_rate_delta(delta) -> None:
+    """Records how a refreshed rate table differed from the previous one (a rate_delta.RateDelta)."""
+    RATE_REFRESH_DELTAS.inc(kind=delta.kind)
+    for change in ("changed", "added", "removed"):
+        count = len(getattr(delta, change))
+        if count:
+            RATES_CHANGED.inc(count, change=change)
+
+
+_exports: Dict[str, None] = {}
+_profiles: Dict[str, object] = {}
+
+
+def export_at_exit(destination: str) -> None:
+    """
+    Writes REGISTRY when the process exits: "-" for Prometheus text on stderr, a path ending in
+    .json for JSON, any other path for Prometheus text.
+    """
+    if not _exports:
+        atexit.register(_export_all)
+    _exports[destination] = None
+
+
+def _export_all() -> None:
+    for destination in _exports:
+        text = REGISTRY.to_json() + "\n" if destination.endswith(".json") else REGISTRY.to_prometheus()
+        try:
+            if destination == "-":
+                sys.stderr.write(text)
+            else:
+                with open(destination, "w", encoding="utf-8") as f:
+                    f.write(text)
+        except OSError as e:
+            print(f"Warning: could not write metrics to {destination}: {e}", file=sys.stderr)
+
+
+def start_profiling(modes: str) -> None:
+    """
+    Starts cProfile ('cpu') and/or tracemalloc ('memory'); a summary goes to stderr at exit.
+
+    Raises:
+        ValueError: For an unknown mode.
+    """
+    for mode in filter(None, (part.strip() for part in modes.split(","))):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode {mode!r}; expected {' or '.join(PROFILE_MODES)}.")
+        if mode in _profiles:
+            continue
+        if not _profiles:
+            atexit.register(_report_profiles)
+        if mode == "cpu":
+            import cProfile
+
+            profiler = _profiles[mode] = cProfile.Profile()
+            profiler.enable()
+        else:
+            import tracemalloc
+
+            tracemalloc.start(25)
+            _profiles[mode] = tracemalloc
+
+
+def _report_profiles(limit: int = 25) -> None:
+    profiler = _profiles.get("cpu")
+    if profiler is not None:
+        profiler.disable()  # Before importing pstats, so the report does not profile itself.
+        import pstats
+
+        print("CPU profile (by cumulative time):", file=sys.stderr)
+        pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(limit)
+    tracemalloc = _profiles.get("memory")
+    if tracemalloc is not None and tracemalloc.is_tracing():
+        current, peak = tracemalloc.get_traced_memory()
+        print(f"Memory profile: current={current / 1e6:.1f} MB peak={peak / 1e6:.1f} MB; top allocations:",
+              file=sys.stderr)
+        for stat in tracemalloc.take_snapshot().statistics("lineno")[:limit]:
+            print(f"  {stat}", file=sys.stderr)
+        tracemalloc.stop()
+
+
+def add_arguments(parser) -> None:
+    """Adds --metrics and --profile to an argparse parser."""
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="Write metrics at exit (.json for JSON, otherwise Prometheus text; - for stderr)")
+    parser.add_argument("--profile", metavar="MODE",
+                        help="Profile the run: cpu (cProfile), memory (tracemalloc) or cpu,memory")
+
+
+def configure(metrics: Optional[str] = None, profile: Optional[str] = None) -> None:
+    """Applies --metrics and --profile values.  Raises ValueError for an unknown profile mode."""
+    if metrics:
+        export_at_exit(metrics)
+    if profile:
+        start_profiling(profile)
+
+
+def configure_from_env() -> None:
+    """Applies $CURRENCY_CONVERTER_METRICS and $CURRENCY_CONVERTER_PROFILE, warning about bad values."""
+    try:
+        configure(os.environ.get(METRICS_ENV), os.environ.get(PROFILE_ENV))
+    except ValueError as e:
+        print(f"Warning: {PROFILE_ENV}: {e}", file=sys.stderr)
+
+
+configure_from_env()
@@ -0,0 +1,226 @@
+"""
+Exact money conversion in integer minor units.
+
+The float path multiplies binary floats, so a result such as 12894.999999999998
+has to be re-verified before it can be booked.  Exact mode instead works in the
+ISO 4217 minor units of each currency (cents for KES, yen for JPY, fils for
+BHD): every rate is turned once into an integer numerator over a power of ten
+(from the shortest decimal repr of the float, which is the text the API sent),
+and a conversion is a single integer multiply and divide, rounded to the target
+currency's minor unit with banker's rounding or half-up.  Any other
+decimal-module rounding mode falls back to Decimal rounding of the integer
+quotient, which is still exact.
+"""
+
+import decimal
+from decimal import ROUND_HALF_EVEN, ROUND_HALF_UP, Decimal
+from typing import Dict, Mapping, Tuple, Union
+
+# Minor-unit exponents that differ from the default of 2 (ISO 4217, 2024 list).
+ISO_4217_EXPONENTS = {
+    "BIF": 0, "CLP": 0, "DJF": 0, "GNF": 0, "ISK": 0, "JPY": 0, "KMF": 0, "KRW": 0, "PYG": 0,
+    "RWF": 0, "UGX": 0, "UYI": 0, "VND": 0, "VUV": 0, "XAF": 0, "XOF": 0, "XPF": 0,
+    "BHD": 3, "IQD": 3, "JOD": 3, "KWD": 3, "LYD": 3, "OMR": 3, "TND": 3,
+    "CLF": 4, "UYW": 4,
+}
+DEFAULT_EXPONENT = 2
+# Amounts are exact integers scaled by a power of ten, so an exponent such as 1e1000000 would build
+# a million-digit integer.  Larger amounts, or more decimal places, are rejected before any scaling.
+MAX_AMOUNT_DIGITS = 30
+MAX_AMOUNT_PLACES = 30
+ROUNDING_MODES = {"half-even": ROUND_HALF_EVEN, "bankers": ROUND_HALF_EVEN, "half-up": ROUND_HALF_UP}
+_DECIMAL_ROUNDINGS = frozenset(getattr(decimal, name) for name in dir(decimal) if name.startswith("ROUND_"))
+
+Amount = Union[int, float, str, Decimal]
+
+
+class MoneyError(ValueError):
+    """Raised when an amount or rate cannot be converted exactly."""
+    pass
+
+
+def exponent(currency: str) -> int:
+    """Returns the number of minor-unit digits of a currency (2 unless ISO 4217 says otherwise)."""
+    return ISO_4217_EXPONENTS.get(currency, DEFAULT_EXPONENT)
+
+
+def rounding_mode(name: str) -> str:
+    """Maps 'half-even' (or 'bankers') and 'half-up', or a decimal ROUND_* constant, to the constant."""
+    mode = ROUNDING_MODES.get(name.lower(), name) if isinstance(name, str) else name
+    if mode not in _DECIMAL_ROUNDINGS:
+        raise MoneyError(f"Unknown rounding mode {name!r}; expected one of {', '.join(ROUNDING_MODES)}.")
+    return mode
+
+
+def to_decimal(amount: Amount) -> Decimal:
+    """Returns an amount as a Decimal; floats are read through their shortest repr, not their binary value."""
+    if isinstance(amount, Decimal):
+        value = amount
+    elif isinstance(amount, float):
+        value = Decimal(repr(amount))
+    elif isinstance(amount, (int, str)) and not isinstance(amount, bool):
+        try:
+            value = Decimal(amount.strip() if isinstance(amount, str) else amount)
+        except decimal.InvalidOperation:
+            raise MoneyError(f"Cannot use {amount!r} as an amount.") from None
+    else:
+        raise MoneyError(f"Cannot use {amount!r} as an amount.")
+    if not value.is_finite():
+        raise MoneyError(f"Amount must be finite, got {amount!r}.")
+    return value
+
+
+def _scaled(value: Decimal) -> Tuple[int, int]:
+    """Returns (n, k) with value == n / 10 ** k and k >= 0."""
+    sign, digits, exp = value.as_tuple()
+    n = int("".join(map(str, digits)) or "0")
+    if exp > 0:
+        n *= 10 ** exp
+        exp = 0
+    return (-n if sign else n), -exp
+
+
+def _parse(amount: Amount) -> Tuple[int, int]:
+    """
+    Returns (n, k) for an amount; plain decimal text and float reprs skip Decimal.
+
+    Raises:
+        MoneyError: If the amount is not a finite number, has more than MAX_AMOUNT_DIGITS integer
+                    digits or more than MAX_AMOUNT_PLACES decimal places.
+    """
+    if isinstance(amount, float):
+        text = repr(amount)
+    elif isinstance(amount, str):
+        text = amount.strip()
+    else:
+        text = None
+    if text is not None:
+        whole, _, fraction = text.partition(".")
+        digits = whole[1:] if whole[:1] in ("+", "-") else whole
+        if digits.isdecimal() and (fraction.isdecimal() or not fraction):
+            if len(digits) > MAX_AMOUNT_DIGITS or len(fraction) > MAX_AMOUNT_PLACES:
+                raise MoneyError(f"{amount!r} has too many digits to convert.")
+            return int(whole + fraction), len(fraction)
+    value = to_decimal(amount)
+    if value.adjusted() >= MAX_AMOUNT_DIGITS or -value.as_tuple().exponent > MAX_AMOUNT_PLACES:
+        raise MoneyError(f"{amount!r} has too many digits to convert.")
+    return _scaled(value)
+
+
+def to_minor(amount: Amount, currency: str) -> int:
+    """
+    Returns an amount in minor units of a currency, e.g. to_minor("12.34", "KES") == 1234.
+
+    Raises:
+        MoneyError: If the amount has more decimal places than the currency's minor unit.
+    """
+    n, k = _parse(amount)
+    shift = exponent(currency) - k
+    if shift >= 0:
+        return n * 10 ** shift
+    minor, remainder = divmod(n, 10 ** -shift)
+    if remainder:
+        raise MoneyError(f"{amount} has more decimal places than {currency} allows ({exponent(currency)}).")
+    return minor
+
+
+def from_minor(minor: int, currency: str) -> Decimal:
+    """Returns a minor-unit amount as a Decimal with the currency's number of decimal places."""
+    return _major(minor, exponent(currency))
+
+
+def _major(minor: int, places: int) -> Decimal:
+    # Built from text rather than with scaleb(), which rounds to the context's 28 digits.
+    return Decimal(f"{minor}E-{places}")
+
+
+_FRACTIONS = (Decimal("0.25"), Decimal("0.5"), Decimal("0.75"))
+
+
+def _divide(numerator: int, denominator: int, rounding: str) -> int:
+    """Divides two integers (denominator > 0) and rounds the exact quotient to an integer."""
+    quotient, remainder = divmod(abs(numerator), denominator)
+    twice = 2 * remainder
+    if rounding == ROUND_HALF_EVEN or rounding == ROUND_HALF_UP:
+        if twice > denominator or (twice == denominator and (rounding == ROUND_HALF_UP or quotient & 1)):
+            quotient += 1
+    elif remainder:
+        # Only the side of the midpoint the exact quotient falls on matters, so Decimal rounds a
+        # stand-in with the same integer part instead of a truncated quotient.
+        fraction = _FRACTIONS[(twice > denominator) - (twice < denominator) + 1]
+        stand_in = Decimal(quotient) + fraction
+        return int((-stand_in if numerator < 0 else stand_in).to_integral_value(rounding=rounding))
+    return -quotient if numerator < 0 else quotient
+
+
+class ExactRates:
+    """
+    A rate snapshot prepared for exact conversion.
+
+    Args:
+        rates: A dictionary (or RateTable) of rates relative to one base currency.  Non-numeric
+               entries such as 'timestamp' are skipped.
+        rounding: 'half-even' (banker's rounding, the default), 'half-up', or any decimal ROUND_*
+                  constant.  Modes other than half-even and half-up are rounded through Decimal.
+    """
+
+    def __init__(self, rates: Mapping[str, float], rounding: str = "half-even"):
+        self.rounding = rounding_mode(rounding)
+        self._rates: Dict[str, Tuple[int, int]] = {}
+        for code, rate in rates.items():
+            if isinstance(rate, (int, float, Decimal)) and not isinstance(rate, bool):
+                value = to_decimal(rate)
+                if value > 0:
+                    self._rates[code] = _scaled(value)
+        self._pairs: Dict[Tuple[str, str], Tuple[int, int, int, int]] = {}
+
+    def __contains__(self, currency: str) -> bool:
+        return currency in self._rates
+
+    def _pair(self, from_currency: str, to_currency: str) -> Tuple[int, int, int, int]:
+        """
+        Returns (multiplier, divisor, source exponent, target exponent); minor units times the
+        multiplier over the divisor gives unrounded target minor units.
+        """
+        pair = self._pairs.get((from_currency, to_currency))
+        if pair is None:
+            try:
+                from_n, from_k = self._rates[from_currency]
+                to_n, to_k = self._rates[to_currency]
+            except KeyError as e:
+                raise MoneyError(f"No usable rate for {e.args[0]}.") from None
+            # minor_to = minor_from * 10**-e_from * (to_n / 10**to_k) / (from_n / 10**from_k) * 10**e_to
+            from_exponent, to_exponent = exponent(from_currency), exponent(to_currency)
+            shift = from_k + to_exponent - to_k - from_exponent
+            multiplier = to_n * 10 ** max(shift, 0)
+            divisor = from_n * 10 ** max(-shift, 0)
+            pair = self._pairs[(from_currency, to_currency)] = (multiplier, divisor, from_exponent, to_exponent)
+        return pair
+
+    def convert_minor(self, minor: int, from_currency: str, to_currency: str) -> int:
+        """Converts an amount in source minor units to target minor units, rounded once."""
+        multiplier, divisor, _, _ = self._pair(from_currency, to_currency)
+        return _divide(minor * multiplier, divisor, self.rounding)
+
+    def convert(self, amount: Amount, from_currency: str, to_currency: str) -> Decimal:
+        """
+        Converts an amount exactly and returns it rounded to the target currency's minor unit.
+
+        The amount may have more decimal places than the source currency uses.
+
+        Raises:
+            MoneyError: If the amount is not a finite number, has too many digits (see _parse) or
+                        a currency has no usable rate.
+        """
+        n, k = _parse(amount)
+        multiplier, divisor, from_exponent, to_exponent = self._pair(from_currency, to_currency)
+        # n / 10**k is in major units; the pair expects source minor units.
+        shift = from_exponent - k
+        if shift >= 0:
+            minor = _divide(n * multiplier * 10 ** shift, divisor, self.rounding)
+        else:
+            minor = _divide(n * multiplier, divisor * 10 ** -shift, self.rounding)
+        try:
+            return _major(minor, to_exponent)
+        except decimal.DecimalException as e:
+            raise MoneyError(f"Cannot represent {amount!r} in {to_currency}: {e}") from None
@@ -0,0 +1,156 @@
+"""
+Multi-process conversion of very large batch files.
+
+The input file is split into byte ranges whose boundaries are moved forward to
+the next newline, so every shard holds whole lines.  The rate snapshot's
+cross-rate matrix is copied once into a multiprocessing.shared_memory block;
+each worker attaches to it when it starts and converts its shards through the
+same pipeline as batch_stream.run_batch, writing each shard to a temporary
+file.  The shard files are appended to the output in input order as soon as
+they are done.
+
+Records must not span lines, so CSV fields with embedded newlines are not
+supported in parallel mode.
+"""
+
+import csv
+import os
+import shutil
+import tempfile
+from multiprocessing import Pool, shared_memory
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import batch_stream
+from money import ExactRates
+from rate_table import RateTable
+
+SHARDS_PER_WORKER = 4  # More shards than workers keeps every core busy when shards convert at different speeds.
+MIN_SHARD_BYTES = 1 << 20
+
+_shared = None  # The worker's attachment to the shared rate snapshot.
+_table = None
+
+
+def shard_ranges(path: str, shards: int, start: int = 0) -> List[Tuple[int, int]]:
+    """
+    Splits a file into at most `shards` (start, end) byte ranges that begin at line starts.
+
+    Args:
+        path: The file to split.
+        shards: The number of ranges wanted.  Fewer are returned when lines are too long.
+        start: The offset at which the first range begins, e.g. just past a header line.
+    """
+    size = os.path.getsize(path)
+    if size <= start:
+        return []
+    boundaries = [start]
+    with open(path, "rb") as f:
+        for i in range(1, shards):
+            offset = start + (size - start) * i // shards
+            if offset <= boundaries[-1]:
+                continue
+            f.seek(offset - 1)
+            f.readline()  # Skip to the start of the next line.
+            boundary = f.tell()
+            if boundaries[-1] < boundary < size:
+                boundaries.append(boundary)
+    boundaries.append(size)
+    return list(zip(boundaries, boundaries[1:]))
+
+
+def _read_range(path: str, start: int, end: int) -> Iterator[str]:
+    with open(path, "rb") as f:
+        f.seek(start)
+        position = start
+        while position < end:
+            line = f.readline()
+            if not line:
+                return
+            position += len(line)
+            yield line.decode("utf-8")
+
+
+def _init_worker(shared_name: str, base_currency: str, codes: Tuple[str, ...], rounding: Optional[str]) -> None:
+    global _shared, _table
+    _shared = shared_memory.SharedMemory(name=shared_name)
+    size = len(codes) * len(codes)
+    _table = RateTable(base_currency, codes, _shared.buf[:8 * size].cast("d"))
+    if rounding is not None:
+        _table = ExactRates(_table, rounding)
+
+
+def _convert_shard(task) -> Tuple[int, int, str]:
+    path, start, end, fmt, columns, output_format, shard_path = task
+    counts = [0, 0]
+
+    def count(rows):
+        for row in rows:
+            counts[0] += 1
+            if row.error is not None:
+                counts[1] += 1
+            yield row
+
+    exact = isinstance(_table, ExactRates)
+    records = batch_stream.read_records(_read_range(path, start, end), fmt, columns, exact)
+    rows = count(batch_stream.convert(batch_stream.validate(records, exact), _table))
+    with open(shard_path, "w", encoding="utf-8", newline="") as out:
+        batch_stream.write_chunks(batch_stream.format_chunks(rows, output_format, header=False), out)
+    return counts[0], counts[1], shard_path
+
+
+def run_parallel(input_path: str, rates, output_path: str = "-", input_format: Optional[str] = None,
+                 output_format: Optional[str] = None, progress: Optional[batch_stream.Progress] = None,
+                 workers: int = 0, rounding: Optional[str] = None) -> Dict[str, int]:
+    """
+    Converts a batch file in several processes; see batch_stream.run_batch for the arguments.
+
+    Args:
+        workers: Number of worker processes, or 0 for one per CPU.
+
+    Returns:
+        A dictionary with the number of rows read and the number of rows that failed.
+    """
+    progress = progress or batch_stream.Progress()
+    workers = workers or os.cpu_count() or 1
+    table = rates if isinstance(rates, RateTable) else RateTable.from_rates(rates)
+
+    with open(input_path, "rb") as f:
+        first_line = f.readline()
+    fmt = input_format or batch_stream.detect_format(input_path, first_line.decode("utf-8"))
+    output_format = output_format or fmt
+    data_start, columns = 0, None
+    if fmt == "csv":
+        header = batch_stream.header_columns(next(csv.reader([first_line.decode("utf-8")]), []))
+        if header is not None:
+            data_start = len(first_line)
+        columns = header or (0, 1, 2)
+
+    size = os.path.getsize(input_path)
+    shards = max(1, min(workers * SHARDS_PER_WORKER, (size - data_start) // MIN_SHARD_BYTES))
+    ranges = shard_ranges(input_path, shards, data_start)
+
+    shard_dir = tempfile.mkdtemp(prefix=".batch-shards-",
+                                 dir=os.path.dirname(os.path.abspath(output_path)) if output_path != "-" else None)
+    matrix = memoryview(table.matrix).cast("B")
+    shared = shared_memory.SharedMemory(create=True, size=max(1, len(matrix)))
+    try:
+        shared.buf[:len(matrix)] = matrix
+        tasks = [(input_path, start, end, fmt, columns, output_format, os.path.join(shard_dir, f"{i:06d}"))
+                 for i, (start, end) in enumerate(ranges)]
+        with Pool(min(workers, max(1, len(tasks))), initializer=_init_worker,
+                  initargs=(shared.name, table.base_currency, table.codes, rounding)) as pool, \
+                batch_stream._open(output_path, "w") as out:
+            out.write("".join(batch_stream.format_chunks([], output_format)))
+            for rows, errors, shard_path in pool.imap(_convert_shard, tasks):
+                with open(shard_path, "r", encoding="utf-8", newline="") as shard:
+                    shutil.copyfileobj(shard, out, 1 << 20)
+                os.unlink(shard_path)
+                progress.add(rows, errors)
+            out.flush()
+    finally:
+        matrix.release()
+        shared.close()
+        shared.unlink()
+        shutil.rmtree(shard_dir, ignore_errors=True)
+    progress.finish()
+    return {"rows": progress.rows, "errors": progress.errors}
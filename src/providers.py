@@ -0,0 +1,328 @@
+"""
+Pluggable sources of exchange-rate tables, with fallback, hedging and circuit breakers.
+
+A Provider returns the latest table for a base currency as a validated payload
+in the exchangerate-api.com v6 shape (see rate_payload.validate), whatever the
+upstream schema:
+
+    V6Provider    https://v6.exchangerate-api.com/v6/<key>/latest/<BASE>
+    V4Provider    https://api.exchangerate-api.com/v4/latest/<BASE> (base, rates,
+                  time_last_updated), the keyless endpoint in examples/
+    FileProvider  a JSON file in either shape, e.g. a table saved for offline use;
+                  it is rebased when another base currency is asked for
+
+ProviderChain tries several providers in priority order and can be passed to
+ApiClient as `provider`.  Without `hedge_after` it falls back to the next
+provider when one fails.  With it, a request that has not been answered within
+`hedge_after` seconds is hedged: the next provider is asked as well and the
+first answer wins, so one slow upstream no longer stalls every conversion.  A
+provider that fails `failure_threshold` times in a row is skipped by its
+CircuitBreaker for `reset_timeout` seconds, after which one trial request
+decides whether it is used again.
+
+Put a FileProvider last for a local fallback.  The HTTP providers default to a
+Transport without retries, since the chain does the failing over: a retrying
+primary would delay the fallback by its backoff and count as a single failure.
+"""
+
+import abc
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterator, Optional, Sequence, Tuple
+
+import metrics
+from rate_payload import PayloadError, validate
+from transport import Transport, decode_json, default_transport
+
+V4_BASE_URL = "https://api.exchangerate-api.com/v4/latest/"
+
+
+class ProviderError(Exception):
+    """Raised when a provider (or every provider of a chain) cannot supply a rate table."""
+
+
+class Provider(abc.ABC):
+    """
+    A source of latest-rates tables.
+
+    Subclasses implement fetch(base_currency) and return a payload with at least base_code,
+    conversion_rates and, when known, time_last_update_unix; ProviderError, the transport's
+    exceptions or a ValueError (a body that is not JSON, or a PayloadError) signal a failure.
+    """
+
+    name = "provider"
+
+    @abc.abstractmethod
+    def fetch(self, base_currency: str) -> Dict:
+        """Returns the latest table for `base_currency`."""
+
+
+def _single_try_transport() -> Transport:
+    # No retries, so a chain fails over at once; the plan's quota still applies.
+    return Transport(max_retries=0, rate_limiter=default_transport().rate_limiter)
+
+
+class V6Provider(Provider):
+    """The exchangerate-api.com v6 API (the schema ApiClient speaks natively)."""
+
+    name = "v6"
+
+    def __init__(self, api_key: str, base_url: str = "https://v6.exchangerate-api.com/v6/", transport=None):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.transport = transport or _single_try_transport()
+
+    def fetch(self, base_currency: str) -> Dict:
+        response = self.transport.get(f"{self.base_url}{self.api_key}/latest/{base_currency}",
+                                      headers={"apikey": self.api_key})
+        response.raise_for_status()
+        data = decode_json(response)
+        if not isinstance(data, dict) or data.get("result") != "success":
+            error = data.get("error-type", "Unknown error") if isinstance(data, dict) else "Unexpected response"
+            raise ProviderError(f"API error: {error}")
+        return validate(data)
+
+
+class V4Provider(Provider):
+    """The keyless exchangerate-api.com v4 endpoint, whose tables are converted to the v6 shape."""
+
+    name = "v4"
+
+    def __init__(self, base_url: str = V4_BASE_URL, transport=None):
+        self.base_url = base_url
+        self.transport = transport or _single_try_transport()
+
+    def fetch(self, base_currency: str) -> Dict:
+        response = self.transport.get(f"{self.base_url}{base_currency}")
+        response.raise_for_status()
+        return from_v4(decode_json(response))
+
+
+class FileProvider(Provider):
+    """
+    Serves a table from a local JSON file in the v6 or v4 shape, rebased to the base currency asked for.
+
+    The file is re-read when its modification time changes.
+    """
+
+    name = "file"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._loaded = (None, None)  # (mtime, payload)
+
+    def fetch(self, base_currency: str) -> Dict:
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+            if self._loaded[0] != mtime:
+                with open(self.path, "rb") as f:
+                    data = json.load(f)
+                self._loaded = (mtime, from_v4(data) if "rates" in data else validate(data))
+        except (OSError, ValueError) as e:
+            raise ProviderError(f"Cannot read rates from {self.path}: {e}") from e
+        return rebase(self._loaded[1], base_currency)
+
+
+def from_v4(data) -> Dict:
+    """
+    Converts a v4 response ({"base", "rates", "time_last_updated", ...}) to a validated v6 payload.
+
+    Raises:
+        ProviderError: If the response reports an error.
+        PayloadError: If the table is malformed.
+    """
+    if not isinstance(data, dict):
+        raise PayloadError("Expected a JSON object.")
+    if data.get("result") == "error" or data.get("success") is False:
+        raise ProviderError(f"API error: {data.get('error-type') or data.get('error') or 'Unknown error'}")
+    updated = data.get("time_last_updated")
+    payload = {"result": "success", "base_code": data.get("base"), "conversion_rates": data.get("rates")}
+    if updated is not None:
+        payload["time_last_update_unix"] = updated
+        if isinstance(updated, (int, float)):
+            payload["time_last_update_utc"] = time.strftime("%a, %d %b %Y %H:%M:%S +0000", time.gmtime(updated))
+    return validate(payload)
+
+
+def rebase(payload: Dict, base_currency: str) -> Dict:
+    """Returns a validated payload quoted against another currency of its table."""
+    if payload["base_code"] == base_currency:
+        return payload
+    rates = payload["conversion_rates"]
+    try:
+        pivot = rates[base_currency]
+    except KeyError:
+        raise ProviderError(f"The table has no rate for {base_currency}.") from None
+    return dict(payload, base_code=base_currency,
+                conversion_rates={code: rate / pivot for code, rate in rates.items()})
+
+
+class CircuitBreaker:
+    """
+    Stops calls to a failing dependency for a while.
+
+    Closed, every call is allowed.  After `failure_threshold` consecutive failures the breaker
+    opens and allow() is False for `reset_timeout` seconds; then it is half open and allows a
+    single trial call, whose success closes the breaker and whose failure opens it again.
+
+    Args:
+        failure_threshold: Consecutive failures that open the breaker.
+        reset_timeout: Seconds the breaker stays open before a trial call.
+        clock: Returns a monotonic time in seconds.  Defaults to time.monotonic.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """'closed', 'open' or 'half-open'."""
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            return "half-open" if self.clock() >= self._opened_at + self.reset_timeout else "open"
+
+    def allow(self) -> bool:
+        """Returns whether a call may be made now; in the half-open state only the first caller may."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._trial or self.clock() < self._opened_at + self.reset_timeout:
+                return False
+            self._trial = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial or self._failures >= self.failure_threshold:
+                self._opened_at = self.clock()
+            self._trial = False
+
+
+class ProviderChain(Provider):
+    """
+    Fetches from the first provider that answers, in priority order.
+
+    Args:
+        providers: The providers, most preferred first.
+        hedge_after: Seconds to wait for an answer before also asking the next provider, or None
+                     to ask the next provider only after a failure.
+        failure_threshold: Consecutive failures after which a provider is skipped.
+        reset_timeout: Seconds a failing provider is skipped before it is tried again.
+        clock: Passed to every CircuitBreaker.
+        max_workers: Threads for hedged requests.  Requests that lose a race keep a thread until
+                     their provider answers, so leave room for a slow tail on top of the callers.
+    """
+
+    name = "chain"
+
+    def __init__(self, providers: Sequence[Provider], hedge_after: Optional[float] = None,
+                 failure_threshold: int = 3, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic, max_workers: int = 32):
+        if not providers:
+            raise ValueError("A provider chain needs at least one provider.")
+        self.providers = list(providers)
+        self.hedge_after = hedge_after
+        self.breakers = [CircuitBreaker(failure_threshold, reset_timeout, clock) for _ in self.providers]
+        # Hedged requests that lose the race finish in the background; their outcome still
+        # counts for the provider's breaker.
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="rate-provider") if hedge_after is not None else None
+
+    def fetch(self, base_currency: str) -> Dict:
+        """
+        Returns the first table a provider supplies.
+
+        Raises:
+            ProviderError: If every provider failed or was skipped by its circuit breaker.
+        """
+        if self._executor is None:
+            return self._fetch_in_order(base_currency)
+        return self._fetch_hedged(base_currency)
+
+    def _allowed(self) -> Iterator[Tuple[Provider, CircuitBreaker]]:
+        # Lazily, so a half-open breaker only gives its trial call to a provider that is used.
+        for provider, breaker in zip(self.providers, self.breakers):
+            if breaker.allow():
+                yield provider, breaker
+            else:
+                metrics.PROVIDER_FETCHES.inc(provider=provider.name, outcome="skipped")
+
+    def _call(self, provider: Provider, breaker: CircuitBreaker, base_currency: str) -> Dict:
+        try:
+            payload = provider.fetch(base_currency)
+        except Exception:  # Any failure of a provider is a reason to try the next one.
+            breaker.record_failure()
+            metrics.PROVIDER_FETCHES.inc(provider=provider.name, outcome="error")
+            raise
+        breaker.record_success()
+        metrics.PROVIDER_FETCHES.inc(provider=provider.name, outcome="ok")
+        return dict(payload, provider=provider.name)
+
+    def _fetch_in_order(self, base_currency: str) -> Dict:
+        errors = []
+        for provider, breaker in self._allowed():
+            try:
+                return self._call(provider, breaker, base_currency)
+            except Exception as e:
+                errors.append(f"{provider.name}: {e}")
+        raise _all_failed(errors)
+
+    def _fetch_hedged(self, base_currency: str) -> Dict:
+        candidates = self._allowed()
+        pending = {}
+        errors = []
+        exhausted = False
+
+        def launch() -> bool:
+            nonlocal exhausted
+            candidate = None if exhausted else next(candidates, None)
+            if candidate is None:
+                exhausted = True
+                return False
+            provider, breaker = candidate
+            pending[self._executor.submit(self._call, provider, breaker, base_currency)] = provider
+            return True
+
+        launch()
+        while pending:
+            done, _ = wait(pending, timeout=None if exhausted else self.hedge_after, return_when=FIRST_COMPLETED)
+            if not done:
+                if launch():  # No answer within the threshold: ask the next provider as well.
+                    metrics.HEDGED_REQUESTS.inc()
+                continue
+            for future in done:
+                provider = pending.pop(future)
+                if future.exception() is None:
+                    return future.result()
+                errors.append(f"{provider.name}: {future.exception()}")
+                launch()  # A failed request is replaced at once, without waiting for the threshold.
+        raise _all_failed(errors)
+
+    def close(self) -> None:
+        """Stops the hedging threads once requests still in flight have finished."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+
+def _all_failed(errors) -> ProviderError:
+    if not errors:
+        return ProviderError("Every rate provider is failing; they are skipped until their circuit breakers reset.")
+    return ProviderError(f"All rate providers failed ({'; '.join(errors)}).")
@@ -0,0 +1,168 @@
+"""
+A shared, thread-safe cache of exchange-rate tables keyed by base currency.
+
+The upstream API only publishes new rates once per update cycle, so a table is
+kept until the `time_next_update_unix` the API reported for it (or a configurable
+TTL when the payload does not carry one).  Once an entry expires it is still
+served while a single background refresh fetches the next table, and concurrent
+callers that miss the cache share one fetch instead of each starting their own.
+
+A new table is published by replacing its entry (a single reference assignment),
+never by updating the old entry in place, so a reader holds either the old table
+or the new one and peek() can read entries without taking the lock.
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from metrics import CACHE_LOOKUPS, CACHE_REFRESHES
+
+DEFAULT_TTL = 3600.0  # Seconds to keep a table whose payload has no time_next_update_unix.
+DEFAULT_MAX_STALE = 86400.0  # Seconds past expiry after which a stale table is no longer served.
+
+
+class _Entry:
+    """A cached payload together with the time it stops being fresh."""
+
+    __slots__ = ("payload", "expires_at")
+
+    def __init__(self, payload: Dict, expires_at: float):
+        self.payload = payload
+        self.expires_at = expires_at
+
+
+class _Flight:
+    """A fetch in progress that other callers can wait on."""
+
+    __slots__ = ("done", "payload", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.payload = None
+        self.error = None
+
+
+class RateCache:
+    """
+    Caches exchange-rate payloads per base currency with stale-while-revalidate.
+
+    Args:
+        loader: Called as loader(base_currency) to fetch a fresh payload.  The payload must be a
+                dictionary containing 'conversion_rates' and may contain 'time_next_update_unix'.
+                Any exception it raises is passed on to the callers waiting for that fetch.
+        ttl: Seconds a table stays fresh.  When the payload carries 'time_next_update_unix' the
+             table is kept until then instead, capped at `ttl` if one was given explicitly.
+        max_stale: Seconds past expiry during which the stale table is still served while it is
+                   refreshed in the background.  Older tables are refreshed synchronously.
+        clock: Returns the current Unix time.  Defaults to time.time.
+    """
+
+    def __init__(self, loader: Callable[[str], Dict], ttl: Optional[float] = None,
+                 max_stale: float = DEFAULT_MAX_STALE, clock: Callable[[], float] = time.time):
+        self.loader = loader
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.clock = clock
+        self._entries: Dict[str, _Entry] = {}
+        self._flights: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "refresh_errors": 0}
+
+    def get(self, base_currency: str = "USD") -> Dict:
+        """
+        Returns the payload for a base currency, fetching it only when necessary.
+
+        The returned dictionary is shared with other callers and must not be modified.
+
+        Raises:
+            Whatever the loader raises when no usable table is cached.
+        """
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(base_currency)
+            if entry is not None and now < entry.expires_at:
+                self._counters["hits"] += 1
+                CACHE_LOOKUPS.inc(result="hit")
+                return entry.payload
+            if entry is not None and now < entry.expires_at + self.max_stale:
+                self._counters["stale_hits"] += 1
+                CACHE_LOOKUPS.inc(result="stale_hit")
+                if base_currency not in self._flights:
+                    flight = self._flights[base_currency] = _Flight()
+                    threading.Thread(target=self._run_flight, args=(base_currency, flight),
+                                     name=f"rate-refresh-{base_currency}", daemon=True).start()
+                return entry.payload
+            self._counters["misses"] += 1
+            CACHE_LOOKUPS.inc(result="miss")
+            flight = self._flights.get(base_currency)
+            owner = flight is None
+            if owner:
+                flight = self._flights[base_currency] = _Flight()
+
+        if owner:
+            self._run_flight(base_currency, flight)
+        else:
+            flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.payload
+
+    def peek(self, base_currency: str = "USD") -> Optional[Dict]:
+        """
+        Returns the cached payload for a base currency if it is still fresh, otherwise None.
+
+        Unlike get() this never fetches or waits, so a hot path that only needs to know whether
+        its table is still current can ask cheaply.  A fresh entry counts as a hit in stats(), as
+        it would through get(); a miss is not counted, since the caller then falls back to get().
+        """
+        entry = self._entries.get(base_currency)
+        if entry is not None and self.clock() < entry.expires_at:
+            with self._lock:
+                self._counters["hits"] += 1
+            CACHE_LOOKUPS.inc(result="hit")
+            return entry.payload
+        return None
+
+    def invalidate(self, base_currency: Optional[str] = None) -> None:
+        """Drops the cached table for one base currency, or every table when none is given."""
+        with self._lock:
+            if base_currency is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(base_currency, None)
+
+    def stats(self) -> Dict[str, float]:
+        """Returns the hit, miss and refresh counters together with the overall hit ratio."""
+        with self._lock:
+            stats = dict(self._counters)
+        lookups = stats["hits"] + stats["stale_hits"] + stats["misses"]
+        stats["hit_ratio"] = (stats["hits"] + stats["stale_hits"]) / lookups if lookups else 0.0
+        return stats
+
+    def _expiry_for(self, payload: Dict, now: float) -> float:
+        next_update = payload.get("time_next_update_unix")
+        if next_update is None or next_update <= now:
+            return now + (self.ttl if self.ttl is not None else DEFAULT_TTL)
+        if self.ttl is not None:
+            return min(next_update, now + self.ttl)
+        return next_update
+
+    def _run_flight(self, base_currency: str, flight: _Flight) -> None:
+        try:
+            payload = self.loader(base_currency)
+        except Exception as e:
+            flight.error = e
+            with self._lock:
+                self._counters["refresh_errors"] += 1
+                CACHE_REFRESHES.inc(outcome="error")
+                del self._flights[base_currency]
+        else:
+            flight.payload = payload
+            with self._lock:
+                self._counters["refreshes"] += 1
+                CACHE_REFRESHES.inc(outcome="ok")
+                self._entries[base_currency] = _Entry(payload, self._expiry_for(payload, self.clock()))
+                del self._flights[base_currency]
+        finally:
+            flight.done.set()
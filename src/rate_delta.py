@@ -0,0 +1,62 @@
+"""
+The difference between two rate tables of the same base currency.
+
+Between two API updates most currencies often keep their rates, and a refresh
+that re-fetches a table before the next publication returns exactly the same
+rates.  Everything derived from a table (the RateTable cross-rate matrix, the
+conversion memo, the rate history on disk) is keyed on the identity of its
+rates, so rather than rebuilding it for every new payload, a refresh diffs the
+new rates against the previous ones and only touches what a RateDelta names:
+
+    unchanged     nothing to rebuild; the previous rates object is kept
+    changed only  update the rows and columns of those currencies
+    added/removed the set of currencies changed; rebuild from scratch
+"""
+
+from typing import FrozenSet, Mapping, NamedTuple
+
+_EMPTY: FrozenSet[str] = frozenset()
+
+
+class RateDelta(NamedTuple):
+    """The currencies whose rates changed, appeared or disappeared in a refresh."""
+    changed: FrozenSet[str] = _EMPTY
+    added: FrozenSet[str] = _EMPTY
+    removed: FrozenSet[str] = _EMPTY
+
+    @property
+    def unchanged(self) -> bool:
+        return not (self.changed or self.added or self.removed)
+
+    @property
+    def same_currencies(self) -> bool:
+        """Whether both tables quote the same currencies, so derived structures can be patched in place."""
+        return not (self.added or self.removed)
+
+    @property
+    def affected(self) -> FrozenSet[str]:
+        """Every currency whose conversions may have a different result."""
+        return self.changed | self.added | self.removed
+
+    @property
+    def kind(self) -> str:
+        """'unchanged', 'partial' (only rates changed) or 'full' (the currencies changed)."""
+        if self.unchanged:
+            return "unchanged"
+        return "partial" if self.same_currencies else "full"
+
+
+UNCHANGED = RateDelta()
+
+
+def diff(old: Mapping[str, float], new: Mapping[str, float]) -> RateDelta:
+    """
+    Compares two base-relative rate tables.
+
+    Rates are compared exactly: validated tables hold floats as the API published them, so
+    any difference is a new quote.
+    """
+    if old == new:  # The common case, compared in C.
+        return UNCHANGED
+    changed = frozenset(code for code, rate in new.items() if code in old and old[code] != rate)
+    return RateDelta(changed, frozenset(new.keys() - old.keys()), frozenset(old.keys() - new.keys()))
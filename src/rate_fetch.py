@@ -0,0 +1,53 @@
+"""
+Fetching latest-rates tables for the command-line entry points.
+
+utils, converter and cli each keep a RateCache whose loader fetches a v6 URL
+with fetch_latest(), and report a failed fetch the same way: catch
+fetch_errors() and print describe_fetch_error(e).  requests is only imported
+by the first fetch, so an entry point that answers from a stored snapshot never
+loads it.
+"""
+
+import sys
+from json import JSONDecodeError
+from typing import Dict, Tuple
+
+
+def fetch_latest(url: str) -> Dict:
+    """
+    Fetches a v6 latest-rates URL through the default transport and returns the validated payload.
+
+    Raises:
+        requests.exceptions.RequestException: If the request fails or the status is 4xx/5xx.
+        json.JSONDecodeError: If the body is not JSON.
+        ValueError: If the API reports an error; PayloadError (a ValueError) if the table is
+                    malformed, so that it fails here rather than mid-conversion.
+    """
+    from rate_payload import validate
+    from transport import decode_json, default_transport
+
+    response = default_transport().get(url)
+    response.raise_for_status()
+    data = decode_json(response)
+    if not isinstance(data, dict) or data.get("result") != "success":
+        error = data.get("error-type", "Unknown error") if isinstance(data, dict) else "Unexpected response"
+        raise ValueError(f"API error: {error}")
+    return validate(data)
+
+
+def fetch_errors() -> Tuple[type, ...]:
+    """
+    Returns the request and JSON decoding errors a fetch can raise, for an except clause.
+
+    requests' class is only included once it has been imported (nothing can have raised it
+    otherwise), so call this in the except clause, after the fetch.
+    """
+    requests = sys.modules.get("requests")
+    return (requests.exceptions.RequestException, JSONDecodeError) if requests is not None else (JSONDecodeError,)
+
+
+def describe_fetch_error(error: Exception) -> str:
+    """Returns the message to show for an error caught with fetch_errors()."""
+    if isinstance(error, JSONDecodeError):
+        return f"Error decoding JSON response: {error}"
+    return f"Error fetching exchange rates: {error}"
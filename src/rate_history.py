@@ -0,0 +1,262 @@
+"""
+A local, append-only history of exchange-rate snapshots.
+
+The API only serves the latest table, so past conversions cannot be re-run from
+it.  RateHistory records every table ApiClient fetches and answers "which rates
+were in force at time t" from disk.  Each base currency has its own directory:
+
+    timestamps.bin   the sorted time_last_update_unix of every snapshot (int64)
+    <CODE>.bin       one float64 per snapshot for that currency, NaN where the
+                     snapshot did not quote it
+
+Appending a snapshot appends one value to every column and then one entry to
+timestamps.bin, which acts as the commit marker: values past the end of the
+index are ignored by readers and truncated by the next append, so a crash
+mid-append never exposes a partial snapshot.  An as-of lookup is a binary
+search of the index; the columns are read into memory once (8 bytes per
+currency per snapshot, about 4.5 MB for ten years of daily tables) and re-read
+only when the index has grown.  There must only be one writer per directory.
+"""
+
+import math
+import os
+import sys
+import time
+from array import array
+from bisect import bisect_right
+from decimal import Decimal
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+import metrics
+from money import ExactRates, MoneyError
+from rate_table import RateTable
+from snapshot_store import default_directory
+
+_INDEX = "timestamps.bin"
+
+
+class HistoricalConversion(NamedTuple):
+    """
+    The outcome of one row of RateHistory.convert_batch.
+
+    `snapshot` is the time_last_update_unix of the table the row was converted against.
+    `converted_amount` is None and `error` holds the reason when the row could not be converted.
+    """
+    timestamp: float
+    amount: float
+    from_currency: str
+    to_currency: str
+    converted_amount: Optional[Union[float, Decimal]]
+    snapshot: Optional[int]
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _check_code(code: str) -> str:
+    # Codes become file names, so only three ASCII letters are accepted.
+    if len(code) != 3 or not code.isascii() or not code.isalpha():
+        raise ValueError(f"Invalid currency code: {code!r}")
+    return code
+
+
+def _read_array(path: str, typecode: str, count: Optional[int] = None) -> array:
+    values = array(typecode)
+    try:
+        with open(path, "rb") as f:
+            data = f.read() if count is None else f.read(count * values.itemsize)
+    except FileNotFoundError:
+        return values
+    values.frombytes(data[:len(data) - len(data) % values.itemsize])
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values
+
+
+def _to_bytes(values: array) -> bytes:
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+class RateHistory:
+    """
+    Reads and appends rate snapshots for every base currency under a directory.
+
+    Args:
+        directory: The history root.  Defaults to a 'history' directory next to the snapshot
+                   store (see snapshot_store.default_directory).
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or os.path.join(default_directory(), "history")
+        self._indexes: Dict[str, Tuple[int, array]] = {}
+        self._columns: Dict[str, Tuple[int, Dict[str, array]]] = {}
+
+    def _base_dir(self, base_currency: str) -> str:
+        return os.path.join(self.directory, _check_code(base_currency))
+
+    def timestamps(self, base_currency: str) -> array:
+        """
+        Returns the sorted snapshot timestamps (an array('q')) stored for a base currency.
+
+        The index is cached and only re-read when the file has grown.  The array is shared and
+        must not be modified.
+        """
+        path = os.path.join(self._base_dir(base_currency), _INDEX)
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            size = 0
+        cached = self._indexes.get(base_currency)
+        if cached is None or cached[0] != size:
+            cached = self._indexes[base_currency] = (size, _read_array(path, "q"))
+        return cached[1]
+
+    def currencies(self, base_currency: str) -> List[str]:
+        """Returns the currencies that have a column for a base currency."""
+        try:
+            names = os.listdir(self._base_dir(base_currency))
+        except OSError:
+            return []
+        return sorted(name[:3] for name in names if len(name) == 7 and name.endswith(".bin") and name != _INDEX)
+
+    def append(self, payload: Dict) -> bool:
+        """
+        Records a v6 latest-rates payload.
+
+        Returns:
+            True if the snapshot was appended, False if it is not newer than the last one stored
+            for its base currency (the history is append-only).
+
+        Raises:
+            ValueError: If the payload has no time_last_update_unix or an invalid currency code.
+            OSError: If the history cannot be written.
+        """
+        base_currency = payload["base_code"]
+        timestamp = payload.get("time_last_update_unix")
+        if timestamp is None:
+            raise ValueError("The payload has no time_last_update_unix.")
+        timestamp = int(timestamp)
+        rates = {_check_code(code): float(rate) for code, rate in payload["conversion_rates"].items()}
+        index = self.timestamps(base_currency)
+        if index and timestamp <= index[-1]:
+            return False
+
+        base_dir = self._base_dir(base_currency)
+        os.makedirs(base_dir, exist_ok=True)
+        rows = len(index)
+        row_bytes = rows * 8
+        for code in set(rates).union(self.currencies(base_currency)):
+            path = os.path.join(base_dir, f"{code}.bin")
+            with open(path, "ab") as f:
+                size = f.seek(0, os.SEEK_END)
+                if size > row_bytes:
+                    f.truncate(row_bytes)  # Drop values left behind by an interrupted append.
+                elif size < row_bytes:
+                    f.write(_to_bytes(array("d", [math.nan] * ((row_bytes - size) // 8))))  # A new currency.
+                f.write(_to_bytes(array("d", [rates.get(code, math.nan)])))
+        with open(os.path.join(base_dir, _INDEX), "ab") as f:
+            f.truncate(row_bytes)
+            f.write(_to_bytes(array("q", [timestamp])))
+        return True
+
+    def locate(self, base_currency: str, timestamp: float) -> int:
+        """Returns the row of the last snapshot published at or before `timestamp`, or -1 if none was."""
+        return bisect_right(self.timestamps(base_currency), timestamp) - 1
+
+    def _load_columns(self, base_currency: str) -> Dict[str, array]:
+        index = self.timestamps(base_currency)
+        cached = self._columns.get(base_currency)
+        if cached is None or cached[0] != len(index):
+            base_dir = self._base_dir(base_currency)
+            columns = {code: _read_array(os.path.join(base_dir, f"{code}.bin"), "d", len(index))
+                       for code in self.currencies(base_currency)}
+            cached = self._columns[base_currency] = (len(index), columns)
+        return cached[1]
+
+    def rates_at(self, base_currency: str, row: int) -> Dict[str, float]:
+        """Returns the rates of one stored snapshot as a dictionary of currency code to rate."""
+        rates = {}
+        for code, column in self._load_columns(base_currency).items():
+            if row < len(column) and not math.isnan(column[row]):
+                rates[code] = column[row]
+        return rates
+
+    def as_of(self, base_currency: str, timestamp: float) -> Optional[RateTable]:
+        """
+        Returns the rates that were in force at `timestamp` (Unix seconds) as a RateTable.
+
+        Returns:
+            The table of the last snapshot published at or before `timestamp`, or None if the
+            history starts later (or is empty).
+        """
+        row = self.locate(base_currency, timestamp)
+        if row < 0:
+            return None
+        return RateTable.from_rates(self.rates_at(base_currency, row), base_currency)
+
+    def series(self, currency: str, base_currency: str = "USD") -> Tuple[array, array]:
+        """Returns (timestamps, rates) for one currency against a base; rates is NaN where it was not quoted."""
+        index = self.timestamps(base_currency)
+        values = array("d", self._load_columns(base_currency).get(_check_code(currency), ()))
+        values.extend([math.nan] * (len(index) - len(values)))
+        return index, values
+
+    def convert_batch(self, conversions: Iterable[Tuple[float, float, str, str]], base_currency: str = "USD",
+                      exact: bool = False, rounding: str = "half-even") -> List[HistoricalConversion]:
+        """
+        Converts rows that each carry their own timestamp against the rates in force at that time.
+
+        Rows are grouped by the snapshot they fall into, so each historical table is looked up
+        once however many rows use it.  Float rows are converted against the table's
+        base-relative rates rather than a RateTable, whose N x N matrix would cost more to build
+        than the few rows that typically fall into one snapshot.
+
+        Args:
+            conversions: Tuples of (timestamp, amount, from_currency, to_currency).
+            base_currency: The base currency whose history is used.
+            exact: Convert in integer minor units (see money.py).
+            rounding: How exact results are rounded: 'half-even' (banker's) or 'half-up'.
+
+        Returns:
+            A list of HistoricalConversion tuples in input order.
+        """
+        started = time.perf_counter()
+        conversions = list(conversions)
+        groups: Dict[int, List[int]] = {}
+        for i, (timestamp, _, _, _) in enumerate(conversions):
+            groups.setdefault(self.locate(base_currency, timestamp), []).append(i)
+
+        index = self.timestamps(base_currency)
+        results: List[Optional[HistoricalConversion]] = [None] * len(conversions)
+        for row, members in groups.items():
+            if row < 0:
+                for i in members:
+                    results[i] = HistoricalConversion(*conversions[i], None, None,
+                                                      f"No {base_currency} rates stored for that time.")
+                continue
+            rates = self.rates_at(base_currency, row)
+            if exact:
+                rates = ExactRates(rates, rounding)
+            for i in members:
+                timestamp, amount, from_curr, to_curr = conversions[i]
+                if from_curr not in rates or to_curr not in rates:
+                    results[i] = HistoricalConversion(timestamp, amount, from_curr, to_curr, None, index[row],
+                                                      f"One or both currencies ({from_curr}, {to_curr}) not found.")
+                    continue
+                try:
+                    if exact:
+                        converted_amount = rates.convert(amount, from_curr, to_curr)
+                    else:
+                        converted_amount = amount * (rates[to_curr] / rates[from_curr])
+                except (MoneyError, ZeroDivisionError) as e:
+                    results[i] = HistoricalConversion(timestamp, amount, from_curr, to_curr, None, index[row], str(e))
+                else:
+                    results[i] = HistoricalConversion(timestamp, amount, from_curr, to_curr, converted_amount,
+                                                      index[row])
+        metrics.record_batch(len(results), sum(not result.ok for result in results), time.perf_counter() - started)
+        return results
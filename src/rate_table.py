@@ -0,0 +1,194 @@
+"""
+A rate snapshot with every cross rate precomputed.
+
+The API quotes each currency against one base currency, so converting between
+two other currencies means two dictionary lookups and a division on every call.
+A RateTable is built once per snapshot: it interns the currency codes to
+indices and fills an N x N matrix (about 160 x 160 float64 for the
+exchangerate-api.com table) with the rate from every currency to every other
+one, so a pair lookup is a single indexed read.  The matrix does not depend on
+the base currency, which makes rebase() free, and when a refresh moves only a
+few rates updated() recomputes just their rows and columns.
+
+A RateTable is also a read-only mapping of currency code to base-relative rate,
+so it can be passed anywhere a plain rate dictionary is expected.  A
+RateTableCache keeps one next to each cached snapshot, so callers that convert
+many times against the same rates build the matrix once.
+"""
+
+import threading
+from array import array
+from collections.abc import Mapping
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+
+from rate_delta import RateDelta, diff
+
+
+class RateTable(Mapping):
+    """
+    An immutable rate snapshot with an interned currency index and a dense cross-rate matrix.
+
+    Args:
+        base_currency: The currency the table is quoted against.
+        codes: The currency codes, in matrix order.
+        matrix: A flat array('d') (or a memoryview cast to 'd') of len(codes) ** 2 cross rates;
+                matrix[i * n + j] converts one unit of codes[i] into codes[j].
+    """
+
+    __slots__ = ("base_currency", "codes", "_index", "_matrix", "_size", "_base_row")
+
+    def __init__(self, base_currency: str, codes: Sequence[str], matrix: array):
+        self.codes = tuple(codes)
+        self._index = {code: i for i, code in enumerate(self.codes)}
+        self._size = len(self.codes)
+        if len(matrix) != self._size * self._size:
+            raise ValueError("The cross-rate matrix does not match the number of currencies.")
+        if base_currency not in self._index:
+            raise KeyError(base_currency)
+        self._matrix = matrix
+        self.base_currency = base_currency
+        self._base_row = self._index[base_currency] * self._size
+
+    @classmethod
+    def from_rates(cls, rates: Dict[str, float], base_currency: Optional[str] = None) -> "RateTable":
+        """
+        Builds a table from a dictionary of rates relative to one base currency.
+
+        Non-numeric entries (such as the 'timestamp' key converter.get_exchange_rates adds) are
+        skipped.  `base_currency` defaults to the currency whose rate is 1.
+
+        Raises:
+            ValueError: If no base currency is given and none of the rates is 1.
+        """
+        codes = [code for code, rate in rates.items()
+                 if isinstance(rate, (int, float)) and not isinstance(rate, bool)]
+        if base_currency is None:
+            base_currency = next((code for code in codes if rates[code] == 1), None)
+            if base_currency is None:
+                raise ValueError("Cannot tell the base currency of the rates; pass base_currency.")
+        values = [float(rates[code]) for code in codes]
+        matrix = array("d")
+        for source in values:
+            if source:
+                matrix.extend([target / source for target in values])
+            else:
+                matrix.extend([float("nan")] * len(values))
+        return cls(base_currency, codes, matrix)
+
+    @classmethod
+    def from_payload(cls, payload: Dict) -> "RateTable":
+        """Builds a table from an exchangerate-api.com v6 response."""
+        return cls.from_rates(payload["conversion_rates"], payload.get("base_code"))
+
+    def updated(self, rates: Dict[str, float], delta: RateDelta) -> "RateTable":
+        """
+        Returns the table for newer rates of the same base currency, given their rate_delta.diff.
+
+        When only rates changed, the matrix is copied and just the rows and columns of the
+        changed currencies are recomputed (2 * k * N divisions instead of N * N); if the set of
+        currencies changed, or so many rates did that patching would be slower, the table is
+        rebuilt.  Returns this table if nothing changed.
+        """
+        if delta.unchanged:
+            return self
+        if not delta.same_currencies or 3 * len(delta.changed) > self._size:
+            return RateTable.from_rates(rates, self.base_currency)
+        codes, size = self.codes, self._size
+        values = [float(rates[code]) for code in codes]
+        matrix = array("d", self._matrix)
+        nan = float("nan")
+        for code in delta.changed:
+            k = self._index.get(code)
+            if k is None:  # A non-numeric entry that from_rates skipped.
+                continue
+            rate = values[k]
+            # Row k converts from the currency, column k into it.
+            matrix[k * size:(k + 1) * size] = (array("d", [target / rate for target in values]) if rate
+                                               else array("d", [nan]) * size)
+            matrix[k::size] = array("d", [rate / source if source else nan for source in values])
+        table = RateTable.__new__(RateTable)
+        table.codes = codes
+        table._index = self._index
+        table._size = size
+        table._matrix = matrix
+        table.base_currency = self.base_currency
+        table._base_row = self._base_row
+        return table
+
+    @property
+    def matrix(self):
+        """The flat cross-rate matrix; matrix[i * len(codes) + j] converts codes[i] into codes[j]."""
+        return self._matrix
+
+    def index_of(self, currency: str) -> int:
+        """Returns the interned index of a currency.  Raises KeyError for an unknown one."""
+        return self._index[currency]
+
+    def cross_rate(self, from_currency: str, to_currency: str) -> float:
+        """Returns how many units of `to_currency` one unit of `from_currency` buys."""
+        return self._matrix[self._index[from_currency] * self._size + self._index[to_currency]]
+
+    def convert(self, amount: float, from_currency: str, to_currency: str) -> float:
+        """Converts an amount.  Raises KeyError if either currency is not in the table."""
+        return amount * self._matrix[self._index[from_currency] * self._size + self._index[to_currency]]
+
+    def rebase(self, base_currency: str) -> "RateTable":
+        """Returns the same snapshot quoted against another base currency, sharing this table's matrix."""
+        if base_currency == self.base_currency:
+            return self
+        table = RateTable.__new__(RateTable)
+        table.codes = self.codes
+        table._index = self._index
+        table._size = self._size
+        table._matrix = self._matrix
+        table.base_currency = base_currency
+        table._base_row = self._index[base_currency] * self._size
+        return table
+
+    def as_dict(self) -> Dict[str, float]:
+        """Returns the base-relative rates as a plain dictionary."""
+        return dict(zip(self.codes, self._matrix[self._base_row:self._base_row + self._size]))
+
+    def __getitem__(self, currency: str) -> float:
+        return self._matrix[self._base_row + self._index[currency]]
+
+    def __contains__(self, currency) -> bool:
+        return currency in self._index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.codes)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __repr__(self) -> str:
+        return f"RateTable(base_currency={self.base_currency!r}, currencies={self._size})"
+
+
+class RateTableCache:
+    """
+    Keeps the RateTable of the latest rates per base currency, keyed on the identity of the rates.
+
+    Pass the rates object a rate cache hands out (it stays the same object until new rates
+    arrive, see ApiClient._publish): the same object returns the same table, and newer rates
+    patch the previous table with RateTable.updated instead of rebuilding it.
+    """
+
+    def __init__(self):
+        self._tables: Dict[str, Tuple[Mapping, RateTable]] = {}
+        self._lock = threading.Lock()
+
+    def table_for(self, base_currency: str, rates: Mapping) -> RateTable:
+        """Returns the table for `rates`, quoted against `base_currency`."""
+        cached = self._tables.get(base_currency)
+        if cached is not None and cached[0] is rates:
+            return cached[1]
+        # Built outside the lock; two threads seeing new rates at once both build a table.
+        if cached is None:
+            table = RateTable.from_rates(rates, base_currency)
+        else:
+            table = cached[1].updated(rates, diff(cached[0], rates))
+        with self._lock:
+            self._tables[base_currency] = (rates, table)
+        return table
+
@@ -0,0 +1,348 @@
+"""
+A long-running HTTP/JSON conversion service.
+
+Shelling out to cli.py pays for interpreter start-up, the requests import and a
+rate fetch on every conversion.  This server pays them once: it keeps an
+ApiClient and a RateTable built from its latest snapshot in memory, updates the
+table only when the client's rate cache hands out new rates (recomputing just
+the currencies that moved, see rate_delta.py), and runs a
+background thread that touches the cache every `refresh_interval` seconds so an
+expired table is refetched (stale-while-revalidate, see rate_cache.py) before a
+request has to wait for it.
+
+Endpoints (all responses are JSON):
+
+    GET  /convert?amount=100&from=USD&to=KES[&exact=1&rounding=half-up]
+    POST /convert   {"amount": 100, "from": "USD", "to": "KES", "exact": false}
+    POST /batch     {"conversions": [[100, "USD", "KES"], {"amount": 5, "from": "EUR", "to": "JPY"}],
+                     "exact": false, "rounding": "half-even"}
+    GET  /health
+    GET  /metrics   counters and histograms in the Prometheus text format (see metrics.py)
+
+Exact results are returned as strings so no precision is lost in JSON.  A batch
+is converted against one snapshot in a single pass; rows that fail carry an
+"error" instead of aborting the batch.
+
+Usage:
+    python src/server.py [--host 127.0.0.1] [--port 8080] [--api-key KEY]
+"""
+
+import argparse
+import json
+import math
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import metrics
+from api_client import DEFAULT_BASE_URL, ApiClient, ApiClientError
+from money import ExactRates, MoneyError
+from rate_table import RateTable
+
+DEFAULT_PORT = 8080
+DEFAULT_REFRESH_INTERVAL = 60.0
+MAX_BODY_BYTES = 16 << 20
+
+
+class ServiceError(Exception):
+    """Raised for a request the service cannot answer; `status` is the HTTP status to send."""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+class RateService:
+    """
+    Converts against an in-memory rate table kept up to date from an ApiClient.
+
+    Args:
+        client: The client whose rate cache supplies the snapshots.
+        base_currency: The base currency of the snapshot that is fetched.  Any pair of
+                       currencies it quotes can be converted.
+        refresh_interval: Seconds between background checks of the rate cache.
+    """
+
+    def __init__(self, client: ApiClient, base_currency: str = "USD",
+                 refresh_interval: float = DEFAULT_REFRESH_INTERVAL):
+        self.client = client
+        self.base_currency = base_currency
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._payload: Optional[Dict] = None
+        self._table: Optional[RateTable] = None
+        self._exact: Dict[str, ExactRates] = {}
+        self._stop = threading.Event()
+        self._refresher: Optional[threading.Thread] = None
+
+    def snapshot(self) -> Tuple[Dict, RateTable]:
+        """
+        Returns the current payload and its RateTable, updating the table only for new rates.
+
+        Raises:
+            ServiceError: With status 503 if no rates can be fetched.
+        """
+        try:
+            payload = self.client.cache.get(self.base_currency)
+        except ApiClientError as e:
+            raise ServiceError(f"Exchange rates unavailable: {e}", 503) from e
+        with self._lock:
+            if payload is not self._payload:
+                # The client keeps the table next to the snapshot and only patches it for new rates.
+                table = self.client.tables.table_for(self.base_currency, payload["conversion_rates"])
+                if table is not self._table:
+                    self._exact = {}
+                self._table = table
+                self._payload = payload
+            return payload, self._table
+
+    def _rates(self, exact: bool, rounding: str):
+        if not isinstance(rounding, str):
+            raise ServiceError('"rounding" must be a string.')
+        payload, table = self.snapshot()
+        if not exact:
+            return payload, table
+        with self._lock:
+            rates = self._exact.get(rounding) if payload is self._payload else None
+            if rates is None:
+                rates = ExactRates(table, rounding)
+                if payload is self._payload:
+                    self._exact[rounding] = rates
+        return payload, rates
+
+    def convert(self, amount, from_currency: str, to_currency: str, exact: bool = False,
+                rounding: str = "half-even") -> Dict:
+        """
+        Converts one amount and returns the JSON response body.
+
+        Raises:
+            ServiceError: If the amount, a currency or the rounding mode is invalid, or no rates are available.
+        """
+        try:
+            payload, rates = self._rates(exact, rounding)
+        except MoneyError as e:
+            raise ServiceError(str(e)) from e
+        metrics.CONVERSIONS.inc()
+        result = _convert_row(rates, amount, from_currency, to_currency, exact)
+        if result["error"] is not None:
+            raise ServiceError(result["error"])
+        del result["error"]
+        result["time_last_update_unix"] = payload.get("time_last_update_unix")
+        return result
+
+    def convert_batch(self, conversions: List, exact: bool = False, rounding: str = "half-even") -> Dict:
+        """
+        Converts every row of a batch against one snapshot and returns the JSON response body.
+
+        Rows may be [amount, from, to] lists or {"amount", "from", "to"} objects.
+
+        Raises:
+            ServiceError: If `conversions` is not a list, the rounding mode is invalid or no rates are available.
+        """
+        if not isinstance(conversions, list):
+            raise ServiceError('"conversions" must be a list.')
+        started = time.perf_counter()
+        try:
+            payload, rates = self._rates(exact, rounding)
+        except MoneyError as e:
+            raise ServiceError(str(e)) from e
+        results = []
+        for row in conversions:
+            if isinstance(row, dict):
+                row = (row.get("amount"), row.get("from"), row.get("to"))
+            if not isinstance(row, (list, tuple)) or len(row) != 3:
+                results.append({"error": "Expected [amount, from, to] or an object with those keys."})
+                continue
+            results.append(_convert_row(rates, *row, exact))
+        metrics.record_batch(len(results), sum(result["error"] is not None for result in results),
+                             time.perf_counter() - started)
+        return {"results": results, "time_last_update_unix": payload.get("time_last_update_unix")}
+
+    def health(self) -> Dict:
+        """Returns the service status, the snapshot in use and the rate cache counters."""
+        payload = self._payload
+        return {
+            "status": "ok" if payload is not None else "starting",
+            "base_code": self.base_currency,
+            "time_last_update_unix": payload.get("time_last_update_unix") if payload else None,
+            "cache": self.client.cache.stats(),
+        }
+
+    def start(self) -> None:
+        """Loads the first snapshot and starts the background refresher."""
+        self.snapshot()
+        self._stop.clear()
+        self._refresher = threading.Thread(target=self._refresh_loop, name="rate-service-refresh", daemon=True)
+        self._refresher.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._refresher is not None:
+            self._refresher.join()
+            self._refresher = None
+
+    def _refresh_loop(self) -> None:
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                self.snapshot()
+            except ServiceError as e:
+                print(f"Warning: {e}", file=sys.stderr)
+
+
+def _convert_row(rates, amount, from_currency, to_currency, exact: bool) -> Dict:
+    # The snapshot was validated when it was fetched, so an unknown currency is the only
+    # KeyError and no per-row membership test is needed.
+    result = {"amount": amount, "from": from_currency, "to": to_currency, "converted_amount": None, "error": None}
+    if isinstance(amount, float) and not math.isfinite(amount):
+        # JSON has no inf or nan; echo them as text so the error response can still be written.
+        result["amount"] = str(amount)
+    if not isinstance(from_currency, str) or not isinstance(to_currency, str):
+        result["error"] = '"from" and "to" must be currency codes.'
+    elif not exact and (not isinstance(amount, (int, float)) or isinstance(amount, bool)):
+        result["error"] = f"Invalid amount: {amount!r}"
+    elif not exact and not math.isfinite(amount):
+        result["error"] = f"Amount must be finite, got {amount!r}."
+    else:
+        try:
+            converted_amount = rates.convert(amount, from_currency, to_currency)
+            if not exact and not math.isfinite(converted_amount):
+                raise MoneyError(f"{amount!r} {from_currency} is too large to convert to {to_currency}.")
+            result["converted_amount"] = str(converted_amount) if exact else converted_amount
+        except KeyError:
+            result["error"] = f"One or both currencies ({from_currency}, {to_currency}) not found."
+        except MoneyError as e:
+            result["error"] = str(e)
+    return result
+
+
+def _flag(value) -> bool:
+    if isinstance(value, str):
+        return value.lower() in ("1", "true", "yes")
+    return bool(value)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, so clients reuse their connection.
+    # Headers and body are separate writes; with Nagle on, the body waits for a delayed ACK (~40 ms).
+    disable_nagle_algorithm = True
+    server_version = "CurrencyConverter"
+    service: RateService = None
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/health":
+            return self._respond(200, self.service.health())
+        if url.path == "/metrics":
+            return self._respond_text(200, metrics.REGISTRY.to_prometheus(), "text/plain; version=0.0.4")
+        if url.path != "/convert":
+            return self._respond(404, {"error": f"Unknown endpoint {url.path}"})
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        exact = _flag(query.get("exact", ""))
+        amount = query.get("amount")
+        if not exact:
+            try:
+                amount = float(amount)
+            except (TypeError, ValueError):
+                return self._respond(400, {"error": f"Invalid amount: {amount!r}"})
+        self._handle(self.service.convert, amount, query.get("from"), query.get("to"), exact,
+                     query.get("rounding", "half-even"))
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path not in ("/convert", "/batch"):
+            return self._respond(404, {"error": f"Unknown endpoint {url.path}"})
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            # read(-1) would wait for the client to close the connection.
+            self.close_connection = True
+            return self._respond(400, {"error": "Invalid Content-Length."})
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            return self._respond(413, {"error": "Request body too large."})
+        try:
+            body = json.loads(self.rfile.read(length) or b"null")
+        except ValueError as e:
+            return self._respond(400, {"error": f"Invalid JSON: {e}"})
+        if not isinstance(body, dict):
+            return self._respond(400, {"error": "Expected a JSON object."})
+        exact = _flag(body.get("exact", False))
+        rounding = body.get("rounding", "half-even")
+        if url.path == "/convert":
+            self._handle(self.service.convert, body.get("amount"), body.get("from"), body.get("to"), exact, rounding)
+        else:
+            self._handle(self.service.convert_batch, body.get("conversions"), exact, rounding)
+
+    def _handle(self, method, *args):
+        try:
+            self._respond(200, method(*args))
+        except ServiceError as e:
+            self._respond(e.status, {"error": str(e)})
+
+    def _respond(self, status: int, body: Dict) -> None:
+        # allow_nan=False: Infinity and NaN are not JSON, and clients would fail to parse them.
+        self._respond_text(status, json.dumps(body, allow_nan=False), "application/json")
+
+    def _respond_text(self, status: int, text: str, content_type: str) -> None:
+        data = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass  # One line per request on stderr costs more than the conversion itself.
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # The default of 5 drops connections when many clients connect at once.
+
+
+def make_server(service: RateService, host: str = "127.0.0.1", port: int = DEFAULT_PORT) -> ThreadingHTTPServer:
+    """Returns a threaded HTTP server answering with `service`; port 0 picks a free port."""
+    handler = type("Handler", (_Handler,), {"service": service})
+    return _Server((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Currency conversion HTTP service")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port to listen on")
+    parser.add_argument("--api-key", default="YOUR_API_KEY", help="exchangerate-api.com API key")
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL, help="Upstream API root")
+    parser.add_argument("--base", default="USD", help="Base currency of the snapshot kept in memory")
+    parser.add_argument("--refresh-interval", type=float, default=DEFAULT_REFRESH_INTERVAL,
+                        help="Seconds between background rate checks")
+    metrics.add_arguments(parser)
+    args = parser.parse_args()
+    try:
+        metrics.configure(args.metrics, args.profile)
+    except ValueError as e:
+        parser.error(str(e))
+
+    service = RateService(ApiClient(args.api_key, args.base_url), args.base.upper(), args.refresh_interval)
+    try:
+        service.start()
+    except ServiceError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    httpd = make_server(service, args.host, args.port)
+    print(f"Serving conversions on http://{args.host}:{httpd.server_address[1]}/", file=sys.stderr)
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        service.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+A persistent on-disk store of exchange-rate snapshots.
+
+Each base currency is kept in its own small binary file so that the CLI can
+answer from disk without a network round trip.  The layout is:
+
+    header   magic b"RTSN", format version, base code, time_last_update_unix,
+             time_next_update_unix, number of currencies  (see _HEADER)
+    codes    three ASCII bytes per currency, padded to a multiple of 8 bytes
+    rates    one little-endian float64 per currency, in the same order
+
+Files are written to a temporary file and renamed into place, so readers never
+see a partial snapshot, and are read through mmap.  This module only uses the
+standard library, and only light modules of it, so that reading a snapshot stays
+cheap.
+"""
+
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from typing import Callable, Dict, Optional, Tuple
+
+MAGIC = b"RTSN"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<4sH3sxqqI")
+CACHE_DIR_ENV = "CURRENCY_CONVERTER_CACHE_DIR"
+
+
+class SnapshotStoreError(Exception):
+    """Raised when no usable snapshot is available."""
+    pass
+
+
+def default_directory() -> str:
+    """Returns the snapshot directory: $CURRENCY_CONVERTER_CACHE_DIR, else the user cache directory."""
+    directory = os.environ.get(CACHE_DIR_ENV)
+    if directory:
+        return directory
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "python-currency-converter-ksh")
+
+
+def format_utc(timestamp: int) -> str:
+    """Formats a Unix timestamp the way the API reports time_last_update_utc."""
+    return time.strftime("%a, %d %b %Y %H:%M:%S +0000", time.gmtime(timestamp))
+
+
+class Snapshot:
+    """
+    A read-only view of a stored rate table.
+
+    `rates` is backed by the memory-mapped file; call close() (or use the snapshot as a
+    context manager) to release it.
+    """
+
+    def __init__(self, base_currency: str, last_update: int, next_update: int,
+                 codes: Tuple[str, ...], rates, mapping=None):
+        self.base_currency = base_currency
+        self.last_update = last_update
+        self.next_update = next_update
+        self.codes = codes
+        self.rates = rates
+        self._mapping = mapping
+        self._index = None
+
+    def is_fresh(self, now: Optional[float] = None) -> bool:
+        """Returns True until the upstream API publishes its next update."""
+        return (time.time() if now is None else now) < self.next_update
+
+    def rate(self, currency: str) -> float:
+        """Returns the rate of a currency against the base currency."""
+        if self._index is None:
+            self._index = {code: i for i, code in enumerate(self.codes)}
+        return self.rates[self._index[currency]]
+
+    def as_dict(self) -> Dict[str, float]:
+        """Returns the rates as a plain dictionary of currency code to rate."""
+        return dict(zip(self.codes, self.rates))
+
+    def to_payload(self) -> Dict:
+        """Returns the snapshot in the shape of an exchangerate-api.com v6 response."""
+        return {
+            "result": "success",
+            "base_code": self.base_currency,
+            "time_last_update_unix": self.last_update,
+            "time_last_update_utc": format_utc(self.last_update),
+            "time_next_update_unix": self.next_update,
+            "time_next_update_utc": format_utc(self.next_update),
+            "conversion_rates": self.as_dict(),
+        }
+
+    def close(self) -> None:
+        if self._mapping is not None:
+            if isinstance(self.rates, memoryview):
+                self.rates.release()
+            self._mapping.close()
+            self._mapping = None
+
+    def __enter__(self) -> "Snapshot":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class SnapshotStore:
+    """Reads and writes rate snapshots, one file per base currency, in a directory."""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or default_directory()
+
+    def path_for(self, base_currency: str) -> str:
+        return os.path.join(self.directory, f"rates-{base_currency}.bin")
+
+    def read(self, base_currency: str) -> Optional[Snapshot]:
+        """Returns the stored snapshot for a base currency, or None if there is no valid one."""
+        try:
+            with open(self.path_for(base_currency), "rb") as f:
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        try:
+            return self._decode(mapping)
+        except (struct.error, ValueError, UnicodeDecodeError):
+            mapping.close()
+            return None
+
+    def write(self, payload: Dict) -> bool:
+        """
+        Stores a v6 payload atomically.
+
+        Returns:
+            True if the file was written, False if a snapshot with the same upstream
+            timestamp is already stored.
+
+        Raises:
+            ValueError: If the payload contains a currency code that is not three ASCII letters.
+            OSError: If the directory or file cannot be written.
+        """
+        base_currency = payload["base_code"]
+        last_update = int(payload.get("time_last_update_unix", 0))
+        current = self.read(base_currency)
+        if current is not None:
+            with current:
+                if current.last_update == last_update:
+                    return False
+
+        import tempfile  # Only writers need it; reading a snapshot is the CLI's start-up path.
+
+        data = encode_snapshot(payload)
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=f".rates-{base_currency}.", dir=self.directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self.path_for(base_currency))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return True
+
+    @staticmethod
+    def _decode(mapping) -> Snapshot:
+        magic, version, base, last_update, next_update, count = _HEADER.unpack_from(mapping, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError("Not a rate snapshot file.")
+        codes_size = _padded(3 * count)
+        rates_offset = _HEADER.size + codes_size
+        if len(mapping) != rates_offset + 8 * count:
+            raise ValueError("Truncated rate snapshot file.")
+        raw_codes = mapping[_HEADER.size:_HEADER.size + 3 * count].decode("ascii")
+        codes = tuple(raw_codes[i:i + 3] for i in range(0, len(raw_codes), 3))
+        if sys.byteorder == "little":
+            rates = memoryview(mapping)[rates_offset:].cast("d")
+        else:
+            rates = array("d", mapping[rates_offset:])
+            rates.byteswap()
+            mapping.close()
+            mapping = None
+        return Snapshot(base.decode("ascii"), last_update, next_update, codes, rates, mapping)
+
+
+def _padded(size: int) -> int:
+    return (size + 7) & ~7
+
+
+def encode_snapshot(payload: Dict) -> bytes:
+    """Encodes a v6 payload into the snapshot file layout."""
+    rates = payload["conversion_rates"]
+    codes = list(rates)
+    for code in codes + [payload["base_code"]]:
+        if len(code) != 3 or not code.isascii() or not code.isalpha():
+            raise ValueError(f"Invalid currency code: {code!r}")
+    values = array("d", (float(rates[code]) for code in codes))
+    if sys.byteorder != "little":
+        values.byteswap()
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, payload["base_code"].encode("ascii"),
+                          int(payload.get("time_last_update_unix", 0)),
+                          int(payload.get("time_next_update_unix", 0)), len(codes))
+    raw_codes = "".join(codes).encode("ascii")
+    return header + raw_codes.ljust(_padded(len(raw_codes)), b"\0") + values.tobytes()
+
+
+def load_rates_payload(base_currency: str, fetch: Callable[[str], Dict], store: Optional[SnapshotStore] = None,
+                       refresh: bool = False, offline: bool = False) -> Dict:
+    """
+    Returns a v6 rates payload, preferring the on-disk snapshot over the network.
+
+    A fresh snapshot is used as is.  Otherwise the payload is fetched with `fetch` and written
+    back to the store; if that fetch fails, a stale snapshot is used instead (with a warning
+    on stderr).
+
+    Args:
+        base_currency: The base currency of the table.
+        fetch: Called as fetch(base_currency) to get a payload from the API.
+        store: The snapshot store.  Defaults to SnapshotStore() in the default directory.
+        refresh: Always fetch from the network, ignoring the stored snapshot.
+        offline: Never touch the network; use the stored snapshot even if it is stale.
+
+    Raises:
+        SnapshotStoreError: In offline mode, if no snapshot is stored for the base currency.
+        Whatever `fetch` raises when there is no snapshot to fall back on.
+    """
+    store = store or SnapshotStore()
+    snapshot = None if refresh else store.read(base_currency)
+    if snapshot is not None:
+        with snapshot:
+            if offline or snapshot.is_fresh():
+                return snapshot.to_payload()
+            stale = snapshot.to_payload()
+    elif offline:
+        raise SnapshotStoreError(f"No stored rates for {base_currency}; run once without --offline.")
+    else:
+        stale = None
+
+    try:
+        payload = fetch(base_currency)
+    except Exception as e:
+        if stale is None:
+            raise
+        print(f"Warning: {e}; using stored rates from {stale['time_last_update_utc']}", file=sys.stderr)
+        return stale
+
+    try:
+        store.write(payload)
+    except (OSError, ValueError) as e:
+        print(f"Warning: could not store rate snapshot: {e}", file=sys.stderr)
+    return payload
@@ -0,0 +1,189 @@
+"""
+Shared HTTP transport for talking to the exchange-rate API.
+
+All fetchers go through a Transport, which keeps a pooled keep-alive
+`requests.Session`, applies connect/read timeouts, retries 429 and 5xx answers
+(and connection failures) with exponential backoff and full jitter, honours
+`Retry-After`, and can pace requests with a client-side token bucket sized to
+the exchangerate-api.com plan quota.
+"""
+
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import HTTP_BYTES, HTTP_REQUESTS, HTTP_SECONDS, JSON_SECONDS
+from rate_payload import loads
+
+# Monthly request quotas of the exchangerate-api.com plans.
+PLAN_QUOTAS = {"free": 1500, "pro": 30000, "business": 125000, "volume": 1000000}
+PLAN_ENV = "EXCHANGE_RATE_API_PLAN"
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+SECONDS_PER_MONTH = 30 * 86400
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket.
+
+    Args:
+        rate: Tokens added per second.
+        capacity: Maximum number of tokens, i.e. the largest burst allowed.
+    """
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("Token bucket rate and capacity must be positive.")
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_plan(cls, plan: str, burst: float = 10) -> "TokenBucket":
+        """Returns a bucket that spreads a plan's monthly quota evenly, allowing short bursts."""
+        try:
+            quota = PLAN_QUOTAS[plan.lower()]
+        except KeyError:
+            raise ValueError(f"Unknown plan {plan!r}; expected one of {', '.join(PLAN_QUOTAS)}.") from None
+        return cls(quota / SECONDS_PER_MONTH, burst)
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Takes tokens from the bucket, blocking until they are available.  Returns the time waited."""
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            self.sleep(wait)
+        return wait
+
+
+class Transport:
+    """
+    A pooled HTTP client with timeouts, retries and optional rate limiting.
+
+    Args:
+        pool_size: Maximum number of keep-alive connections kept per host.
+        connect_timeout: Seconds to wait for a connection to be established.
+        read_timeout: Seconds to wait between bytes of the response.
+        max_retries: How many times a failed request is retried.
+        backoff_base: Upper bound of the first retry delay; it doubles on every retry.
+        backoff_max: Upper bound of any retry delay, including one requested by Retry-After.
+        rate_limiter: A TokenBucket every request (including retries) must take a token from.
+    """
+
+    def __init__(self, pool_size: int = 10, connect_timeout: float = 3.05, read_timeout: float = 10.0,
+                 max_retries: int = 3, backoff_base: float = 0.5, backoff_max: float = 30.0,
+                 rate_limiter: Optional[TokenBucket] = None, sleep: Callable[[float], None] = time.sleep):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.rate_limiter = rate_limiter
+        self.sleep = sleep
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get(self, url: str, headers: Optional[Dict] = None, params: Optional[Dict] = None) -> requests.Response:
+        """
+        Sends a GET request, retrying transient failures.
+
+        Returns:
+            The final response.  A 429 or 5xx response is returned once the retries are used up,
+            so callers should still call raise_for_status().
+
+        Raises:
+            requests.exceptions.RequestException: If the last attempt failed to connect or timed out.
+        """
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, headers=headers, params=params, timeout=self.timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                HTTP_SECONDS.observe(time.perf_counter() - start)
+                HTTP_REQUESTS.inc(status="error")
+                if attempt >= self.max_retries:
+                    raise
+                self.sleep(self._backoff(attempt))
+            else:
+                HTTP_SECONDS.observe(time.perf_counter() - start)
+                HTTP_REQUESTS.inc(status=str(response.status_code))
+                HTTP_BYTES.inc(len(response.content))
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    return response
+                delay = self._retry_after(response)
+                response.close()
+                self.sleep(delay if delay is not None else self._backoff(attempt))
+            attempt += 1
+
+    def close(self) -> None:
+        self.session.close()
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _retry_after(self, response: requests.Response) -> Optional[float]:
+        return parse_retry_after(response.headers.get("Retry-After"), self.backoff_max)
+
+
+def decode_json(response: requests.Response):
+    """
+    Returns the decoded JSON body of a response, recording the decode time in metrics.JSON_SECONDS.
+
+    The body bytes are decoded directly (see rate_payload.loads) rather than through
+    response.json(), which may first run charset detection over the whole body.
+    """
+    with JSON_SECONDS.time():
+        return loads(response.content)
+
+
+def parse_retry_after(value: Optional[str], limit: float) -> Optional[float]:
+    """Returns the delay a Retry-After header asks for (seconds or an HTTP date), capped at `limit`."""
+    if value is None:
+        return None
+    try:
+        delay = float(value)
+    except ValueError:
+        try:
+            delay = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(limit, max(0.0, delay))
+
+
+_default_transport = None
+_default_lock = threading.Lock()
+
+
+def default_transport() -> Transport:
+    """
+    Returns the process-wide Transport shared by all fetchers.
+
+    When $EXCHANGE_RATE_API_PLAN names a plan (free, pro, business or volume) its quota is
+    enforced with a token bucket.
+    """
+    global _default_transport
+    if _default_transport is None:
+        with _default_lock:
+            if _default_transport is None:
+                plan = os.environ.get(PLAN_ENV)
+                _default_transport = Transport(rate_limiter=TokenBucket.for_plan(plan) if plan else None)
+    return _default_transport
@@ -1,4 +1,3 @@
-```python
 """
 Utilities for the Python currency converter.
 
@@ -6,39 +5,62 @@ This module provides helper functions for fetching exchange rates,
 performing conversions, and handling errors.
 """
 
-import requests
-import json
+import time
+from decimal import Decimal
 from typing import Dict, List, Tuple
 
+# requests, NumPy (batch_engine) and money are imported by the functions that use them, so
+# importing this module for a lookup in an already fetched table stays cheap.
+import metrics
+from rate_cache import RateCache
+from rate_fetch import describe_fetch_error, fetch_errors, fetch_latest
+from rate_table import RateTable
+
 API_KEY = "YOUR_API_KEY_HERE"  # Replace with your actual API key from exchangerate-api.com
 BASE_URL = "https://v6.exchangerate-api.com/v6/"
+# Below this many rows batch_convert converts row by row.  The engine overtakes the loop at a few
+# hundred rows, but its first use imports NumPy (~0.1 s), so it is only worth it for batches where
+# it saves milliseconds per call (see benchmarks/bench_vector.py).
+VECTOR_MIN_ROWS = 10_000
+
+
+def _request_rates(base_currency: str) -> Dict:
+    """Fetches the full latest-rates payload for a base currency, bypassing the cache."""
+    return fetch_latest(f"{BASE_URL}{API_KEY}/latest/{base_currency}")
+
+
+# Shared by every caller of fetch_exchange_rates; inspect rate_cache.stats() for the hit ratio.
+rate_cache = RateCache(_request_rates)
+
+
+def _convert_rows():
+    """Returns batch_engine.convert_rows, or None when NumPy is not installed."""
+    try:
+        from batch_engine import convert_rows
+    except ImportError:  # NumPy is not installed; batch_convert falls back to converting row by row.
+        return None
+    return convert_rows
 
 
 def fetch_exchange_rates(base_currency: str = "USD") -> Dict:
     """
     Fetches exchange rates from the exchangerate-api.com API.
 
+    Tables are cached per base currency until the API publishes its next update.
+
     Args:
         base_currency: The base currency for the exchange rates. Defaults to USD.
 
     Returns:
         A dictionary containing the exchange rates, or None if an error occurred.
     """
-    url = f"{BASE_URL}{API_KEY}/latest/{base_currency}"
     try:
-        response = requests.get(url)
-        response.raise_for_status()  # Raise HTTPError for bad responses (4xx or 5xx)
-        data = response.json()
-        if data["result"] == "success":
-            return data["conversion_rates"]
-        else:
-            print(f"API Error: {data.get('error-type', 'Unknown error')}")
-            return None
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching exchange rates: {e}")
+        return rate_cache.get(base_currency)["conversion_rates"]
+    except fetch_errors() as e:
+        print(describe_fetch_error(e))
         return None
-    except json.JSONDecodeError as e:
-        print(f"Error decoding JSON response: {e}")
+    except ValueError as e:
+        print(e)
         return None
 
 
@@ -50,42 +72,91 @@ def convert_currency(amount: float, from_currency: str, to_currency: str, rates:
         amount: The amount to convert.
         from_currency: The currency to convert from.
         to_currency: The currency to convert to.
-        rates: A dictionary of exchange rates.
+        rates: A dictionary of exchange rates, or a RateTable.
 
     Returns:
         The converted amount, or None if an error occurred.
     """
+    metrics.CONVERSIONS.inc()
+    return _convert(amount, from_currency, to_currency, rates)
+
+
+def _convert(amount: float, from_currency: str, to_currency: str, rates: Dict) -> float:
     try:
         if from_currency not in rates or to_currency not in rates:
             raise ValueError("Invalid currency code.")
+        if isinstance(rates, RateTable):
+            return rates.convert(amount, from_currency, to_currency)
         return amount * (rates[to_currency] / rates[from_currency])
     except (KeyError, ValueError) as e:
         print(f"Conversion error: {e}")
         return None
 
 
-def batch_convert(amounts: List[Tuple[float, str, str]], rates: Dict) -> List[Tuple[float, str, str, float]]:
+def batch_convert(amounts: List[Tuple[float, str, str]], rates: Dict, exact: bool = False,
+                  rounding: str = "half-even") -> List[Tuple[float, str, str, float]]:
     """
     Performs batch currency conversions.
 
+    Rows that cannot be converted are left out of the result.  Batches of VECTOR_MIN_ROWS rows
+    or more go through batch_engine.convert_rows when NumPy is installed; smaller ones are
+    converted row by row.  For large batches already held as columns, call convert_arrays
+    directly to get the converted amounts as an array together with an error mask.
+
     Args:
         amounts: A list of tuples, each containing (amount, from_currency, to_currency).
         rates: A dictionary of exchange rates.
+        exact: Convert in integer minor units (see money.py) and return Decimal amounts rounded
+               to the target currency's minor unit instead of floats.
+        rounding: How exact results are rounded: 'half-even' (banker's) or 'half-up'.
 
     Returns:
         A list of tuples, each containing (amount, from_currency, to_currency, converted_amount).
     """
-    results = []
-    for amount, from_currency, to_currency in amounts:
-        converted_amount = convert_currency(amount, from_currency, to_currency, rates)
-        if converted_amount is not None:
-            results.append((amount, from_currency, to_currency, converted_amount))
+    started = time.perf_counter()
+    results = _batch_convert(amounts, rates, exact, rounding)
+    metrics.record_batch(len(amounts), len(amounts) - len(results), time.perf_counter() - started)
     return results
 
 
+def _batch_convert(amounts, rates, exact, rounding):
+    if exact:
+        from money import ExactRates, MoneyError
+
+        exact_rates = ExactRates(rates, rounding)
+        results = []
+        for amount, from_currency, to_currency in amounts:
+            try:
+                results.append((amount, from_currency, to_currency,
+                                exact_rates.convert(amount, from_currency, to_currency)))
+            except MoneyError as e:
+                print(f"Conversion error: {e}")
+        return results
+
+    convert_rows = _convert_rows() if len(amounts) >= VECTOR_MIN_ROWS else None
+    if convert_rows is None:
+        results = []
+        for amount, from_currency, to_currency in amounts:
+            converted_amount = _convert(amount, from_currency, to_currency, rates)
+            if converted_amount is not None:
+                results.append((amount, from_currency, to_currency, converted_amount))
+        return results
+
+    converted, errors = convert_rows(amounts, rates)
+    if errors.any():
+        print(f"Conversion error: skipped {int(errors.sum())} of {len(amounts)} rows that could not be converted.")
+    return [(amount, from_currency, to_currency, converted_amount)
+            for (amount, from_currency, to_currency), converted_amount, failed
+            in zip(amounts, converted.tolist(), errors.tolist()) if not failed]
+
+
 def format_result(result: Tuple[float, str, str, float]) -> str:
-    """Formats a single conversion result for printing."""
+    """Formats a single conversion result for printing.  Exact (Decimal) results keep their minor-unit digits."""
     amount, from_currency, to_currency, converted_amount = result
+    if isinstance(converted_amount, Decimal):
+        from money import to_decimal
+
+        return f"{to_decimal(amount)} {from_currency} = {converted_amount} {to_currency}"
     return f"{amount:.2f} {from_currency} = {converted_amount:.2f} {to_currency}"
 
 
@@ -97,7 +168,3 @@ if __name__ == "__main__":
         batch_results = batch_convert([(100, "KES", "USD"), (50, "USD", "KES"), (200, "EUR", "KES")], rates)
         for result in batch_results:
             print(format_result(result))
-
-```
-
-Remember to replace `"YOUR_API_KEY_HERE"` with a valid API key from exchangerate-api.com.  This `utils.py` file provides the core functionality for currency conversion.  You would then build a CLI or GUI on top of these functions.  Error handling is included for API requests, JSON decoding, and invalid currency codes.  The batch conversion function efficiently handles multiple conversions.  The `format_result` function improves output readability.  The example usage at the end demonstrates how to utilize the functions.
@@ -0,0 +1,4 @@
+# test_api_client.py and test_converter.py are markdown write-ups around tests for modules this
+# tree does not have (python_currency_converter_ksh.api_client.APIError, converter.CurrencyConverter),
+# so they cannot be collected; ApiClient and the converters are covered by the other test modules.
+collect_ignore = ["test_api_client.py", "test_converter.py"]
@@ -0,0 +1,153 @@
+import asyncio
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from async_api_client import AsyncApiClient
+
+
+RATES = {"USD": 1.0, "KES": 129.0, "EUR": 0.9}
+
+
+class FakeApi:
+    """
+    A local v6 endpoint that answers after `delay` seconds and records how requests overlapped.
+
+    `bodies` maps a base currency to a raw response body to send instead of its table.
+    """
+
+    def __init__(self, delay=0.0, failures=0, bodies=None):
+        self.delay = delay
+        self.failures = failures
+        self.bodies = bodies or {}
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                base = self.path.rsplit("/", 1)[-1]
+                with api._lock:
+                    api.requests.append(base)
+                    api.in_flight += 1
+                    api.max_in_flight = max(api.max_in_flight, api.in_flight)
+                    failing = api.failures > 0
+                    api.failures -= failing
+                time.sleep(api.delay)
+                with api._lock:
+                    api.in_flight -= 1
+                if failing:
+                    status, body = 503, b""
+                elif base in api.bodies:
+                    status, body = 200, api.bodies[base]
+                elif base in RATES:
+                    status = 200
+                    rates = {code: rate / RATES[base] for code, rate in RATES.items()}
+                    body = json.dumps({"result": "success", "base_code": base, "conversion_rates": rates}).encode()
+                else:
+                    status = 200
+                    body = json.dumps({"result": "error", "error-type": "unsupported-code"}).encode()
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        threading.Thread(target=self.httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+        self.base_url = "http://127.0.0.1:%d/v6/" % self.httpd.server_address[1]
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class TestAsyncApiClient(unittest.IsolatedAsyncioTestCase):
+
+    def serve(self, **kwargs):
+        api = FakeApi(**kwargs)
+        self.addCleanup(api.close)
+        return api
+
+    async def make_client(self, api, **kwargs):
+        client = AsyncApiClient("TEST", base_url=api.base_url, backoff_base=0.01, **kwargs)
+        self.addAsyncCleanup(client.close)
+        return client
+
+    async def test_concurrent_requests_for_one_base_share_a_fetch(self):
+        api = self.serve(delay=0.05)
+        client = await self.make_client(api)
+
+        tables = await asyncio.gather(*(client.get_latest_rates("KES") for _ in range(20)))
+
+        self.assertEqual(api.requests, ["KES"])
+        self.assertTrue(all(table is tables[0] for table in tables))
+        await client.get_latest_rates("KES")
+        self.assertEqual(len(api.requests), 1)
+
+    async def test_fetches_bases_concurrently_within_the_limit(self):
+        api = self.serve(delay=0.1)
+        client = await self.make_client(api, max_concurrency=2)
+
+        start = time.perf_counter()
+        tables = await client.get_many_rates(["USD", "KES", "EUR", "USD"])
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(sorted(api.requests), ["EUR", "KES", "USD"])
+        self.assertEqual(api.max_in_flight, 2)
+        self.assertLess(elapsed, 0.28)
+        self.assertAlmostEqual(tables["KES"]["USD"], 1 / 129.0)
+
+    async def test_retries_transient_errors(self):
+        api = self.serve(failures=2)
+        client = await self.make_client(api)
+
+        rates = await client.get_latest_rates("USD")
+
+        self.assertEqual(rates, RATES)
+        self.assertEqual(len(api.requests), 3)
+
+    async def test_failed_fetch_returns_empty_rates(self):
+        api = self.serve()
+        client = await self.make_client(api)
+
+        self.assertEqual(await client.get_latest_rates("XXX"), {})
+        self.assertEqual(await client.convert_currency(1, "USD", "KES", rates={}), 0)
+
+    async def test_malformed_bodies_return_empty_rates(self):
+        api = self.serve(bodies={"ARR": b"[1, 2]", "ERR": b'{"error": "bad"}', "BAD": b"not json"})
+        client = await self.make_client(api)
+
+        for base in ("ARR", "ERR", "BAD"):
+            self.assertEqual(await client.get_latest_rates(base), {})
+
+    async def test_convert_currency(self):
+        api = self.serve()
+        client = await self.make_client(api)
+
+        self.assertAlmostEqual(await client.convert_currency(100, "USD", "KES"), 12900.0)
+
+    async def test_convert_batch_per_base(self):
+        api = self.serve()
+        client = await self.make_client(api)
+
+        results = await client.convert_batch([(100, "USD", "KES"), (5, "EUR", "USD"), (1, "XXX", "KES")],
+                                             per_base=True)
+
+        self.assertEqual(sorted(api.requests), ["EUR", "USD", "XXX"])
+        self.assertAlmostEqual(results[0].converted_amount, 12900.0)
+        self.assertAlmostEqual(results[1].converted_amount, 5 / 0.9)
+        self.assertFalse(results[2].ok)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+from decimal import Decimal
+from unittest.mock import patch
+
+from api_client import ApiClient, ConversionResult
+from rate_table import RateTable
+
+
+RATES = {"USD": 1.0, "KES": 129.0, "EUR": 0.9}
+
+
+def fake_response(endpoint, params=None):
+    base = endpoint.rsplit("/", 1)[-1]
+    pivot = RATES[base]
+    return {"result": "success", "base_code": base,
+            "conversion_rates": {code: rate / pivot for code, rate in RATES.items()}}
+
+
+class TestConvertBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.client = ApiClient("TEST")
+
+    @patch.object(ApiClient, "_make_request", side_effect=fake_response)
+    def test_fetches_rates_once_for_whole_batch(self, mock_request):
+        rows = [(100, "USD", "KES"), (50, "EUR", "KES"), (1000, "KES", "EUR")] * 100
+        results = self.client.convert_batch(rows)
+
+        self.assertEqual(mock_request.call_count, 1)
+        self.assertEqual(len(results), len(rows))
+        self.assertAlmostEqual(results[0].converted_amount, 12900.0, places=6)
+        self.assertAlmostEqual(results[1].converted_amount, 50 * 129.0 / 0.9, places=6)
+
+    @patch.object(ApiClient, "_make_request", side_effect=fake_response)
+    def test_rate_table_is_built_once_per_snapshot(self, mock_request):
+        rows = [(100, "USD", "KES"), (50, "EUR", "KES")]
+        with patch.object(RateTable, "from_rates", wraps=RateTable.from_rates) as from_rates:
+            self.client.convert_batch(rows)
+            self.client.convert_batch(rows)
+            self.assertEqual(from_rates.call_count, 1)
+
+            moved = fake_response("latest/USD")
+            moved["conversion_rates"]["KES"] = 130.0
+            mock_request.side_effect = lambda endpoint, params=None: moved
+            self.client.cache.invalidate()
+            results = self.client.convert_batch(rows)
+            self.assertEqual(from_rates.call_count, 1)  # Patched with RateTable.updated instead.
+
+        self.assertAlmostEqual(results[0].converted_amount, 13000.0)
+        self.assertAlmostEqual(results[1].converted_amount, 50 * 130.0 / 0.9)
+
+    @patch.object(ApiClient, "_make_request", side_effect=fake_response)
+    def test_per_base_fetches_once_per_source_currency(self, mock_request):
+        rows = [(100, "USD", "KES"), (50, "EUR", "KES"), (10, "USD", "EUR"), (5, "EUR", "USD")]
+        results = self.client.convert_batch(rows, per_base=True)
+
+        self.assertEqual(mock_request.call_count, 2)
+        self.assertAlmostEqual(results[3].converted_amount, 5 / 0.9, places=6)
+
+    @patch.object(ApiClient, "_make_request", side_effect=fake_response)
+    def test_row_errors_are_reported_in_place(self, mock_request):
+        results = self.client.convert_batch([(100, "USD", "KES"), (1, "XXX", "KES")])
+
+        self.assertTrue(results[0].ok)
+        self.assertEqual(results[1], ConversionResult(1, "XXX", "KES", None, results[1].error))
+        self.assertIn("XXX", results[1].error)
+
+    @patch.object(ApiClient, "_make_request", return_value={"result": "error", "message": "quota-reached"})
+    def test_failed_fetch_marks_every_row(self, mock_request):
+        results = self.client.convert_batch([(100, "USD", "KES"), (1, "EUR", "KES")])
+
+        self.assertEqual([r.converted_amount for r in results], [None, None])
+        self.assertTrue(all("unavailable" in r.error for r in results))
+
+    @patch.object(ApiClient, "_make_request", side_effect=fake_response)
+    def test_exact_mode_returns_rounded_decimals(self, mock_request):
+        results = self.client.convert_batch([(100, "EUR", "KES"), (1, "XXX", "KES")], exact=True)
+
+        self.assertEqual(results[0].converted_amount, Decimal("14333.33"))
+        self.assertFalse(results[1].ok)
+
+    @patch.object(ApiClient, "_make_request", side_effect=fake_response)
+    def test_convert_currency_reuses_given_rates(self, mock_request):
+        result = self.client.convert_currency(100, "USD", "KES", rates=RATES)
+
+        self.assertAlmostEqual(result, 12900.0)
+        mock_request.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+import utils
+from batch_engine import convert_arrays, convert_rows, intern_codes, rate_vector
+
+
+RATES = {"USD": 1.0, "KES": 129.0, "EUR": 0.9, "ZWL": 0.0}
+
+
+class TestInternCodes(unittest.TestCase):
+
+    def test_indices_point_into_table_codes(self):
+        table_codes = ("USD", "KES", "EUR")
+        indices = intern_codes(["KES", "USD", "KES", "EUR"], table_codes)
+
+        self.assertEqual(indices.tolist(), [1, 0, 1, 2])
+
+    def test_unknown_and_malformed_codes_get_minus_one(self):
+        indices = intern_codes(["XXX", "US", "USDX", "", "KES"], ("USD", "KES"))
+
+        self.assertEqual(indices.tolist(), [-1, -1, -1, -1, 1])
+
+
+class TestRateVector(unittest.TestCase):
+
+    def test_skips_non_numeric_entries_and_appends_nan(self):
+        codes, table = rate_vector({"USD": 1.0, "KES": 129.0, "timestamp": "Sat, 17 Oct 2026"})
+
+        self.assertEqual(codes, ("USD", "KES"))
+        self.assertEqual(table.dtype, np.float64)
+        self.assertTrue(np.isnan(table[-1]))
+
+
+class TestConvertArrays(unittest.TestCase):
+
+    def test_converts_every_row(self):
+        converted, errors = convert_arrays([100, 50, 1000], ["USD", "EUR", "KES"], ["KES", "KES", "EUR"], RATES)
+
+        np.testing.assert_allclose(converted, [12900.0, 50 * 129.0 / 0.9, 1000 * 0.9 / 129.0])
+        self.assertFalse(errors.any())
+
+    def test_marks_unknown_currencies_and_zero_rates(self):
+        converted, errors = convert_arrays([1, 2, 3, 4], ["USD", "XXX", "USD", "ZWL"], ["KES", "KES", "YYY", "USD"],
+                                           RATES)
+
+        self.assertEqual(errors.tolist(), [False, True, True, True])
+        self.assertTrue(np.isnan(converted[1:]).all())
+        self.assertAlmostEqual(converted[0], 129.0)
+
+    def test_accepts_numpy_columns(self):
+        amounts = np.full(1000, 2.0)
+        codes = np.array(["EUR", "KES"] * 500)
+        converted, errors = convert_arrays(amounts, codes, np.full(1000, "USD"), RATES)
+
+        np.testing.assert_allclose(converted[:2], [2 / 0.9, 2 / 129.0])
+        self.assertFalse(errors.any())
+
+    def test_empty_batch(self):
+        converted, errors = convert_arrays([], [], [], RATES)
+
+        self.assertEqual(converted.shape, (0,))
+        self.assertEqual(errors.shape, (0,))
+
+    def test_converts_rows_like_columns(self):
+        rows = [(1, "USD", "KES"), (2, "XXX", "KES"), (3, "USD", "YYY"), (4, "ZWL", "USD"), (50, "EUR", "KES")]
+        converted, errors = convert_rows(rows, RATES)
+        expected, expected_errors = convert_arrays(*zip(*rows), RATES)
+
+        np.testing.assert_array_equal(errors, expected_errors)
+        np.testing.assert_allclose(converted[~errors], expected[~expected_errors])
+
+    def test_mismatched_lengths(self):
+        with self.assertRaises(ValueError):
+            convert_arrays([1, 2], ["USD"], ["KES", "EUR"], RATES)
+
+
+class TestBatchConvert(unittest.TestCase):
+
+    ROWS = [(100, "USD", "KES"), (5, "EUR", "USD"), (1, "USD", "XXX")]
+
+    def test_small_batches_are_converted_row_by_row(self):
+        with patch.object(utils, "_convert_rows") as engine:
+            results = utils.batch_convert(self.ROWS, RATES)
+
+        engine.assert_not_called()
+        self.assertEqual([row[:3] for row in results], self.ROWS[:2])
+        self.assertAlmostEqual(results[0][3], 12900.0)
+
+    def test_large_batches_use_the_engine_with_the_same_results(self):
+        rows = self.ROWS * 4
+        expected = utils.batch_convert(rows, RATES)
+        with patch.object(utils, "VECTOR_MIN_ROWS", len(rows)), \
+                patch.object(utils, "_convert_rows", wraps=utils._convert_rows) as engine:
+            results = utils.batch_convert(rows, RATES)
+
+        engine.assert_called_once()
+        self.assertEqual([row[:3] for row in results], [row[:3] for row in expected])
+        for result, row in zip(results, expected):
+            self.assertAlmostEqual(result[3], row[3])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from decimal import Decimal
+
+import batch_stream
+from batch_stream import BatchRow, Progress, convert, format_chunks, read_records, run_batch, validate
+from money import ExactRates
+from rate_table import RateTable
+
+
+RATES = RateTable.from_rates({"USD": 1.0, "KES": 129.0, "EUR": 0.9})
+
+
+def pipeline(lines, fmt):
+    return list(convert(validate(read_records(lines, fmt)), RATES))
+
+
+class QuietProgress(Progress):
+
+    def __init__(self):
+        super().__init__(io.StringIO())
+
+
+class TestPipeline(unittest.TestCase):
+
+    def test_csv_with_header_in_any_column_order(self):
+        rows = pipeline(["to,amount,from\n", "KES,100,usd\n", "\n", "EUR, 10 ,KES\n"], "csv")
+
+        self.assertEqual([row.line for row in rows], [2, 4])
+        self.assertAlmostEqual(rows[0].converted_amount, 12900.0)
+        self.assertEqual(rows[1].from_currency, "KES")
+        self.assertAlmostEqual(rows[1].converted_amount, 10 * 0.9 / 129.0)
+
+    def test_csv_without_header(self):
+        rows = pipeline(["100,USD,KES\n"], "csv")
+
+        self.assertAlmostEqual(rows[0].converted_amount, 12900.0)
+
+    def test_ndjson(self):
+        lines = ['{"amount": 100, "from": "USD", "to": "KES"}\n', '{"amount": 5, "from_currency": "EUR", "to_currency": "USD"}\n']
+        rows = pipeline(lines, "ndjson")
+
+        self.assertAlmostEqual(rows[0].converted_amount, 12900.0)
+        self.assertAlmostEqual(rows[1].converted_amount, 5 / 0.9)
+
+    def test_invalid_rows_are_kept_with_an_error(self):
+        lines = ['{"amount": "ten", "from": "USD", "to": "KES"}\n', 'not json\n', '[1, 2]\n',
+                 '{"amount": 1, "from": "XXX", "to": "KES"}\n', '{"amount": 1, "to": "KES"}\n']
+        rows = pipeline(lines, "ndjson")
+
+        self.assertEqual(len(rows), 5)
+        self.assertTrue(all(row.converted_amount is None for row in rows))
+        self.assertIn("Invalid amount", rows[0].error)
+        self.assertIn("Invalid JSON", rows[1].error)
+        self.assertIn("JSON object", rows[2].error)
+        self.assertIn("XXX", rows[3].error)
+        self.assertIn("Missing currency", rows[4].error)
+
+    def test_exact_mode(self):
+        lines = ["100,USD,KES\n", "1,XXX,KES\n", "12345678901234567.89,USD,USD\n", "abc,USD,KES\n"]
+        rows = list(convert(validate(read_records(lines, "csv"), exact=True), ExactRates(RATES)))
+
+        self.assertEqual(rows[0].converted_amount, Decimal("12900.00"))
+        self.assertIn("XXX", rows[1].error)
+        self.assertEqual(rows[2].converted_amount, Decimal("12345678901234567.89"))  # No float in between.
+        self.assertIn("abc", rows[3].error)
+        self.assertEqual("".join(format_chunks(rows[:1], "ndjson")),
+                         '{"amount": "100", "from": "USD", "to": "KES", "converted_amount": "12900.00", '
+                         '"error": null}\n')
+
+    def test_exact_mode_keeps_ndjson_numbers_as_written(self):
+        lines = ['{"amount": 12345678901234567.89, "from": "USD", "to": "USD"}\n',
+                 '{"amount": 7, "from": "USD", "to": "KES"}\n',
+                 '{"amount": true, "from": "USD", "to": "KES"}\n']
+        rows = list(convert(validate(read_records(lines, "ndjson", exact=True), exact=True), ExactRates(RATES)))
+
+        self.assertEqual([row.converted_amount for row in rows],
+                         [Decimal("12345678901234567.89"), Decimal("903.00"), None])
+        self.assertIn("Invalid amount", rows[2].error)
+
+    def test_short_csv_row(self):
+        rows = pipeline(["100,USD\n"], "csv")
+
+        self.assertIn("fields", rows[0].error)
+
+    def test_header_without_required_columns(self):
+        with self.assertRaises(ValueError):
+            pipeline(["amount,currency\n"], "csv")
+
+    def test_detect_format(self):
+        self.assertEqual(batch_stream.detect_format("ledger.ndjson", ""), "ndjson")
+        self.assertEqual(batch_stream.detect_format("ledger.csv", "{"), "csv")
+        self.assertEqual(batch_stream.detect_format("-", '{"amount": 1}'), "ndjson")
+        self.assertEqual(batch_stream.detect_format("-", "1,USD,KES"), "csv")
+
+
+class TestOutput(unittest.TestCase):
+
+    def test_csv_output_quotes_errors(self):
+        rows = [BatchRow(1, 100.0, "USD", "KES", 12900.0), BatchRow(2, None, "", "", error="Expected 3 fields, got 2.")]
+        text = "".join(format_chunks(rows, "csv"))
+
+        self.assertEqual(text, "amount,from,to,converted_amount,error\n100.0,USD,KES,12900.0,\n"
+                               ',,,,"Expected 3 fields, got 2."\n')
+
+    def test_csv_output_has_header_for_empty_input(self):
+        self.assertEqual("".join(format_chunks([], "csv")), "amount,from,to,converted_amount,error\n")
+
+    def test_formats_whole_chunks(self):
+        rows = [BatchRow(i, 1.0, "USD", "KES", 129.0) for i in range(10)]
+        chunks = list(format_chunks(rows, "ndjson", chunk_size=4))
+
+        self.assertEqual([chunk.count("\n") for chunk in chunks], [4, 4, 2])
+        self.assertEqual(json.loads(chunks[2].splitlines()[-1])["converted_amount"], 129.0)
+
+
+class TestRunBatch(unittest.TestCase):
+
+    def test_converts_a_file_and_reports_progress(self):
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, "ledger.csv")
+            target = os.path.join(directory, "out.ndjson")
+            with open(source, "w") as f:
+                f.write("amount,from,to\n100,USD,KES\n1,XXX,KES\n")
+            progress = QuietProgress()
+
+            counts = run_batch(source, RATES, target, output_format="ndjson", progress=progress)
+
+            with open(target) as f:
+                records = [json.loads(line) for line in f]
+        self.assertEqual(counts, {"rows": 2, "errors": 1})
+        self.assertAlmostEqual(records[0]["converted_amount"], 12900.0)
+        self.assertIsNotNone(records[1]["error"])
+        self.assertIn("2 rows (1 errors)", progress.stream.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+import threading
+import unittest
+
+from api_client import ApiClient
+from conversion_memo import ConversionMemo
+from rate_cache import RateCache
+
+
+class TestConversionMemo(unittest.TestCase):
+
+    def setUp(self):
+        self.memo = ConversionMemo(maxsize=2)
+        self.snapshot = {"USD": 1.0, "KES": 129.0}
+        self.calls = 0
+
+    def compute(self, value=1.0):
+        def compute():
+            self.calls += 1
+            return value
+        return compute
+
+    def test_repeated_lookups_are_computed_once(self):
+        for _ in range(3):
+            self.assertEqual(self.memo.lookup(self.snapshot, (100, "USD", "KES"), self.compute(12900.0)), 12900.0)
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(self.memo.stats()["hits"], 2)
+        self.assertAlmostEqual(self.memo.stats()["hit_ratio"], 2 / 3)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        self.memo.lookup(self.snapshot, "a", self.compute())
+        self.memo.lookup(self.snapshot, "b", self.compute())
+        self.memo.lookup(self.snapshot, "a", self.compute())
+        self.memo.lookup(self.snapshot, "c", self.compute())  # Evicts "b".
+        self.memo.lookup(self.snapshot, "a", self.compute())
+        self.memo.lookup(self.snapshot, "b", self.compute())
+
+        self.assertEqual(self.calls, 4)
+        self.assertEqual(len(self.memo), 2)
+        self.assertEqual(self.memo.stats()["evictions"], 2)
+
+    def test_new_snapshot_invalidates_every_entry(self):
+        self.memo.lookup(self.snapshot, "a", self.compute(1.0))
+        newer = dict(self.snapshot)  # Equal contents, but a different snapshot.
+
+        self.assertEqual(self.memo.lookup(newer, "a", self.compute(2.0)), 2.0)
+        self.assertEqual(self.memo.stats()["invalidations"], 1)
+        self.assertEqual(self.memo.lookup(newer, "a", self.compute(3.0)), 2.0)
+
+    def test_errors_and_unhashable_keys_are_not_stored(self):
+        def fail():
+            raise ValueError("no rate")
+
+        with self.assertRaises(ValueError):
+            self.memo.lookup(self.snapshot, "a", fail)
+        self.assertEqual(self.memo.lookup(self.snapshot, ["a"], self.compute()), 1.0)
+        self.assertEqual(len(self.memo), 0)
+
+    def test_concurrent_lookups(self):
+        memo = ConversionMemo(maxsize=50)
+        errors = []
+
+        def work(offset):
+            for i in range(2000):
+                key = (i + offset) % 100
+                if memo.lookup(self.snapshot, key, lambda: key * 2) != key * 2:
+                    errors.append(key)
+
+        threads = [threading.Thread(target=work, args=(offset,)) for offset in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertLessEqual(len(memo), 50)
+        self.assertEqual(memo.stats()["hits"] + memo.stats()["misses"], 16000)
+
+    def test_carry_over_keeps_results_the_refresh_did_not_affect(self):
+        memo = ConversionMemo()
+        newer = dict(self.snapshot)
+        memo.lookup(self.snapshot, (1, "USD", "KES"), self.compute(129.0))
+        memo.lookup(self.snapshot, (1, "USD", "EUR"), self.compute(0.9))
+        memo.carry_over(self.snapshot, newer, lambda key: "KES" not in key)
+
+        memo.lookup(self.snapshot, (1, "USD", "EUR"), self.compute(0.9))  # Still on the old snapshot.
+        self.assertEqual(len(memo), 2)
+        self.assertEqual(memo.lookup(newer, (1, "USD", "EUR"), self.compute(0.95)), 0.9)
+        self.assertEqual(memo.lookup(newer, (1, "USD", "KES"), self.compute(130.0)), 130.0)
+        self.assertEqual(memo.stats()["carried_over"], 1)
+        self.assertEqual(memo.stats()["invalidations"], 0)
+
+        memo.lookup({}, (1, "USD", "EUR"), self.compute(0.9))  # No carry-over registered for this one.
+        self.assertEqual(memo.stats()["invalidations"], 1)
+
+    def test_maxsize_must_be_positive(self):
+        with self.assertRaises(ValueError):
+            ConversionMemo(0)
+
+
+class TestApiClientMemo(unittest.TestCase):
+
+    def setUp(self):
+        self.loads = 0
+        self.cache = RateCache(self.load, ttl=60)
+        self.client = ApiClient("TEST", cache=self.cache)
+
+    def load(self, base_currency):
+        self.loads += 1
+        return {"base_code": base_currency, "conversion_rates": {"USD": 1.0, "KES": 128.0 + self.loads}}
+
+    def test_fetched_conversions_are_memoized_per_snapshot(self):
+        self.assertEqual(self.client.convert_currency(1, "USD", "KES"), 129.0)
+        self.assertEqual(self.client.convert_currency(1, "USD", "KES"), 129.0)
+        self.assertEqual(self.client.memo.stats()["hits"], 1)
+        self.assertEqual((self.cache.stats()["misses"], self.cache.stats()["hits"]), (1, 1))  # Peek hits count.
+
+        self.cache.invalidate()
+        self.assertEqual(self.client.convert_currency(1, "USD", "KES"), 130.0)
+        self.assertEqual(self.client.memo.stats()["invalidations"], 1)
+
+    def test_explicit_rates_are_not_memoized(self):
+        rates = {"USD": 1.0, "KES": 100.0}
+        self.client.convert_currency(1, "USD", "KES", rates)
+        rates["KES"] = 200.0
+
+        self.assertEqual(self.client.convert_currency(1, "USD", "KES", rates), 200.0)
+        self.assertEqual(len(self.client.memo), 0)
+
+    def test_memo_can_be_disabled(self):
+        self.assertIsNone(ApiClient("TEST", cache=self.cache, memo_size=0).memo)
+
+
+if __name__ == '__main__':
+    unittest.main()
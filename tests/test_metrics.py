@@ -0,0 +1,118 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+
+import metrics
+from metrics import Registry
+from rate_cache import RateCache
+from transport import Transport
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+
+class TestRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = Registry()
+
+    def test_counters_and_gauges(self):
+        requests = self.registry.counter("requests_total", "Requests.")
+        requests.inc(status="200")
+        requests.inc(2, status="200")
+        requests.inc(status="503")
+        self.registry.gauge("rows_per_second", "Throughput.").set(1234.5)
+
+        self.assertEqual(requests.value(status="200"), 3)
+        self.assertIs(self.registry.counter("requests_total", "Requests."), requests)
+        with self.assertRaises(ValueError):
+            self.registry.gauge("requests_total", "Requests.")
+        self.assertEqual(self.registry.to_dict(), {"requests_total": {"status=200": 3, "status=503": 1},
+                                                   "rows_per_second": 1234.5})
+
+    def test_histogram_buckets_are_cumulative(self):
+        latency = self.registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            latency.observe(value)
+
+        self.assertEqual(self.registry.to_dict()["latency_seconds"],
+                         {"count": 4, "sum": 3.65, "buckets": {"0.1": 2, "1.0": 3, "+Inf": 4}})
+
+    def test_prometheus_text_format(self):
+        self.registry.counter("requests_total", "Requests.").inc(status='5"03')
+        self.registry.counter("idle_total", "Never incremented.")
+        with self.registry.histogram("latency_seconds", "Latency.", buckets=(1.0,)).time():
+            pass
+
+        text = self.registry.to_prometheus()
+        self.assertIn('# TYPE requests_total counter\nrequests_total{status="5\\"03"} 1\n', text)
+        self.assertIn("idle_total 0\n", text)
+        self.assertIn('latency_seconds_bucket{le="1.0"} 1\nlatency_seconds_bucket{le="+Inf"} 1\n', text)
+        self.assertIn("latency_seconds_count 1\n", text)
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def test_transport_records_latency_status_and_bytes(self):
+        transport = Transport(max_retries=0)
+        response = Mock(status_code=200, content=b"x" * 10)
+        before = (metrics.HTTP_REQUESTS.value(status="200"), metrics.HTTP_BYTES.value(), metrics.HTTP_SECONDS.count)
+        with patch.object(transport.session, "get", return_value=response):
+            transport.get("http://example.invalid/")
+
+        self.assertEqual(metrics.HTTP_REQUESTS.value(status="200"), before[0] + 1)
+        self.assertEqual(metrics.HTTP_BYTES.value(), before[1] + 10)
+        self.assertEqual(metrics.HTTP_SECONDS.count, before[2] + 1)
+
+    def test_rate_cache_records_hits_and_misses(self):
+        cache = RateCache(lambda base: {"conversion_rates": {}})
+        hits, misses = metrics.CACHE_LOOKUPS.value(result="hit"), metrics.CACHE_LOOKUPS.value(result="miss")
+        cache.get("USD")
+        cache.get("USD")
+
+        self.assertEqual(metrics.CACHE_LOOKUPS.value(result="miss"), misses + 1)
+        self.assertEqual(metrics.CACHE_LOOKUPS.value(result="hit"), hits + 1)
+
+    def test_record_batch(self):
+        ok, failed = metrics.ROWS_CONVERTED.value(outcome="ok"), metrics.ROWS_CONVERTED.value(outcome="error")
+        metrics.record_batch(100, 3, 0.5)
+
+        self.assertEqual(metrics.ROWS_CONVERTED.value(outcome="ok"), ok + 97)
+        self.assertEqual(metrics.ROWS_CONVERTED.value(outcome="error"), failed + 3)
+        self.assertEqual(metrics.ROWS_PER_SECOND.value(), 200)
+
+
+class TestExportAndProfiling(unittest.TestCase):
+
+    def run_python(self, code, **env):
+        return subprocess.run([sys.executable, "-c", code], env=dict(os.environ, PYTHONPATH=SRC, **env),
+                              capture_output=True, text=True, check=True)
+
+    def test_environment_switches(self):
+        process = self.run_python("import metrics; metrics.record_batch(10, 0, 1.0); sum(range(1000))",
+                                  CURRENCY_CONVERTER_METRICS="-", CURRENCY_CONVERTER_PROFILE="cpu,memory")
+
+        self.assertIn('currency_rows_converted_total{outcome="ok"} 10', process.stderr)
+        self.assertIn("CPU profile", process.stderr)
+        self.assertIn("Memory profile", process.stderr)
+
+    def test_json_export(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, "metrics.json")
+        self.run_python(f"import metrics; metrics.configure({path!r}); metrics.CONVERSIONS.inc()")
+
+        with open(path, encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["currency_conversions_total"], 1)
+
+    def test_unknown_profile_mode(self):
+        with self.assertRaises(ValueError):
+            metrics.start_profiling("disk")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import unittest
+from decimal import ROUND_CEILING, ROUND_DOWN, Decimal
+from fractions import Fraction
+
+from money import ExactRates, MoneyError, exponent, from_minor, rounding_mode, to_minor
+from rate_table import RateTable
+
+
+RATES = {"USD": 1.0, "KES": 128.95, "EUR": 0.9183, "JPY": 149.5, "BHD": 0.376}
+
+
+class TestMinorUnits(unittest.TestCase):
+
+    def test_iso_4217_exponents(self):
+        self.assertEqual([exponent(code) for code in ("KES", "JPY", "BHD", "UGX", "XYZ")], [2, 0, 3, 0, 2])
+
+    def test_to_and_from_minor(self):
+        self.assertEqual(to_minor("12.34", "KES"), 1234)
+        self.assertEqual(to_minor(0.1, "KES"), 10)
+        self.assertEqual(to_minor(5, "JPY"), 5)
+        self.assertEqual(to_minor(Decimal("-1.234"), "BHD"), -1234)
+        self.assertEqual(from_minor(1234, "KES"), Decimal("12.34"))
+        self.assertEqual(str(from_minor(1500, "JPY")), "1500")
+
+    def test_to_minor_rejects_extra_precision(self):
+        with self.assertRaises(MoneyError):
+            to_minor("1.005", "USD")
+        with self.assertRaises(MoneyError):
+            to_minor(float("nan"), "USD")
+        with self.assertRaises(MoneyError):
+            to_minor("1,5", "USD")
+
+    def test_rounding_mode_names(self):
+        self.assertEqual(rounding_mode("bankers"), rounding_mode("half-even"))
+        self.assertEqual(rounding_mode(ROUND_DOWN), ROUND_DOWN)
+        with self.assertRaises(MoneyError):
+            rounding_mode("nearest")
+
+
+class TestExactRates(unittest.TestCase):
+
+    def test_float_path_error_disappears(self):
+        rates = ExactRates(RATES)
+
+        self.assertEqual(100 * (RATES["KES"] / RATES["USD"]), 12894.999999999998)
+        self.assertEqual(rates.convert(100, "USD", "KES"), Decimal("12895.00"))
+
+    def test_results_use_the_target_minor_unit(self):
+        rates = ExactRates(RATES)
+
+        self.assertEqual(str(rates.convert(1000, "KES", "JPY")), "1159")
+        self.assertEqual(str(rates.convert(10, "EUR", "BHD")), "4.095")
+
+    def test_half_even_and_half_up(self):
+        rates = {"USD": 1.0, "EUR": 0.5}
+        self.assertEqual(ExactRates(rates).convert("0.05", "USD", "EUR"), Decimal("0.02"))
+        self.assertEqual(ExactRates(rates, "half-up").convert("0.05", "USD", "EUR"), Decimal("0.03"))
+        self.assertEqual(ExactRates(rates, "half-up").convert("-0.05", "USD", "EUR"), Decimal("-0.03"))
+        self.assertEqual(ExactRates(rates).convert("0.07", "USD", "EUR"), Decimal("0.04"))
+
+    def test_decimal_rounding_modes(self):
+        rates = {"USD": 1.0, "KES": 128.95}
+        self.assertEqual(ExactRates(rates, ROUND_DOWN).convert("0.01", "KES", "USD"), Decimal("0.00"))
+        self.assertEqual(ExactRates(rates, ROUND_CEILING).convert("0.01", "KES", "USD"), Decimal("0.01"))
+        self.assertEqual(ExactRates(rates, ROUND_CEILING).convert("-0.01", "KES", "USD"), Decimal("0.00"))
+
+    def test_matches_exact_rational_arithmetic(self):
+        rates = ExactRates(RATES, "half-up")
+        for amount in ("0.01", "1", "999999.99", "12345.67", "-42.5"):
+            for source in RATES:
+                for target in RATES:
+                    exact = Fraction(amount) * Fraction(repr(RATES[target])) / Fraction(repr(RATES[source]))
+                    scaled = exact * 10 ** exponent(target)
+                    expected = int(abs(scaled) + Fraction(1, 2)) * (1 if scaled >= 0 else -1)
+                    self.assertEqual(rates.convert(amount, source, target), from_minor(expected, target),
+                                     (amount, source, target))
+
+    def test_convert_minor(self):
+        self.assertEqual(ExactRates(RATES).convert_minor(10000, "USD", "KES"), 1289500)
+
+    def test_accepts_a_rate_table_and_skips_non_numeric_entries(self):
+        rates = ExactRates(RateTable.from_rates(dict(RATES, timestamp="Fri, 17 Oct 2025")))
+
+        self.assertNotIn("timestamp", rates)
+        self.assertEqual(rates.convert(1, "USD", "JPY"), Decimal("150"))
+
+    def test_unknown_currency(self):
+        with self.assertRaises(MoneyError):
+            ExactRates(RATES).convert(1, "XXX", "USD")
+
+    def test_oversized_amounts_are_rejected_before_scaling(self):
+        rates = ExactRates(RATES)
+        for amount in ("1e1000000", "1e-1000000", "1" * 5000, "0." + "1" * 5000, 1e300, 10 ** 40):
+            with self.assertRaises(MoneyError):
+                rates.convert(amount, "USD", "KES")
+        with self.assertRaises(MoneyError):
+            to_minor("1e1000000", "USD")
+
+    def test_large_amounts_are_not_rounded_to_28_digits(self):
+        amount = "1" * 29 + ".01"
+        self.assertEqual(ExactRates(RATES).convert(amount, "USD", "USD"), Decimal(amount))
+
+
+if __name__ == '__main__':
+    unittest.main()
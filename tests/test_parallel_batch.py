@@ -0,0 +1,114 @@
+import io
+import os
+import random
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import batch_stream
+import parallel_batch
+from parallel_batch import run_parallel, shard_ranges
+from rate_table import RateTable
+
+
+RATES = RateTable.from_rates({"USD": 1.0, "KES": 129.0, "EUR": 0.9, "UGX": 3700.0})
+
+
+def quiet():
+    return batch_stream.Progress(io.StringIO())
+
+
+class TestShardRanges(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "lines.txt")
+        with open(self.path, "wb") as f:
+            f.write(b"".join(b"x" * random.Random(i).randint(0, 30) + b"\n" for i in range(500)))
+
+    def test_ranges_cover_the_file_on_line_boundaries(self):
+        with open(self.path, "rb") as f:
+            data = f.read()
+        ranges = shard_ranges(self.path, 7, start=5)
+
+        self.assertEqual(ranges[0][0], 5)
+        self.assertEqual(ranges[-1][1], len(data))
+        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(end, start)
+            self.assertEqual(data[start - 1:start], b"\n")
+        self.assertGreater(len(ranges), 1)
+
+    def test_more_shards_than_lines(self):
+        with open(self.path, "wb") as f:
+            f.write(b"1,USD,KES\n2,USD,KES\n")
+
+        ranges = shard_ranges(self.path, 50)
+
+        self.assertEqual(ranges, [(0, 10), (10, 20)])
+
+    def test_empty_file(self):
+        with open(self.path, "wb"):
+            pass
+
+        self.assertEqual(shard_ranges(self.path, 4), [])
+
+
+@patch.object(parallel_batch, "MIN_SHARD_BYTES", 64)
+class TestRunParallel(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write(self, name, lines):
+        path = os.path.join(self.directory, name)
+        with open(path, "w") as f:
+            f.writelines(lines)
+        return path
+
+    def read(self, path):
+        with open(path) as f:
+            return f.read()
+
+    def make_rows(self, count):
+        rng = random.Random(0)
+        codes = ["USD", "KES", "EUR", "UGX", "XXX"]
+        return [(round(rng.uniform(1, 1000), 2), rng.choice(codes), rng.choice(codes)) for _ in range(count)]
+
+    def test_matches_single_process_csv(self):
+        rows = self.make_rows(2000)
+        source = self.write("ledger.csv", ["from,to,amount\n"] + [f"{f},{t},{a}\n" for a, f, t in rows])
+        serial = os.path.join(self.directory, "serial.csv")
+        parallel = os.path.join(self.directory, "parallel.csv")
+
+        expected = batch_stream.run_batch(source, RATES, serial, progress=quiet())
+        counts = run_parallel(source, RATES, parallel, progress=quiet(), workers=3)
+
+        self.assertEqual(counts, expected)
+        self.assertGreater(counts["errors"], 0)
+        self.assertEqual(self.read(parallel), self.read(serial))
+
+    def test_matches_single_process_ndjson(self):
+        rows = self.make_rows(1000)
+        source = self.write("ledger.ndjson", [f'{{"amount": {a}, "from": "{f}", "to": "{t}"}}\n' for a, f, t in rows])
+        serial = os.path.join(self.directory, "serial.ndjson")
+        parallel = os.path.join(self.directory, "parallel.ndjson")
+
+        batch_stream.run_batch(source, RATES, serial, progress=quiet())
+        run_batch_counts = batch_stream.run_batch(source, RATES, parallel, progress=quiet(), workers=2)
+
+        self.assertEqual(run_batch_counts["rows"], 1000)
+        self.assertEqual(self.read(parallel), self.read(serial))
+
+    def test_leaves_no_shard_files_behind(self):
+        source = self.write("ledger.csv", [f"{a},{f},{t}\n" for a, f, t in self.make_rows(500)])
+
+        run_parallel(source, RATES.as_dict(), os.path.join(self.directory, "out.csv"), progress=quiet(), workers=2)
+
+        self.assertEqual(sorted(os.listdir(self.directory)), ["ledger.csv", "out.csv"])
+
+
+if __name__ == '__main__':
+    unittest.main()
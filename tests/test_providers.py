@@ -0,0 +1,219 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from api_client import ApiClient
+from providers import (CircuitBreaker, FileProvider, Provider, ProviderChain, ProviderError, V4Provider,
+                       V6Provider, from_v4)
+from transport import Transport
+
+RATES = {"USD": 1.0, "KES": 129.0, "EUR": 0.9}
+
+
+class Upstream:
+    """A local stand-in for one provider: serves the v6 or v4 shape (or "html") after `latency`, or `status`."""
+
+    def __init__(self, schema="v6", latency=0.0, status=200):
+        self.schema = schema
+        self.latency = latency
+        self.status = status
+        self.requests = 0
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                upstream.requests += 1
+                time.sleep(upstream.latency)
+                base = self.path.rstrip("/").rsplit("/", 1)[-1]
+                rates = {code: rate / RATES[base] for code, rate in RATES.items()}
+                if upstream.schema == "v4":
+                    body = {"base": base, "time_last_updated": 1760659201, "rates": rates}
+                else:
+                    body = {"result": "success", "base_code": base, "time_last_update_unix": 1760659201,
+                            "conversion_rates": rates}
+                data = b"<html>Maintenance</html>" if upstream.schema == "html" else json.dumps(body).encode()
+                self.send_response(upstream.status)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/{schema}/"
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class ProviderTestCase(unittest.TestCase):
+
+    def upstream(self, **kwargs):
+        upstream = Upstream(**kwargs)
+        self.addCleanup(upstream.close)
+        return upstream
+
+    def transport(self):
+        transport = Transport(max_retries=0)
+        self.addCleanup(transport.close)
+        return transport
+
+
+class TestAdapters(ProviderTestCase):
+
+    def test_v6_and_v4_tables_have_the_same_shape(self):
+        v6 = V6Provider("KEY", self.upstream().url, self.transport()).fetch("EUR")
+        v4 = V4Provider(self.upstream(schema="v4").url, self.transport()).fetch("EUR")
+
+        for payload in (v6, v4):
+            self.assertEqual(payload["base_code"], "EUR")
+            self.assertAlmostEqual(payload["conversion_rates"]["KES"], 129.0 / 0.9)
+            self.assertEqual(payload["time_last_update_unix"], 1760659201)
+        self.assertTrue(v4["time_last_update_utc"].endswith("+0000"))
+
+    def test_v4_errors(self):
+        with self.assertRaises(ProviderError):
+            from_v4({"success": False, "error": "invalid_access_key"})
+        with self.assertRaises(ValueError):
+            from_v4({"base": "USD", "rates": {"USD": 1, "KES": -1}})
+
+    def test_http_adapters_do_not_retry_by_default(self):
+        # The chain fails over; a retrying adapter would hold the fallback back by its backoff.
+        self.assertEqual(V6Provider("KEY").transport.max_retries, 0)
+        self.assertEqual(V4Provider().transport.max_retries, 0)
+        with self.assertRaises(TypeError):
+            Provider()
+
+    def test_file_provider_rebases_and_reports_missing_files(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, "rates.json")
+        with open(path, "w") as f:
+            json.dump({"base": "USD", "time_last_updated": 1760659201, "rates": RATES}, f)
+
+        payload = FileProvider(path).fetch("KES")
+        self.assertEqual(payload["base_code"], "KES")
+        self.assertAlmostEqual(payload["conversion_rates"]["USD"], 1 / 129.0)
+        with self.assertRaises(ProviderError):
+            FileProvider(path).fetch("JPY")
+        with self.assertRaises(ProviderError):
+            FileProvider(os.path.join(directory, "missing.json")).fetch("USD")
+
+
+class TestProviderChain(ProviderTestCase):
+
+    def test_failing_provider_falls_back_to_the_next(self):
+        failing = self.upstream(status=503)
+        chain = ProviderChain([V6Provider("KEY", failing.url, self.transport()),
+                               V4Provider(self.upstream(schema="v4").url, self.transport())])
+
+        payload = chain.fetch("USD")
+        self.assertEqual(payload["provider"], "v4")
+        self.assertEqual(failing.requests, 1)
+
+    def test_slow_provider_is_hedged(self):
+        slow = self.upstream(latency=1.0)
+        fast = self.upstream(schema="v4")
+        chain = ProviderChain([V6Provider("KEY", slow.url, self.transport()),
+                               V4Provider(fast.url, self.transport())], hedge_after=0.05)
+        self.addCleanup(chain.close)
+
+        start = time.perf_counter()
+        payload = chain.fetch("USD")
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(payload["provider"], "v4")
+        self.assertEqual((slow.requests, fast.requests), (1, 1))
+
+    def test_fast_provider_is_not_hedged(self):
+        primary = self.upstream()
+        backup = self.upstream(schema="v4")
+        chain = ProviderChain([V6Provider("KEY", primary.url, self.transport()),
+                               V4Provider(backup.url, self.transport())], hedge_after=0.5)
+        self.addCleanup(chain.close)
+
+        self.assertEqual(chain.fetch("USD")["provider"], "v6")
+        self.assertEqual(backup.requests, 0)
+
+    def test_hedged_failure_fails_over_without_waiting(self):
+        failing = self.upstream(status=500)
+        chain = ProviderChain([V6Provider("KEY", failing.url, self.transport()),
+                               V4Provider(self.upstream(schema="v4").url, self.transport())], hedge_after=5)
+        self.addCleanup(chain.close)
+
+        start = time.perf_counter()
+        self.assertEqual(chain.fetch("USD")["provider"], "v4")
+        self.assertLess(time.perf_counter() - start, 1)
+
+    def test_circuit_breaker_skips_a_failing_provider(self):
+        clock = [0.0]
+        failing = self.upstream(status=503)
+        backup = self.upstream(schema="v4")
+        chain = ProviderChain([V6Provider("KEY", failing.url, self.transport()),
+                               V4Provider(backup.url, self.transport())],
+                              failure_threshold=2, reset_timeout=30, clock=lambda: clock[0])
+
+        for _ in range(5):
+            chain.fetch("USD")
+        self.assertEqual(failing.requests, 2)
+        self.assertEqual(chain.breakers[0].state, "open")
+
+        clock[0] += 31  # One trial request, which fails and opens the breaker again.
+        chain.fetch("USD")
+        chain.fetch("USD")
+        self.assertEqual(failing.requests, 3)
+
+        failing.status = 200
+        clock[0] += 31
+        self.assertEqual(chain.fetch("USD")["provider"], "v6")
+        self.assertEqual(chain.breakers[0].state, "closed")
+
+    def test_all_providers_failing(self):
+        chain = ProviderChain([V6Provider("KEY", self.upstream(status=500).url, self.transport())],
+                              failure_threshold=1)
+
+        with self.assertRaisesRegex(ProviderError, "v6"):
+            chain.fetch("USD")
+        with self.assertRaisesRegex(ProviderError, "circuit breakers"):
+            chain.fetch("USD")
+
+    def test_api_client_uses_the_chain(self):
+        chain = ProviderChain([V6Provider("KEY", self.upstream(status=503).url, self.transport()),
+                               V4Provider(self.upstream(schema="v4").url, self.transport())])
+        client = ApiClient("KEY", provider=chain)
+
+        self.assertEqual(client.convert_currency(2, "USD", "KES"), 258.0)
+        self.assertEqual(client.cache.get("USD")["provider"], "v4")
+
+    def test_api_client_reports_a_non_json_body(self):
+        client = ApiClient("KEY", provider=V6Provider("KEY", self.upstream(schema="html").url, self.transport()))
+
+        self.assertEqual(client.get_latest_rates("USD"), {})
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def test_half_open_allows_a_single_trial(self):
+        clock = [0.0]
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=lambda: clock[0])
+        breaker.record_failure()
+        self.assertFalse(breaker.allow())
+
+        clock[0] = 10
+        self.assertEqual(breaker.state, "half-open")
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.record_success()
+        self.assertTrue(breaker.allow())
+
+
+if __name__ == '__main__':
+    unittest.main()
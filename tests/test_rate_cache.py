@@ -0,0 +1,175 @@
+import threading
+import time
+import unittest
+
+from api_client import ApiClient
+from rate_cache import DEFAULT_MAX_STALE, RateCache
+
+
+class FakeClock:
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class CountingLoader:
+
+    def __init__(self, next_update=None, delay=0.0):
+        self.calls = 0
+        self.next_update = next_update
+        self.delay = delay
+        self.lock = threading.Lock()
+
+    def __call__(self, base_currency):
+        with self.lock:
+            self.calls += 1
+            version = self.calls
+        time.sleep(self.delay)
+        payload = {"conversion_rates": {base_currency: 1.0, "KES": 129.0 + version}}
+        if self.next_update is not None:
+            payload["time_next_update_unix"] = self.next_update
+        return payload
+
+
+class TestRateCache(unittest.TestCase):
+
+    def test_fresh_entry_is_served_without_refetching(self):
+        loader = CountingLoader()
+        cache = RateCache(loader, ttl=60, clock=FakeClock())
+
+        first = cache.get("USD")
+        second = cache.get("USD")
+
+        self.assertIs(first, second)
+        self.assertEqual(loader.calls, 1)
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_entries_are_keyed_by_base_currency(self):
+        loader = CountingLoader()
+        cache = RateCache(loader, ttl=60, clock=FakeClock())
+
+        cache.get("USD")
+        cache.get("KES")
+
+        self.assertEqual(loader.calls, 2)
+
+    def test_upstream_next_update_sets_expiry(self):
+        clock = FakeClock(1000.0)
+        loader = CountingLoader(next_update=5000)
+        cache = RateCache(loader, clock=clock, max_stale=0)
+
+        cache.get("USD")
+        clock.now = 4999.0
+        cache.get("USD")
+        self.assertEqual(loader.calls, 1)
+
+        clock.now = 5001.0
+        cache.get("USD")
+        self.assertEqual(loader.calls, 2)
+
+    def test_explicit_ttl_caps_upstream_next_update(self):
+        clock = FakeClock(1000.0)
+        loader = CountingLoader(next_update=5000)
+        cache = RateCache(loader, ttl=10, clock=clock, max_stale=0)
+
+        cache.get("USD")
+        clock.now = 1011.0
+        cache.get("USD")
+
+        self.assertEqual(loader.calls, 2)
+
+    def test_stale_entry_is_served_while_refreshing(self):
+        clock = FakeClock(1000.0)
+        loader = CountingLoader()
+        cache = RateCache(loader, ttl=10, clock=clock)
+        stale = cache.get("USD")
+
+        clock.now = 1020.0
+        self.assertIs(cache.get("USD"), stale)
+
+        for _ in range(100):
+            if cache.stats()["refreshes"] == 2:
+                break
+            time.sleep(0.01)
+        self.assertEqual(cache.get("USD")["conversion_rates"]["KES"], 131.0)
+        self.assertEqual(cache.stats()["stale_hits"], 1)
+
+    def test_failed_background_refresh_keeps_stale_entry(self):
+        clock = FakeClock(1000.0)
+        cache = RateCache(lambda base: {"conversion_rates": {"USD": 1.0}}, ttl=10, clock=clock)
+        stale = cache.get("USD")
+
+        def failing(base):
+            raise ConnectionError("upstream down")
+
+        cache.loader = failing
+        clock.now = 1020.0
+        self.assertIs(cache.get("USD"), stale)
+        for _ in range(100):
+            if cache.stats()["refresh_errors"] == 1:
+                break
+            time.sleep(0.01)
+        self.assertIs(cache.get("USD"), stale)
+
+    def test_concurrent_misses_share_one_fetch(self):
+        loader = CountingLoader(delay=0.05)
+        cache = RateCache(loader, ttl=60)
+        results = []
+
+        threads = [threading.Thread(target=lambda: results.append(cache.get("USD"))) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(loader.calls, 1)
+        self.assertEqual(len(results), 20)
+        self.assertTrue(all(result is results[0] for result in results))
+
+    def test_loader_errors_reach_the_caller_and_are_not_cached(self):
+        calls = []
+
+        def failing(base):
+            calls.append(base)
+            raise ValueError("API Error: invalid-key")
+
+        cache = RateCache(failing, ttl=60)
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                cache.get("USD")
+        self.assertEqual(len(calls), 2)
+
+    def test_hit_ratio(self):
+        cache = RateCache(CountingLoader(), ttl=60, clock=FakeClock())
+        for _ in range(4):
+            cache.get("USD")
+
+        self.assertAlmostEqual(cache.stats()["hit_ratio"], 0.75)
+
+    def test_peek_returns_only_fresh_entries_and_counts_hits(self):
+        clock = FakeClock()
+        cache = RateCache(CountingLoader(), ttl=60, clock=clock)
+        self.assertIsNone(cache.peek("USD"))
+        payload = cache.get("USD")
+
+        self.assertIs(cache.peek("USD"), payload)
+        clock.now += 61
+        self.assertIsNone(cache.peek("USD"))
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))  # Misses are counted by the get() that follows.
+        self.assertAlmostEqual(stats["hit_ratio"], 0.5)
+
+    def test_api_client_builds_its_cache_with_the_given_ttl(self):
+        client = ApiClient("TEST", ttl=30, max_stale=5)
+        self.assertEqual((client.cache.ttl, client.cache.max_stale), (30, 5))
+        self.assertEqual(client.cache.loader, client._fetch_latest)
+        default = ApiClient("TEST").cache
+        self.assertEqual((default.ttl, default.max_stale), (None, DEFAULT_MAX_STALE))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import unittest
+
+import metrics
+from api_client import ApiClient
+from rate_delta import RateDelta, diff
+from server import RateService
+
+RATES = {"USD": 1.0, "KES": 129.0, "EUR": 0.9, "JPY": 150.0}
+
+
+class TestDiff(unittest.TestCase):
+
+    def test_identical_tables(self):
+        delta = diff(RATES, dict(RATES))
+
+        self.assertTrue(delta.unchanged)
+        self.assertEqual(delta.kind, "unchanged")
+
+    def test_changed_added_and_removed_currencies(self):
+        delta = diff(RATES, {"USD": 1.0, "KES": 130.0, "EUR": 0.9, "GBP": 0.8})
+
+        self.assertEqual(delta, RateDelta(frozenset({"KES"}), frozenset({"GBP"}), frozenset({"JPY"})))
+        self.assertEqual(delta.affected, {"KES", "GBP", "JPY"})
+        self.assertEqual(delta.kind, "full")
+        self.assertEqual(diff(RATES, dict(RATES, KES=130.0)).kind, "partial")
+
+
+class SequenceProvider:
+    """Returns the given rate tables one per fetch, with a new upstream timestamp each time."""
+
+    name = "sequence"
+
+    def __init__(self, *tables):
+        self.tables = list(tables)
+        self.fetches = 0
+
+    def fetch(self, base_currency):
+        rates = self.tables[min(self.fetches, len(self.tables) - 1)]
+        self.fetches += 1
+        return {"result": "success", "base_code": base_currency, "conversion_rates": dict(rates),
+                "time_last_update_unix": 1760659201 + 86400 * self.fetches}
+
+
+class RecordingHistory:
+
+    def __init__(self):
+        self.payloads = []
+
+    def append(self, payload):
+        self.payloads.append(payload)
+        return True
+
+
+class TestDeltaRefresh(unittest.TestCase):
+
+    def client(self, *tables):
+        self.history = RecordingHistory()
+        return ApiClient("TEST", provider=SequenceProvider(*tables), history=self.history)
+
+    def refresh(self, client):
+        client.cache.invalidate()
+        return client.cache.get("USD")
+
+    def test_unchanged_refresh_keeps_the_rates_and_skips_the_history(self):
+        client = self.client(RATES)
+        first = client.cache.get("USD")
+        client.convert_currency(1, "USD", "KES")
+        unchanged = metrics.RATE_REFRESH_DELTAS.value(kind="unchanged")
+
+        second = self.refresh(client)
+        self.assertIs(second["conversion_rates"], first["conversion_rates"])
+        self.assertGreater(second["time_last_update_unix"], first["time_last_update_unix"])
+        self.assertEqual(len(self.history.payloads), 1)
+        self.assertTrue(client.last_delta("USD").unchanged)
+        self.assertEqual(metrics.RATE_REFRESH_DELTAS.value(kind="unchanged"), unchanged + 1)
+
+        client.convert_currency(1, "USD", "KES")
+        self.assertEqual(client.memo.stats()["hits"], 1)
+        self.assertEqual(client.memo.stats()["invalidations"], 0)
+
+    def test_partial_refresh_keeps_unaffected_conversions(self):
+        client = self.client(RATES, dict(RATES, KES=130.0))
+        self.assertEqual(client.convert_currency(1, "USD", "KES"), 129.0)
+        self.assertEqual(client.convert_currency(1, "USD", "EUR"), 0.9)
+        changed = metrics.RATES_CHANGED.value(change="changed")
+
+        self.refresh(client)
+        self.assertEqual(client.last_delta("USD"), RateDelta(frozenset({"KES"})))
+        self.assertEqual(metrics.RATES_CHANGED.value(change="changed"), changed + 1)
+        self.assertEqual(len(self.history.payloads), 2)
+        self.assertEqual(client.convert_currency(1, "USD", "KES"), 130.0)
+        self.assertEqual(client.convert_currency(1, "USD", "EUR"), 0.9)
+        self.assertEqual(client.memo.stats()["hits"], 1)
+        self.assertEqual(client.memo.stats()["carried_over"], 1)
+
+    def test_service_updates_its_table_for_changed_rates(self):
+        client = self.client(RATES, RATES, dict(RATES, KES=130.0))
+        service = RateService(client)
+        _, table = service.snapshot()
+
+        self.refresh(client)
+        self.assertIs(service.snapshot()[1], table)
+        self.refresh(client)
+        _, updated = service.snapshot()
+        self.assertIsNot(updated, table)
+        self.assertEqual(updated.cross_rate("EUR", "KES"), 130.0 / 0.9)
+        self.assertEqual(updated.cross_rate("EUR", "JPY"), table.cross_rate("EUR", "JPY"))
+
+
+if __name__ == '__main__':
+    unittest.main()
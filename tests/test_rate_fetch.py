@@ -0,0 +1,44 @@
+import json
+import unittest
+from unittest.mock import MagicMock, patch
+
+import requests
+
+from rate_fetch import describe_fetch_error, fetch_errors, fetch_latest
+
+PAYLOAD = {"result": "success", "base_code": "USD", "conversion_rates": {"USD": 1, "KES": 129.0}}
+
+
+def transport_returning(body):
+    response = MagicMock(content=json.dumps(body).encode())
+    transport = MagicMock()
+    transport.get.return_value = response
+    return patch("transport.default_transport", return_value=transport)
+
+
+class TestFetchLatest(unittest.TestCase):
+
+    def test_returns_the_validated_payload(self):
+        with transport_returning(PAYLOAD):
+            self.assertEqual(fetch_latest("https://example.test/latest/USD")["conversion_rates"],
+                             {"USD": 1.0, "KES": 129.0})
+
+    def test_api_errors_and_non_objects_raise_value_error(self):
+        for body, error in (({"result": "error", "error-type": "invalid-key"}, "invalid-key"),
+                            ([PAYLOAD], "Unexpected response"),
+                            (dict(PAYLOAD, conversion_rates={"KES": -1}), "Invalid rate for KES")):
+            with transport_returning(body):
+                with self.assertRaisesRegex(ValueError, error):
+                    fetch_latest("https://example.test/latest/USD")
+
+    def test_errors_are_caught_and_described_in_one_clause(self):
+        for error, message in ((requests.exceptions.ConnectionError("refused"), "Error fetching exchange rates"),
+                               (json.JSONDecodeError("Expecting value", "", 0), "Error decoding JSON response")):
+            try:
+                raise error
+            except fetch_errors() as e:
+                self.assertTrue(describe_fetch_error(e).startswith(message))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import math
+import os
+import shutil
+import tempfile
+import unittest
+from decimal import Decimal
+from unittest.mock import patch
+
+from api_client import ApiClient
+from rate_history import RateHistory
+
+DAY = 86400
+T0 = 1760659201
+
+
+def payload(day, rates, base="USD"):
+    return {"result": "success", "base_code": base, "time_last_update_unix": T0 + day * DAY,
+            "conversion_rates": rates}
+
+
+class TestRateHistory(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.history = RateHistory(self.directory)
+        self.history.append(payload(0, {"USD": 1.0, "KES": 128.0, "EUR": 0.9}))
+        self.history.append(payload(1, {"USD": 1.0, "KES": 129.0, "EUR": 0.91}))
+        self.history.append(payload(2, {"USD": 1.0, "KES": 130.0, "JPY": 150.0}))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_as_of_picks_the_snapshot_in_force(self):
+        self.assertIsNone(self.history.as_of("USD", T0 - 1))
+        self.assertEqual(self.history.as_of("USD", T0)["KES"], 128.0)
+        self.assertEqual(self.history.as_of("USD", T0 + DAY - 1)["KES"], 128.0)
+        self.assertEqual(self.history.as_of("USD", T0 + DAY + 5)["KES"], 129.0)
+        self.assertEqual(self.history.as_of("USD", T0 + 100 * DAY)["KES"], 130.0)
+        self.assertIsNone(self.history.as_of("EUR", T0))
+
+    def test_currencies_missing_from_a_snapshot_are_absent(self):
+        self.assertNotIn("JPY", self.history.as_of("USD", T0))
+        self.assertNotIn("EUR", self.history.as_of("USD", T0 + 2 * DAY))
+
+        timestamps, values = self.history.series("JPY")
+        self.assertEqual(list(timestamps), [T0, T0 + DAY, T0 + 2 * DAY])
+        self.assertTrue(math.isnan(values[0]))
+        self.assertEqual(values[2], 150.0)
+
+    def test_history_is_append_only(self):
+        self.assertFalse(self.history.append(payload(1, {"USD": 1.0, "KES": 1.0})))
+        self.assertFalse(self.history.append(payload(-5, {"USD": 1.0, "KES": 1.0})))
+        self.assertEqual(self.history.series("KES")[1].tolist(), [128.0, 129.0, 130.0])
+
+    def test_interrupted_append_is_ignored_and_repaired(self):
+        with open(os.path.join(self.directory, "USD", "KES.bin"), "ab") as f:
+            f.write(b"\0" * 8)  # A value written without its index entry.
+
+        self.assertEqual(self.history.series("KES")[1].tolist(), [128.0, 129.0, 130.0])
+        self.history.append(payload(3, {"USD": 1.0, "KES": 131.0}))
+        self.assertEqual(self.history.series("KES")[1].tolist(), [128.0, 129.0, 130.0, 131.0])
+
+    def test_invalid_codes_are_rejected(self):
+        with self.assertRaises(ValueError):
+            self.history.append(payload(3, {"../x": 1.0}))
+        with self.assertRaises(ValueError):
+            self.history.as_of("../USD", T0)
+
+    def test_convert_batch_loads_each_snapshot_once(self):
+        rows = [(T0 + 10, 100, "USD", "KES"), (T0 + DAY, 100, "USD", "KES"), (T0 + 20, 1, "KES", "EUR"),
+                (T0 - 1, 1, "USD", "KES"), (T0 + 2 * DAY, 1, "USD", "EUR")]
+        with patch.object(RateHistory, "rates_at", wraps=self.history.rates_at) as rates_at:
+            results = self.history.convert_batch(rows)
+
+        self.assertEqual(rates_at.call_count, 3)
+        self.assertEqual(results[0].converted_amount, 12800.0)
+        self.assertEqual(results[0].snapshot, T0)
+        self.assertEqual(results[1].converted_amount, 12900.0)
+        self.assertAlmostEqual(results[2].converted_amount, 0.9 / 128.0)
+        self.assertFalse(results[3].ok)
+        self.assertIn("EUR", results[4].error)
+
+    def test_convert_batch_exact(self):
+        results = self.history.convert_batch([(T0, 100, "USD", "KES"), (T0, "x", "USD", "KES")], exact=True)
+
+        self.assertEqual(results[0].converted_amount, Decimal("12800.00"))
+        self.assertFalse(results[1].ok)
+
+
+class TestApiClientHistory(unittest.TestCase):
+
+    def test_fetched_tables_are_recorded(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        history = RateHistory(directory)
+        client = ApiClient("TEST", history=history)
+
+        with patch.object(ApiClient, "_make_request", return_value=payload(0, {"USD": 1.0, "KES": 128.0})):
+            client.get_latest_rates("USD")
+
+        self.assertEqual(history.as_of("USD", T0 + 1)["KES"], 128.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
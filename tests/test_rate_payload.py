@@ -0,0 +1,93 @@
+import json
+import unittest
+from unittest.mock import Mock, patch
+
+import rate_payload
+from api_client import ApiClient, ApiClientError
+from rate_payload import PayloadError, loads, validate
+from transport import decode_json
+
+
+PAYLOAD = {
+    "result": "success",
+    "base_code": "USD",
+    "time_last_update_unix": 1760659201,
+    "time_next_update_unix": 1760745601,
+    "conversion_rates": {"USD": 1, "KES": 128.95, "EUR": 0.9011},
+}
+
+
+class TestValidate(unittest.TestCase):
+
+    def test_rates_are_normalized_to_floats(self):
+        payload = validate(PAYLOAD)
+
+        self.assertEqual(payload["conversion_rates"], {"USD": 1.0, "KES": 128.95, "EUR": 0.9011})
+        self.assertIs(type(payload["conversion_rates"]["USD"]), float)
+        self.assertEqual(payload["time_last_update_unix"], 1760659201)
+        self.assertIs(type(PAYLOAD["conversion_rates"]["USD"]), int)  # The input is left alone.
+
+    def test_invalid_payloads_are_rejected(self):
+        rates = PAYLOAD["conversion_rates"]
+        for payload in ([], dict(PAYLOAD, base_code="usd"), dict(PAYLOAD, conversion_rates=None),
+                        dict(PAYLOAD, conversion_rates=dict(rates, kes=1.0)),
+                        dict(PAYLOAD, conversion_rates=dict(rates, JPY=0)),
+                        dict(PAYLOAD, conversion_rates=dict(rates, JPY=-1.5)),
+                        dict(PAYLOAD, conversion_rates=dict(rates, JPY=float("nan"))),
+                        dict(PAYLOAD, conversion_rates=dict(rates, JPY=float("inf"))),
+                        dict(PAYLOAD, conversion_rates=dict(rates, JPY="149.5")),
+                        dict(PAYLOAD, conversion_rates=dict(rates, JPY=True)),
+                        dict(PAYLOAD, conversion_rates={"KES": 128.95}),
+                        dict(PAYLOAD, time_next_update_unix="tomorrow")):
+            with self.subTest(payload=payload), self.assertRaises(PayloadError):
+                validate(payload)
+
+    def test_payload_error_is_a_value_error(self):
+        self.assertTrue(issubclass(PayloadError, ValueError))
+
+
+class TestLoads(unittest.TestCase):
+
+    def test_both_backends_decode_bytes(self):
+        body = json.dumps(PAYLOAD).encode("utf-8")
+        self.assertEqual(loads(body), PAYLOAD)
+        with patch.object(rate_payload, "_loads", json.loads):
+            self.assertEqual(loads(body), PAYLOAD)
+        self.assertIn(rate_payload.json_backend(), ("orjson", "json"))
+
+    def test_invalid_json_raises_json_decode_error(self):
+        with self.assertRaises(json.JSONDecodeError):
+            loads(b"{not json")
+
+    def test_decode_json_reads_the_body_bytes(self):
+        response = Mock(content=json.dumps(PAYLOAD).encode("utf-8"))
+        self.assertEqual(decode_json(response), PAYLOAD)
+        response.json.assert_not_called()
+
+
+class TestApiClientValidation(unittest.TestCase):
+
+    def test_malformed_table_is_rejected_at_fetch(self):
+        client = ApiClient("TEST")
+        bad = dict(PAYLOAD, conversion_rates={"USD": 1.0, "KES": "n/a"})
+        with patch.object(ApiClient, "_make_request", return_value=bad):
+            with self.assertRaisesRegex(ApiClientError, "Invalid rate for KES"):
+                client._fetch_latest("USD")
+
+    def test_v6_error_and_non_object_bodies_raise_api_client_error(self):
+        client = ApiClient("TEST")
+        for body, error in (({"result": "error", "error-type": "invalid-key"}, "invalid-key"),
+                            ([PAYLOAD], "Expected a JSON object")):
+            with patch.object(ApiClient, "_make_request", return_value=body):
+                with self.assertRaisesRegex(ApiClientError, error):
+                    client._fetch_latest("USD")
+                self.assertEqual(client.get_latest_rates("USD"), {})
+
+    def test_unknown_currency_is_reported_without_a_membership_test(self):
+        client = ApiClient("TEST")
+        with self.assertRaisesRegex(ApiClientError, "XXX"):
+            client.convert_currency(1, "USD", "XXX", validate(PAYLOAD)["conversion_rates"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import math
+import unittest
+
+from rate_delta import diff
+from rate_table import RateTable
+
+
+RATES = {"USD": 1.0, "KES": 129.0, "EUR": 0.9}
+
+
+class TestRateTable(unittest.TestCase):
+
+    def setUp(self):
+        self.table = RateTable.from_rates(RATES)
+
+    def test_detects_base_currency(self):
+        self.assertEqual(self.table.base_currency, "USD")
+
+    def test_cross_rates(self):
+        self.assertAlmostEqual(self.table.cross_rate("EUR", "KES"), 129.0 / 0.9)
+        self.assertAlmostEqual(self.table.cross_rate("KES", "KES"), 1.0)
+        self.assertAlmostEqual(self.table.convert(50, "EUR", "KES"), 50 * 129.0 / 0.9)
+
+    def test_unknown_currency_raises_key_error(self):
+        with self.assertRaises(KeyError):
+            self.table.convert(1, "XXX", "USD")
+
+    def test_behaves_like_the_rate_dict(self):
+        self.assertEqual(dict(self.table), RATES)
+        self.assertIn("KES", self.table)
+        self.assertNotIn("XXX", self.table)
+        self.assertEqual(len(self.table), 3)
+
+    def test_skips_non_numeric_entries(self):
+        table = RateTable.from_rates(dict(RATES, timestamp="Sat, 17 Oct 2026 00:00:01 +0000"))
+
+        self.assertNotIn("timestamp", table)
+        self.assertEqual(table.codes, ("USD", "KES", "EUR"))
+
+    def test_rebase_shares_the_matrix(self):
+        rebased = self.table.rebase("KES")
+
+        self.assertEqual(rebased.base_currency, "KES")
+        self.assertAlmostEqual(rebased["KES"], 1.0)
+        self.assertAlmostEqual(rebased["USD"], 1 / 129.0)
+        self.assertAlmostEqual(rebased.cross_rate("EUR", "USD"), self.table.cross_rate("EUR", "USD"))
+        self.assertEqual(self.table.base_currency, "USD")
+        with self.assertRaises(KeyError):
+            self.table.rebase("XXX")
+
+    def test_from_payload_uses_base_code(self):
+        table = RateTable.from_payload({"base_code": "EUR", "conversion_rates": {"EUR": 1, "USD": 1.1}})
+
+        self.assertEqual(table.base_currency, "EUR")
+        self.assertAlmostEqual(table.convert(10, "EUR", "USD"), 11.0)
+
+    def test_zero_rate_gives_nan(self):
+        table = RateTable.from_rates({"USD": 1.0, "ZWL": 0.0})
+
+        self.assertTrue(math.isnan(table.cross_rate("ZWL", "USD")))
+        self.assertEqual(table.cross_rate("USD", "ZWL"), 0.0)
+
+    def test_needs_a_base_currency(self):
+        with self.assertRaises(ValueError):
+            RateTable.from_rates({"KES": 129.0, "EUR": 0.9})
+
+    def test_updated_recomputes_only_changed_currencies(self):
+        rates = {"USD": 1.0, "KES": 129.0, "EUR": 0.9, "JPY": 150.0, "ZWL": 0.0}
+        table = RateTable.from_rates(rates)
+        newer = dict(rates, KES=130.5, ZWL=320.0)
+
+        updated = table.updated(newer, diff(rates, newer))
+        rebuilt = RateTable.from_rates(newer)
+        self.assertEqual(updated.codes, rebuilt.codes)
+        self.assertEqual(updated.matrix.tobytes(), rebuilt.matrix.tobytes())
+        self.assertEqual(table.cross_rate("EUR", "KES"), 129.0 / 0.9)  # The old table is untouched.
+
+    def test_updated_rebuilds_when_currencies_change(self):
+        newer = {"USD": 1.0, "KES": 129.0, "GBP": 0.8}
+
+        updated = self.table.updated(newer, diff(RATES, newer))
+        self.assertEqual(updated.codes, ("USD", "KES", "GBP"))
+        self.assertIs(self.table.updated(dict(RATES), diff(RATES, dict(RATES))), self.table)
+
+
+if __name__ == '__main__':
+    unittest.main()
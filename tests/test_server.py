@@ -0,0 +1,131 @@
+import http.client
+import json
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from unittest.mock import patch
+
+from api_client import ApiClient, ApiClientError
+from server import RateService, ServiceError, make_server
+
+
+def fake_response(endpoint, params=None):
+    return {"result": "success", "base_code": "USD", "time_last_update_unix": 1760659201,
+            "conversion_rates": {"USD": 1.0, "KES": 129.0, "EUR": 0.9, "JPY": 150.0}}
+
+
+@patch.object(ApiClient, "_make_request", side_effect=fake_response)
+class TestRateService(unittest.TestCase):
+
+    def test_table_is_only_rebuilt_for_new_rates(self, mock_request):
+        service = RateService(ApiClient("TEST"))
+        _, table = service.snapshot()
+        self.assertIs(service.snapshot()[1], table)
+
+        service.client.cache.invalidate()
+        self.assertIs(service.snapshot()[1], table)  # A new payload with the same rates.
+
+        moved = fake_response("latest/USD")
+        moved["conversion_rates"]["KES"] = 130.0
+        mock_request.side_effect = lambda endpoint, params=None: moved
+        service.client.cache.invalidate()
+        self.assertIsNot(service.snapshot()[1], table)
+        self.assertEqual(service.snapshot()[1].cross_rate("USD", "KES"), 130.0)
+        self.assertEqual(mock_request.call_count, 3)
+
+    def test_convert(self, mock_request):
+        service = RateService(ApiClient("TEST"))
+
+        self.assertEqual(service.convert(100, "USD", "KES")["converted_amount"], 12900.0)
+        self.assertEqual(service.convert("100", "EUR", "KES", exact=True)["converted_amount"], "14333.33")
+        with self.assertRaises(ServiceError):
+            service.convert(1, "USD", "XXX")
+        with self.assertRaises(ServiceError):
+            service.convert(1, "USD", "KES", exact=True, rounding="sideways")
+
+    def test_convert_batch_reports_errors_per_row(self, mock_request):
+        body = RateService(ApiClient("TEST")).convert_batch(
+            [[100, "USD", "KES"], {"amount": 2, "from": "EUR", "to": "USD"}, [1, "USD", "XXX"], "junk"])
+
+        results = body["results"]
+        self.assertEqual(results[0]["converted_amount"], 12900.0)
+        self.assertAlmostEqual(results[1]["converted_amount"], 2 / 0.9)
+        self.assertIn("XXX", results[2]["error"])
+        self.assertIn("error", results[3])
+        self.assertEqual(body["time_last_update_unix"], 1760659201)
+
+    def test_unavailable_rates(self, mock_request):
+        mock_request.side_effect = ApiClientError("down")
+
+        with self.assertRaises(ServiceError) as context:
+            RateService(ApiClient("TEST")).convert(1, "USD", "KES")
+        self.assertEqual(context.exception.status, 503)
+
+
+class TestHttpServer(unittest.TestCase):
+
+    def setUp(self):
+        patcher = patch.object(ApiClient, "_make_request", side_effect=fake_response)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.service = RateService(ApiClient("TEST"), refresh_interval=0.01)
+        self.service.start()
+        self.addCleanup(self.service.stop)
+        self.httpd = make_server(self.service, port=0)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.addCleanup(self.httpd.server_close)
+        self.addCleanup(self.httpd.shutdown)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def request(self, path, body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        try:
+            with urllib.request.urlopen(self.url + path, data) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read())
+
+    def test_endpoints(self):
+        self.assertEqual(self.request("/convert?amount=100&from=USD&to=KES"),
+                         (200, {"amount": 100.0, "from": "USD", "to": "KES", "converted_amount": 12900.0,
+                                "time_last_update_unix": 1760659201}))
+        status, body = self.request("/convert", {"amount": "10", "from": "USD", "to": "JPY", "exact": True})
+        self.assertEqual(body["converted_amount"], "1500")
+        status, body = self.request("/batch", {"conversions": [[1, "USD", "EUR"], [1, "USD", "XXX"]]})
+        self.assertEqual(status, 200)
+        self.assertEqual([row["error"] is None for row in body["results"]], [True, False])
+        self.assertEqual(self.request("/health")[1]["status"], "ok")
+
+    def test_bad_requests(self):
+        self.assertEqual(self.request("/convert?amount=abc&from=USD&to=KES")[0], 400)
+        self.assertEqual(self.request("/convert?amount=1&from=USD&to=XXX")[0], 400)
+        self.assertEqual(self.request("/batch", {"conversions": "nope"})[0], 400)
+        self.assertEqual(self.request("/nowhere")[0], 404)
+        self.assertEqual(self.request("/convert", {"amount": 1, "from": "USD", "to": "KES", "exact": True,
+                                                   "rounding": ["half-up"]})[0], 400)
+        self.assertEqual(self.request("/batch", {"conversions": [], "rounding": {}})[0], 400)
+        self.assertEqual(self.request("/convert", {"amount": "1e1000000", "from": "USD", "to": "KES",
+                                                   "exact": True})[0], 400)
+
+    def test_non_finite_amounts(self):
+        for amount in ("inf", "-inf", "nan", "1e308"):
+            self.assertEqual(self.request(f"/convert?amount={amount}&from=USD&to=KES")[0], 400)
+        status, body = self.request("/batch", {"conversions": [[float("nan"), "USD", "KES"], [1, "USD", "KES"]]})
+        self.assertEqual(status, 200)
+        self.assertEqual(body["results"][0]["amount"], "nan")
+        self.assertIsNotNone(body["results"][0]["error"])
+        self.assertEqual(body["results"][1]["converted_amount"], 129.0)
+
+    def test_bad_content_length(self):
+        for length in ("-1", "abc"):
+            connection = http.client.HTTPConnection("127.0.0.1", self.httpd.server_address[1], timeout=5)
+            self.addCleanup(connection.close)
+            connection.putrequest("POST", "/convert")
+            connection.putheader("Content-Length", length)
+            connection.endheaders()
+            self.assertEqual(connection.getresponse().status, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
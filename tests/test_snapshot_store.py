@@ -0,0 +1,137 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from snapshot_store import SnapshotStore, SnapshotStoreError, encode_snapshot, load_rates_payload
+
+
+PAYLOAD = {
+    "result": "success",
+    "base_code": "USD",
+    "time_last_update_unix": 1760659201,
+    "time_next_update_unix": 1760745601,
+    "conversion_rates": {"USD": 1.0, "KES": 128.95, "EUR": 0.9011, "JPY": 149.53},
+}
+
+
+class TestSnapshotStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = SnapshotStore(self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_round_trip(self):
+        self.assertTrue(self.store.write(PAYLOAD))
+
+        with self.store.read("USD") as snapshot:
+            self.assertEqual(snapshot.base_currency, "USD")
+            self.assertEqual(snapshot.last_update, 1760659201)
+            self.assertEqual(snapshot.codes, ("USD", "KES", "EUR", "JPY"))
+            self.assertEqual(snapshot.rate("KES"), 128.95)
+            payload = snapshot.to_payload()
+
+        self.assertEqual(payload["conversion_rates"], PAYLOAD["conversion_rates"])
+        self.assertEqual(payload["time_last_update_utc"], "Fri, 17 Oct 2025 00:00:01 +0000")
+
+    def test_same_version_is_not_rewritten(self):
+        self.store.write(PAYLOAD)
+        self.assertFalse(self.store.write(dict(PAYLOAD)))
+
+        newer = dict(PAYLOAD, time_last_update_unix=PAYLOAD["time_last_update_unix"] + 86400)
+        self.assertTrue(self.store.write(newer))
+        self.assertEqual(os.listdir(self.directory), ["rates-USD.bin"])
+
+    def test_unchanged_rates_are_still_rewritten_atomically(self):
+        self.store.write(PAYLOAD)
+        inode = os.stat(self.store.path_for("USD")).st_ino
+        newer = dict(PAYLOAD, time_last_update_unix=PAYLOAD["time_last_update_unix"] + 86400,
+                     time_next_update_unix=PAYLOAD["time_next_update_unix"] + 86400)
+
+        with self.store.read("USD") as reader:
+            self.assertTrue(self.store.write(newer))
+            # A reader holding the old file keeps its whole header; the new one is renamed in.
+            self.assertEqual(reader.last_update, PAYLOAD["time_last_update_unix"])
+        self.assertNotEqual(os.stat(self.store.path_for("USD")).st_ino, inode)
+        with open(self.store.path_for("USD"), "rb") as f:
+            self.assertEqual(f.read(), encode_snapshot(newer))
+
+    def test_missing_or_corrupt_files_read_as_none(self):
+        self.assertIsNone(self.store.read("USD"))
+
+        with open(self.store.path_for("USD"), "wb") as f:
+            f.write(encode_snapshot(PAYLOAD)[:-3])
+        self.assertIsNone(self.store.read("USD"))
+
+    def test_invalid_codes_are_rejected(self):
+        with self.assertRaises(ValueError):
+            self.store.write(dict(PAYLOAD, conversion_rates={"timestamp": 1.0}))
+
+
+class TestLoadRatesPayload(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = SnapshotStore(self.directory)
+        self.fetches = []
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def fetch(self, base_currency):
+        self.fetches.append(base_currency)
+        return dict(PAYLOAD, time_next_update_unix=2 ** 40)
+
+    def failing_fetch(self, base_currency):
+        raise ConnectionError("network down")
+
+    def test_fresh_snapshot_skips_network(self):
+        self.store.write(dict(PAYLOAD, time_next_update_unix=2 ** 40))
+
+        payload = load_rates_payload("USD", self.fetch, self.store)
+
+        self.assertEqual(self.fetches, [])
+        self.assertEqual(payload["conversion_rates"]["KES"], 128.95)
+
+    def test_missing_or_stale_snapshot_is_fetched_and_stored(self):
+        load_rates_payload("USD", self.fetch, self.store)
+        self.assertEqual(self.fetches, ["USD"])
+
+        with self.store.read("USD") as snapshot:
+            self.assertTrue(snapshot.is_fresh())
+
+    def test_refresh_always_fetches(self):
+        self.store.write(dict(PAYLOAD, time_next_update_unix=2 ** 40))
+
+        load_rates_payload("USD", self.fetch, self.store, refresh=True)
+
+        self.assertEqual(self.fetches, ["USD"])
+
+    def test_offline_uses_stale_snapshot(self):
+        self.store.write(PAYLOAD)
+
+        payload = load_rates_payload("USD", self.failing_fetch, self.store, offline=True)
+
+        self.assertEqual(payload["base_code"], "USD")
+
+    def test_offline_without_snapshot_raises(self):
+        with self.assertRaises(SnapshotStoreError):
+            load_rates_payload("USD", self.fetch, self.store, offline=True)
+
+    def test_network_failure_falls_back_to_stale_snapshot(self):
+        self.store.write(PAYLOAD)
+
+        payload = load_rates_payload("USD", self.failing_fetch, self.store)
+
+        self.assertEqual(payload["time_last_update_unix"], PAYLOAD["time_last_update_unix"])
+
+    def test_network_failure_without_snapshot_raises(self):
+        with self.assertRaises(ConnectionError):
+            load_rates_payload("USD", self.failing_fetch, self.store)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+from snapshot_store import SnapshotStore
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+# Runs an entry point's main() against a stored snapshot and reports which modules got imported.
+SCRIPT = """
+import json, sys
+sys.argv = [sys.argv[1]] + sys.argv[2:]
+module = __import__(sys.argv[0])
+module.main()
+print(json.dumps(sorted(sys.modules)), file=sys.stderr)
+"""
+
+HEAVY = ("requests", "urllib3", "numpy", "money", "transport")
+
+
+class TestFastStart(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        SnapshotStore(self.directory).write({
+            "result": "success", "base_code": "USD", "time_last_update_unix": 1760659201,
+            "time_last_update_utc": "Fri, 17 Oct 2025 00:00:01 +0000",
+            "time_next_update_unix": int(time.time()) + 3600,
+            "conversion_rates": {"USD": 1.0, "KES": 128.95, "EUR": 0.9183},
+        })
+
+    def run_entry_point(self, module, *args):
+        env = dict(os.environ, PYTHONPATH=SRC, CURRENCY_CONVERTER_CACHE_DIR=self.directory)
+        process = subprocess.run([sys.executable, "-c", SCRIPT, module, *args], env=env,
+                                 capture_output=True, text=True, check=True)
+        return process.stdout, json.loads(process.stderr.splitlines()[-1])
+
+    def test_cached_conversion_skips_heavy_imports(self):
+        for module in ("cli", "converter"):
+            with self.subTest(module=module):
+                stdout, modules = self.run_entry_point(module, "100", "USD", "KES")
+
+                self.assertIn("12895.00 KES", stdout)
+                self.assertEqual([name for name in HEAVY if name in modules], [])
+
+    def test_exact_mode_loads_money_only(self):
+        stdout, modules = self.run_entry_point("converter", "--exact", "100", "USD", "KES")
+
+        self.assertIn("12895.00 KES", stdout)
+        self.assertIn("money", modules)
+        self.assertNotIn("requests", modules)
+
+    def test_exact_mode_keeps_every_digit_of_the_amount(self):
+        for module in ("cli", "converter"):
+            with self.subTest(module=module):
+                stdout, _ = self.run_entry_point(module, "--exact", "12345678901234567.89", "USD", "USD")
+
+                self.assertIn("= 12345678901234567.89 USD", stdout)
+
+    def test_batch_mode_reports_missing_rates_on_stderr(self):
+        batch = os.path.join(self.directory, "batch.csv")
+        with open(batch, "w") as f:
+            f.write("100,USD,KES\n")
+        empty = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, empty)
+        for module in ("cli", "converter"):
+            with self.subTest(module=module):
+                process = subprocess.run([sys.executable, "-m", module, "--offline", "--batch", batch],
+                                         env=dict(os.environ, PYTHONPATH=SRC, CURRENCY_CONVERTER_CACHE_DIR=empty),
+                                         capture_output=True, text=True)
+
+                self.assertEqual(process.returncode, 1)
+                self.assertEqual(process.stdout, "")
+                self.assertIn("No stored rates", process.stderr)
+
+    def test_importing_utils_is_cheap(self):
+        process = subprocess.run([sys.executable, "-c", "import sys, utils; print(' '.join(sys.modules))"],
+                                 env=dict(os.environ, PYTHONPATH=SRC), capture_output=True, text=True, check=True)
+
+        self.assertEqual([name for name in HEAVY if name in process.stdout.split()], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
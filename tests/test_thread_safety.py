@@ -0,0 +1,111 @@
+import threading
+import time
+import unittest
+
+from api_client import ApiClient
+
+
+class VersionedLoader:
+    """
+    Serves a new snapshot on every fetch; within one snapshot 1 EUR is always 100 KES.
+
+    Every fetch moves GBP but EUR and KES only move on every other one, so refreshes alternate
+    between changing some rates (the memo carries EUR -> KES results over) and changing them all.
+    """
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.version = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, base_currency):
+        with self.lock:
+            self.version += 1
+            version = self.version
+        time.sleep(self.delay)
+        step = (version + 1) // 2
+        return {"result": "success", "base_code": base_currency,
+                "conversion_rates": {"USD": 1.0, "EUR": float(step), "KES": 100.0 * step, "GBP": 0.5 * version}}
+
+    def serve(self, client):
+        """Answers the client's API requests, so fetched tables are validated and published as usual."""
+        client._make_request = lambda endpoint, params=None: self(endpoint.rsplit("/", 1)[-1])
+        return client
+
+
+class TestSharedApiClient(unittest.TestCase):
+
+    def test_published_snapshots_are_read_only(self):
+        client = VersionedLoader().serve(ApiClient("TEST"))
+        rates = client.get_latest_rates()
+
+        with self.assertRaises(TypeError):
+            rates["KES"] = 1.0
+        with self.assertRaises(TypeError):
+            client.cache.get()["conversion_rates"] = {}
+
+    def test_convert_currency_from_many_threads_while_refreshing(self):
+        loader = VersionedLoader(delay=0.005)
+        client = loader.serve(ApiClient("TEST", ttl=0.01))
+        client.convert_currency(1, "EUR", "KES")
+        go = threading.Event()
+        stop = threading.Event()
+        errors = []
+        slowest = [0.0]
+
+        def reader(seed):
+            amount = seed
+            go.wait()
+            while not stop.is_set():
+                amount = amount % 97 + 1
+                start = time.perf_counter()
+                try:
+                    converted = client.convert_currency(amount, "EUR", "KES")
+                except Exception as e:  # Any exception is a failure of the test.
+                    errors.append(repr(e))
+                    return
+                slowest[0] = max(slowest[0], time.perf_counter() - start)
+                if abs(converted - amount * 100.0) > 1e-6:
+                    errors.append(f"{amount} EUR -> {converted} KES")  # Rates from two snapshots.
+
+        def invalidator():
+            go.wait()
+            while not stop.is_set():
+                client.cache.invalidate()  # The next reader fetches synchronously, like a cold start.
+                time.sleep(0.05)
+
+        threads = [threading.Thread(target=reader, args=(i,)) for i in range(32)]
+        threads.append(threading.Thread(target=invalidator))
+        for thread in threads:
+            thread.start()
+        go.set()  # Only once every thread runs: spinning readers would otherwise hold up starting the rest.
+        time.sleep(0.5)
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertGreater(loader.version, 5)
+        memo = client.memo.stats()
+        self.assertGreater(memo["invalidations"], 0)
+        self.assertGreater(memo["carried_over"], 0)
+        self.assertEqual(client.last_delta().changed - {"EUR", "KES"}, {"GBP"})
+
+    def test_readers_do_not_wait_for_a_refresh(self):
+        loader = VersionedLoader()
+        clock = [1000.0]
+        client = loader.serve(ApiClient("TEST", ttl=60))
+        client.cache.clock = lambda: clock[0]
+        client.convert_currency(1, "EUR", "KES")
+        loader.delay = 0.5
+        clock[0] += 61  # The table has expired; the next reader starts a background refresh.
+
+        start = time.perf_counter()
+        for amount in range(1, 101):
+            self.assertAlmostEqual(client.convert_currency(amount, "EUR", "KES"), amount * 100.0)
+        self.assertLess(time.perf_counter() - start, 0.25)
+        self.assertEqual(client.cache.stats()["stale_hits"], 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,171 @@
+import socket
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from transport import TokenBucket, Transport
+
+
+class FakeUpstream:
+    """A local HTTP server that answers with a scripted list of (status, headers, delay) tuples."""
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.requests = 0
+        self.client_ports = set()
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                upstream.requests += 1
+                upstream.client_ports.add(self.client_address[1])
+                status, headers, delay = upstream.script.pop(0) if upstream.script else (200, {}, 0)
+                time.sleep(delay)
+                body = b'{"result": "success"}' if status == 200 else b""
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        threading.Thread(target=self.httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+        self.url = "http://127.0.0.1:%d/latest/USD" % self.httpd.server_address[1]
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class TestTransport(unittest.TestCase):
+
+    def setUp(self):
+        self.sleeps = []
+
+    def make_transport(self, **kwargs):
+        kwargs.setdefault("sleep", self.sleeps.append)
+        return Transport(**kwargs)
+
+    def serve(self, script):
+        upstream = FakeUpstream(script)
+        self.addCleanup(upstream.close)
+        return upstream
+
+    def test_retries_transient_errors(self):
+        upstream = self.serve([(503, {}, 0), (502, {}, 0)])
+
+        response = self.make_transport().get(upstream.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(upstream.requests, 3)
+        self.assertEqual(len(self.sleeps), 2)
+
+    def test_backoff_grows_exponentially_with_jitter(self):
+        upstream = self.serve([(500, {}, 0)] * 3)
+
+        self.make_transport(backoff_base=1.0).get(upstream.url)
+
+        for attempt, delay in enumerate(self.sleeps):
+            self.assertGreaterEqual(delay, 0)
+            self.assertLessEqual(delay, 2 ** attempt)
+
+    def test_honours_retry_after(self):
+        upstream = self.serve([(429, {"Retry-After": "7"}, 0)])
+
+        response = self.make_transport().get(upstream.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.sleeps, [7.0])
+
+    def test_gives_up_after_max_retries(self):
+        upstream = self.serve([(503, {}, 0)] * 5)
+
+        response = self.make_transport(max_retries=2).get(upstream.url)
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(upstream.requests, 3)
+        with self.assertRaises(requests.exceptions.HTTPError):
+            response.raise_for_status()
+
+    def test_client_errors_are_not_retried(self):
+        upstream = self.serve([(404, {}, 0)])
+
+        response = self.make_transport().get(upstream.url)
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(upstream.requests, 1)
+
+    def test_read_timeout_is_retried(self):
+        upstream = self.serve([(200, {}, 0.5)])
+
+        response = self.make_transport(read_timeout=0.1).get(upstream.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.sleeps), 1)
+
+    def test_connection_errors_raise_after_retries(self):
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            self.make_transport(max_retries=1).get(f"http://127.0.0.1:{port}/")
+        self.assertEqual(len(self.sleeps), 1)
+
+    def test_connections_are_kept_alive(self):
+        upstream = self.serve([])
+        transport = self.make_transport()
+
+        for _ in range(5):
+            transport.get(upstream.url)
+
+        self.assertEqual(upstream.requests, 5)
+        self.assertEqual(len(upstream.client_ports), 1)
+
+    def test_rate_limiter_is_applied_to_every_attempt(self):
+        upstream = self.serve([(503, {}, 0)])
+        waits = []
+        bucket = TokenBucket(rate=1.0, capacity=1, sleep=waits.append)
+
+        self.make_transport(rate_limiter=bucket).get(upstream.url)
+
+        self.assertEqual(len(waits), 1)
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_allows_burst_then_paces(self):
+        now = [0.0]
+        waits = []
+        bucket = TokenBucket(rate=2.0, capacity=3, clock=lambda: now[0], sleep=waits.append)
+
+        for _ in range(3):
+            self.assertEqual(bucket.acquire(), 0.0)
+        self.assertAlmostEqual(bucket.acquire(), 0.5)
+
+        now[0] = 10.0
+        self.assertEqual(bucket.acquire(), 0.0)
+        self.assertEqual(waits, [0.5])
+
+    def test_for_plan_spreads_monthly_quota(self):
+        bucket = TokenBucket.for_plan("Pro")
+
+        self.assertAlmostEqual(bucket.rate * 30 * 86400, 30000)
+
+        with self.assertRaises(ValueError):
+            TokenBucket.for_plan("platinum")
+
+
+if __name__ == '__main__':
+    unittest.main()